@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+三个站点爬虫（人社部、发改委、广州市人社局）共用的基础模块
+
+各站点目录中的脚本通过把仓库根目录加入 sys.path 来导入本包。
+"""
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按URL后缀和 Content-Type 区分网页与文件
+
+列表页和检索结果中有些条目直接链接到 PDF、Word、OFD 等文件。这些链接不应按网页下载、解码和解析，
+而应交给附件下载流程（流式写入磁盘）：
+- 请求前：is_document_url(url) 按URL路径的后缀判断
+- 收到响应头后、读取响应体前：is_html_response(response) 按 Content-Type 判断（请求需使用 stream=True）
+
+用法：
+    from crawler_common.content_types import is_document_url, is_html_response, NotHTMLError
+
+    if is_document_url(url):
+        ...  # 作为附件处理，不请求
+    response = session.get(url, stream=True)
+    if not is_html_response(response):
+        response.close()
+        raise NotHTMLError(url, response.headers.get('Content-Type'))
+    html = response.text
+"""
+
+import mimetypes
+import os
+from urllib.parse import unquote, urlsplit
+
+# 按附件处理的文件后缀
+DOCUMENT_EXTENSIONS = frozenset(('.pdf', '.doc', '.docx', '.ofd', '.wps', '.xls', '.xlsx', '.et', '.ppt', '.pptx',
+                                 '.zip', '.rar', '.7z', '.txt', '.csv', '.jpg', '.jpeg', '.png', '.gif', '.tif',
+                                 '.tiff', '.mp4', '.mp3'))
+# 按网页处理的 Content-Type（没有 Content-Type 时也按网页处理）
+HTML_CONTENT_TYPES = frozenset(('text/html', 'application/xhtml+xml', 'text/plain'))
+
+
+class NotHTMLError(Exception):
+    """响应不是网页（按 Content-Type 判断），应作为附件处理"""
+
+    def __init__(self, url, content_type):
+        super().__init__(f"不是网页（Content-Type: {content_type}）: {url}")
+        self.url = url
+        self.content_type = content_type
+
+
+def url_extension(url):
+    """URL路径的后缀（小写，含点），没有后缀时返回空字符串"""
+    return os.path.splitext(unquote(urlsplit(url).path))[1].lower()
+
+
+def is_document_url(url):
+    """URL是否直接指向文件（PDF、Word、OFD、压缩包等）"""
+    return url_extension(url) in DOCUMENT_EXTENSIONS
+
+
+def is_html_response(response):
+    """响应是否是网页：只看响应头，不读取响应体"""
+    content_type = response.headers.get('Content-Type', '')
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return not media_type or media_type in HTML_CONTENT_TYPES
+
+
+def document_name(url, content_type=None):
+    """由URL得到文件名，作为附件名称；URL没有后缀时按 Content-Type 补上后缀"""
+    name = os.path.basename(unquote(urlsplit(url).path)) or 'attachment'
+    if content_type and not os.path.splitext(name)[1]:
+        name += mimetypes.guess_extension(content_type.split(';', 1)[0].strip()) or ''
+    return name
+
+
+def stream_to_file(response, filepath, chunk_size=65536):
+    """把响应体流式写入文件（先写临时文件再改名），返回写入的字节数"""
+    tmp_path = filepath + '.part'
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    size += len(chunk)
+        os.replace(tmp_path, filepath)
+    finally:
+        response.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return size
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分布式抓取（协调者 / worker 模式）
+
+协调者把各站点的列表页写入共享任务队列（crawler_common.work_queue），任意多台机器上的 worker
+从队列领取任务：抓取列表页后把详情页加入队列，抓取详情页后把附件加入队列，结果统一写入队列数据库。
+同一主机的请求间隔由所有 worker 共同遵守，收到429/503时整体暂停。
+
+每个 worker 进程只处理一个站点（三个站点的 config 模块同名，不能在同一进程中同时导入）。
+解析直接复用各站点现有的解析函数：
+- gz:     gz_rsj_crawler 列表接口 + URLContentParser.parse_html
+- mohrss: MOHRSSDetailedParser.parse_search_page / parse_detail_page
+- ndrc:   PolicyDataExtractor.parse_list_page / parse_detail_page + NDRCCrawler.has_next_page
+
+用法（在仓库根目录运行，数据库放在各机器都能访问的共享存储上）：
+    python -m crawler_common.distributed --db /shared/crawl.db seed --site all
+    python -m crawler_common.distributed --db /shared/crawl.db worker --site ndrc
+    python -m crawler_common.distributed --db /shared/crawl.db status
+    python -m crawler_common.distributed --db /shared/crawl.db export --site ndrc --kind detail --output ndrc_detail.jsonl
+
+在模拟站点上试运行：
+    python -m crawler_common.mock_server --port 8765
+    python -m crawler_common.distributed --db /tmp/crawl.db seed --site all --max-pages 2
+    python -m crawler_common.distributed --db /tmp/crawl.db worker --site gz --base-url http://127.0.0.1:8765 --interval 0 --exit-when-idle
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import signal
+import time
+from urllib.parse import urlencode, urljoin, urlparse, urlunparse
+
+import requests
+import urllib3
+
+from crawler_common.site_loader import REPO_ROOT, import_site_module
+from crawler_common.work_queue import WorkQueue, default_worker_id, FAILED
+from crawler_common.metrics import observe_request, count_item
+from crawler_common.log_setup import setup_logging, ProgressLogger
+from crawler_common.content_types import is_document_url, is_html_response, document_name, stream_to_file
+
+logger = logging.getLogger('distributed')
+
+# 任务优先级：数值越小越先执行，先处理附件和详情页，避免列表页展开后任务堆积
+PRIORITY = {'attachment': 0, 'detail': 10, 'list': 20}
+
+DEFAULT_DB = os.path.join(REPO_ROOT, 'distributed', 'crawl.db')
+
+
+def _task(site, kind, url, **payload):
+    return {'site': site, 'kind': kind, 'url': url, 'payload': payload, 'priority': PRIORITY[kind]}
+
+
+def _detail_task(site, url, **payload):
+    """详情页任务；直接链接到文件（PDF、Word、OFD等）的条目作为附件任务，不按网页抓取和解析"""
+    return _task(site, 'attachment' if is_document_url(url) else 'detail', url, **payload)
+
+
+def _retry_after(response):
+    """解析Retry-After头（秒），无法解析时返回None"""
+    value = response.headers.get('Retry-After')
+    try:
+        return max(float(value), 0.0) if value else None
+    except ValueError:
+        return None
+
+
+class SiteHandler:
+    """站点处理器基类：负责生成初始任务、抓取和解析单个任务"""
+
+    site = None
+    hosts = ()              # 站点使用的主机，--base-url 只改写这些主机的请求
+    host_interval = 1.0     # 默认的每主机最小请求间隔（秒）
+    timeout = 30
+
+    def __init__(self, output_dir, base_url=None):
+        self.output_dir = output_dir
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.session = requests.Session()
+
+    def seed(self, max_pages=None):
+        """返回初始任务列表"""
+        raise NotImplementedError
+
+    def rewrite_url(self, url):
+        """把站点主机改写为 --base-url 指定的地址（镜像站或模拟站点）"""
+        if not self.base_url:
+            return url
+        parsed = urlparse(url)
+        if parsed.netloc not in self.hosts:
+            return url
+        base = urlparse(self.base_url)
+        return urlunparse(parsed._replace(scheme=base.scheme, netloc=base.netloc))
+
+    def session_for(self, task):
+        return self.session
+
+    def fetch(self, task, url):
+        """发起一次请求（不在这里重试，失败的任务由队列重新排队）"""
+        # 附件和详情页都先只读取响应头：详情链接按 Content-Type 判断不是网页时直接作为附件保存
+        return self.session_for(task).get(url, timeout=self.timeout, stream=(task['kind'] != 'list'))
+
+    def process(self, task, response):
+        """解析响应，返回 (结果数据, 新任务列表)"""
+        if task['kind'] == 'detail' and not is_html_response(response):
+            return self.process_attachment(task, response)
+        return getattr(self, f"process_{task['kind']}")(task, response)
+
+    def process_attachment(self, task, response):
+        """保存附件到 output_dir/<site>/attachments/，文件名前加URL哈希避免重名"""
+        # URL没有文件后缀时（如不是网页的详情链接）按 Content-Type 补上后缀
+        filename = document_name(task['url'], response.headers.get('Content-Type'))
+        digest = hashlib.sha1(task['url'].encode('utf-8')).hexdigest()[:10]
+        attachment_dir = os.path.join(self.output_dir, self.site, 'attachments')
+        os.makedirs(attachment_dir, exist_ok=True)
+        file_path = os.path.join(attachment_dir, f'{digest}_{filename}')
+        size = stream_to_file(response, file_path)
+        data = dict(task['payload'])
+        data.update({'path': file_path, 'size': size, 'content_type': response.headers.get('Content-Type', '')})
+        return data, []
+
+    def attachment_tasks(self, page_url, attachments, **extra):
+        """由附件列表（含 name、url）生成附件任务"""
+        tasks = []
+        for attachment in attachments:
+            if attachment.get('url'):
+                tasks.append(_task(self.site, 'attachment', urljoin(page_url, attachment['url']),
+                                   name=attachment.get('name', ''), page_url=page_url, **extra))
+        return tasks
+
+
+class GZHandler(SiteHandler):
+    """广州市人社局：JSON列表接口 -> 详情页 -> 附件"""
+
+    site = 'gz'
+    hosts = ('rsj.gz.gov.cn',)
+
+    def __init__(self, output_dir, base_url=None):
+        super().__init__(output_dir, base_url)
+        crawler_module = import_site_module('gz_rsj_crawler', 'gz_rsj_crawler')
+        parser_module = import_site_module('gz_rsj_crawler', 'url_content_parser')
+        self.config = crawler_module.CRAWLER_CONFIG
+        self.types = crawler_module.CRAWLER_TYPES
+        self.session.headers.update(self.config['headers'])
+        self.session.cookies.update(self.config['cookies'])
+        self.parser = parser_module.URLContentParser(os.path.join(output_dir, 'gz_rsj_data.xlsx'),
+                                                     output_dir=os.path.join(output_dir, self.site))
+
+    def list_url(self, type_id, page):
+        params = dict(self.config['params'], page=page)
+        return f"{self.config['base_url_template'].format(type_id)}?{urlencode(params)}"
+
+    def seed(self, max_pages=None):
+        return [_task(self.site, 'list', self.list_url(type_id, 1), type=type_id, page=1, max_pages=max_pages)
+                for type_id in self.types]
+
+    def process_list(self, task, response):
+        payload = task['payload']
+        type_id, page, max_pages = payload['type'], payload['page'], payload.get('max_pages')
+        data = response.json()
+        articles = data.get('articles') or []
+
+        new_tasks = []
+        for article in articles:
+            if article.get('url'):
+                new_tasks.append(_detail_task(self.site, article['url'], type=type_id, article=article))
+
+        # 第一页根据 total 一次性展开剩余页；没有 total 时逐页向后
+        if articles:
+            if page == 1 and data.get('total'):
+                last_page = -(-int(data['total']) // len(articles))
+                next_pages = range(2, last_page + 1)
+            elif page > 1 and data.get('total'):
+                next_pages = []
+            else:
+                next_pages = [page + 1]
+            for next_page in next_pages:
+                if max_pages is None or next_page <= max_pages:
+                    new_tasks.append(_task(self.site, 'list', self.list_url(type_id, next_page),
+                                           type=type_id, page=next_page, max_pages=max_pages))
+
+        return {'type': type_id, 'page': page, 'total': data.get('total'), 'articles': articles}, new_tasks
+
+    def process_detail(self, task, response):
+        result = self.parser.parse_html(task['url'], response.content)
+        if result is None:
+            return {'url': task['url'], 'type': task['payload'].get('type'), 'error': 'no_container'}, []
+        result['type'] = task['payload'].get('type')
+        result['article'] = task['payload'].get('article')
+        attachments = json.loads(result['attachments'])
+        return result, self.attachment_tasks(task['url'], attachments, type=result['type'])
+
+
+class MOHRSSHandler(SiteHandler):
+    """人社部：WAS5检索页 -> 详情页 -> 附件"""
+
+    site = 'mohrss'
+    hosts = ('www.mohrss.gov.cn',)
+    host_interval = 3.0
+
+    def __init__(self, output_dir, base_url=None):
+        super().__init__(output_dir, base_url)
+        raw_module = import_site_module('mohrss_crawler', 'mohrss_raw_crawler')
+        parser_module = import_site_module('mohrss_crawler', 'mohrss_detailed_parser')
+        # 检索页沿用原始爬虫的请求头（iframe内页面）和URL（含perpage），详情页和附件沿用解析器的会话
+        self.raw_crawler = raw_module.MOHRSSRawCrawler()
+        self.parse_page_info = raw_module.parse_page_info
+        self.search_session = self.raw_crawler.session
+        self.parser = parser_module.MOHRSSDetailedParser()
+        self.session = self.parser.session
+
+    def session_for(self, task):
+        return self.search_session if task['kind'] == 'list' else self.session
+
+    def seed(self, max_pages=None):
+        # 检索页的总页数在第一页的分页信息中，处理第一页时再展开其余页
+        return [_task(self.site, 'list', self.raw_crawler.search_url(1), page=1, max_pages=max_pages)]
+
+    def process_list(self, task, response):
+        page, max_pages = task['payload']['page'], task['payload'].get('max_pages')
+        links = self.parser.parse_search_page(response.content)
+        new_tasks = [_detail_task(self.site, urljoin(task['url'], link['url']), policy=link)
+                     for link in links if link.get('url')]
+        total, page_count = self.parse_page_info(response.content)
+        if page == 1 and page_count:
+            last_page = min(page_count, max_pages) if max_pages else page_count
+            new_tasks.extend(_task(self.site, 'list', self.raw_crawler.search_url(next_page), page=next_page)
+                             for next_page in range(2, last_page + 1))
+        return {'page': page, 'total': total, 'links': links}, new_tasks
+
+    def process_detail(self, task, response):
+        policy_info = dict(task['payload']['policy'], url=task['url'])
+        result = self.parser.parse_detail_page(policy_info, response.content)
+        return result, self.attachment_tasks(task['url'], result.get('attachments') or [])
+
+
+class NDRCHandler(SiteHandler):
+    """发改委：分类列表页 -> 详情页 -> 附件"""
+
+    site = 'ndrc'
+    hosts = ('www.ndrc.gov.cn',)
+
+    def __init__(self, output_dir, base_url=None):
+        super().__init__(output_dir, base_url)
+        crawler_module = import_site_module('ndrc_crawler', 'ndrc_crawler')
+        extractor_module = import_site_module('ndrc_crawler', 'data_extractor_full')
+        self.categories = crawler_module.POLICY_CATEGORIES
+        self.has_next_page = crawler_module.NDRCCrawler.has_next_page
+        self.extractor = extractor_module.PolicyDataExtractor()
+        self.session.headers.update(crawler_module.WEBSITE_CONFIG['headers'])
+        self.session.verify = False
+        self.timeout = crawler_module.WEBSITE_CONFIG['timeout']
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    def seed(self, max_pages=None):
+        tasks = []
+        for name, category in self.categories.items():
+            if category.get('enabled', True):
+                tasks.append(_task(self.site, 'list', category['first_page'], category=name, page=1,
+                                   max_pages=max_pages))
+        return tasks
+
+    def process_list(self, task, response):
+        payload = task['payload']
+        name, page, max_pages = payload['category'], payload['page'], payload.get('max_pages')
+        entries = self.extractor.parse_list_page(response.content, name)
+
+        # 只提取列表页字段（EXTRACTION_CONFIG['fields_to_extract']）时不抓取详情页
+        new_tasks = [_detail_task(self.site, entry['full_url'], category=name, entry=entry)
+                     for entry in entries] if self.extractor.needs_detail else []
+        # 与 NDRCCrawler.crawl_category 一致：第一页之后根据分页链接判断是否还有下一页
+        if entries and (max_pages is None or page < max_pages) and (page == 1 or self.has_next_page(response.content)):
+            next_url = self.categories[name]['page_pattern'].format(page)
+            new_tasks.append(_task(self.site, 'list', next_url, category=name, page=page + 1, max_pages=max_pages))
+        return {'category': name, 'page': page, 'entries': entries}, new_tasks
+
+    def process_detail(self, task, response):
+        detail = self.extractor.parse_detail_page(response.content, task['url'])
+        entry = task['payload'].get('entry') or {}
+        result = dict(entry, category=task['payload'].get('category'), **detail)
+        urls = [u for u in detail.get('attachment_links', '').split('; ') if u]
+        names = detail.get('attachments', '').split('; ')
+        attachments = [{'url': url, 'name': names[i] if i < len(names) else ''} for i, url in enumerate(urls)]
+        return result, self.attachment_tasks(task['url'], attachments, category=result['category'])
+
+
+HANDLERS = {
+    'gz': GZHandler,
+    'mohrss': MOHRSSHandler,
+    'ndrc': NDRCHandler
+}
+
+
+class Worker:
+    """从共享队列领取任务并执行，直到收到停止信号（或队列处理完毕）"""
+
+    def __init__(self, queue, handler, worker_id=None, lease_seconds=300, max_attempts=5, backoff=30.0,
+                 poll_interval=5.0, exit_when_idle=False):
+        self.queue = queue
+        self.handler = handler
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.exit_when_idle = exit_when_idle
+        self.stopping = False
+        self.progress = ProgressLogger(f'{handler.site} worker {self.worker_id}', logger=logger)
+
+    def stop(self, *_):
+        """收到信号后处理完当前任务再退出"""
+        logger.info("收到停止信号，处理完当前任务后退出")
+        self.stopping = True
+
+    def run(self):
+        self.queue.register_worker(self.worker_id, self.handler.site)
+        logger.info(f"worker {self.worker_id} 开始处理站点 {self.handler.site}")
+        while not self.stopping:
+            task = self.queue.claim(self.worker_id, site=self.handler.site, lease_seconds=self.lease_seconds)
+            if task is None:
+                if self.exit_when_idle and not self.queue.has_unfinished(self.handler.site):
+                    logger.info("队列中没有剩余任务，worker 退出")
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.run_task(task)
+        self.progress.finish()
+
+    def run_task(self, task):
+        handler = self.handler
+        stage = f"{handler.site}_{task['kind']}"
+        url = handler.rewrite_url(task['url'])
+        host = urlparse(url).netloc
+
+        wait = self.queue.reserve_host_slot(host, handler.host_interval)
+        if wait > 0:
+            time.sleep(wait)
+
+        request_start = time.perf_counter()
+        try:
+            response = handler.fetch(task, url)
+        except requests.exceptions.RequestException as e:
+            observe_request(stage, url, 'error', time.perf_counter() - request_start)
+            self._fail(task, stage, f'请求失败: {e}')
+            return
+        # 附件（包括不是网页的详情链接）流式写入磁盘，这里不读取响应体
+        streamed = task['kind'] == 'attachment' or (task['kind'] == 'detail' and not is_html_response(response))
+        observe_request(stage, url, response.status_code, time.perf_counter() - request_start,
+                        int(response.headers.get('Content-Length') or 0) if streamed else len(response.content))
+
+        try:
+            if response.status_code in (429, 503):
+                retry_after = _retry_after(response)
+                if retry_after is not None:
+                    self.queue.delay_host(host, retry_after)
+                self._fail(task, stage, f'HTTP {response.status_code}', delay=retry_after)
+                return
+            if response.status_code != 200:
+                self._fail(task, stage, f'HTTP {response.status_code}')
+                return
+            try:
+                data, new_tasks = handler.process(task, response)
+            except Exception as e:
+                self._fail(task, stage, f'解析失败: {e}')
+                return
+        finally:
+            response.close()
+
+        if self.queue.complete(task, self.worker_id, data, response.status_code, new_tasks):
+            count_item(stage, 'done')
+            self.progress.update(**{task['kind']: 1})
+            logger.debug("完成 %s %s，新增任务 %d 个", task['kind'], task['url'], len(new_tasks))
+        else:
+            count_item(stage, 'lease_lost')
+            logger.warning(f"任务租约已过期并被其他 worker 接手，丢弃结果: {task['url']}")
+
+    def _fail(self, task, stage, error, delay=None):
+        status = self.queue.fail(task, self.worker_id, error, self.max_attempts, self.backoff, delay)
+        count_item(stage, status)
+        if status == FAILED:
+            logger.error(f"任务超过最大尝试次数 {self.max_attempts}，放弃: {task['url']}（{error}）")
+        else:
+            logger.warning(f"任务第 {task['attempts']} 次执行失败，稍后重试: {task['url']}（{error}）")
+
+
+def cmd_seed(args, queue):
+    sites = sorted(HANDLERS) if args.site == 'all' else [args.site]
+    for site in sites:
+        handler_class = HANDLERS[site]
+        handler = handler_class(args.output_dir)
+        added = queue.add_tasks(handler.seed(args.max_pages))
+        for host in handler_class.hosts:
+            queue.set_host_interval(host, args.interval if args.interval is not None else handler_class.host_interval)
+        print(f"{site}: 新增初始任务 {added} 个")
+
+
+def cmd_worker(args, queue):
+    handler = HANDLERS[args.site](args.output_dir, base_url=args.base_url)
+    if args.interval is not None:
+        handler.host_interval = args.interval
+        for host in handler.hosts + ((urlparse(args.base_url).netloc,) if args.base_url else ()):
+            queue.set_host_interval(host, args.interval)
+    worker = Worker(queue, handler, worker_id=args.worker_id, lease_seconds=args.lease,
+                    max_attempts=args.max_attempts, backoff=args.backoff, poll_interval=args.poll_interval,
+                    exit_when_idle=args.exit_when_idle)
+    signal.signal(signal.SIGINT, worker.stop)
+    signal.signal(signal.SIGTERM, worker.stop)
+    worker.run()
+
+
+def cmd_status(args, queue):
+    stats = queue.stats()
+    statuses = ('pending', 'leased', 'done', 'failed')
+    print(f"{'站点':<10}{'类型':<12}" + ''.join(f'{s:>10}' for s in statuses))
+    for (site, kind), counts in stats.items():
+        print(f"{site:<10}{kind:<12}" + ''.join(f'{counts.get(s, 0):>10}' for s in statuses))
+
+    workers = queue.workers()
+    if workers:
+        print(f"\n{'worker':<32}{'站点':<10}{'完成':>8}{'失败':>8}  最后活动")
+        for w in workers:
+            last_seen = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(w['last_seen']))
+            print(f"{w['worker_id']:<32}{w['site'] or '':<10}{w['done']:>8}{w['failed']:>8}  {last_seen}")
+
+    failed = queue.failed_tasks(args.site)
+    if failed:
+        print("\n最近失败的任务:")
+        for t in failed:
+            print(f"  [{t['site']}/{t['kind']}] {t['url']} 尝试{t['attempts']}次: {t['last_error']}")
+
+
+def cmd_export(args, queue):
+    count = 0
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for result in queue.iter_results(args.site, args.kind):
+            f.write(json.dumps({'site': result['site'], 'kind': result['kind'], 'url': result['url'],
+                                'data': result['data']}, ensure_ascii=False) + '\n')
+            count += 1
+    print(f"已导出 {count} 条结果到: {args.output}")
+
+
+def cmd_retry_failed(args, queue):
+    print(f"已重新排队 {queue.retry_failed(args.site)} 个失败任务")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='基于共享任务队列的分布式抓取')
+    parser.add_argument('--db', default=DEFAULT_DB, help='任务队列数据库路径（多机器运行时放在共享存储上）')
+    parser.add_argument('--wal', action='store_true', help='使用WAL日志模式（仅限单机多进程，不能用于网络文件系统）')
+    parser.add_argument('--output-dir', default=None, help='附件等输出目录，默认为数据库所在目录下的 output/')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    seed = subparsers.add_parser('seed', help='写入各站点的初始列表页任务')
+    seed.add_argument('--site', choices=sorted(HANDLERS) + ['all'], default='all')
+    seed.add_argument('--max-pages', type=int, default=None, help='每个列表最多抓取的页数')
+    seed.add_argument('--interval', type=float, default=None, help='覆盖各站点默认的每主机请求间隔（秒）')
+    seed.set_defaults(func=cmd_seed)
+
+    worker = subparsers.add_parser('worker', help='领取并执行任务')
+    worker.add_argument('--site', choices=sorted(HANDLERS), required=True)
+    worker.add_argument('--worker-id', default=None, help='worker标识，默认为 主机名-进程号')
+    worker.add_argument('--base-url', default=None, help='把站点地址改写为镜像站或模拟站点，如 http://127.0.0.1:8765')
+    worker.add_argument('--interval', type=float, default=None, help='每主机请求间隔（秒），会写入共享队列')
+    worker.add_argument('--lease', type=float, default=300, help='任务租约时长（秒）')
+    worker.add_argument('--max-attempts', type=int, default=5, help='单个任务最多尝试次数')
+    worker.add_argument('--backoff', type=float, default=30.0, help='失败重试的基础退避时间（秒）')
+    worker.add_argument('--poll-interval', type=float, default=5.0, help='队列为空时的轮询间隔（秒）')
+    worker.add_argument('--exit-when-idle', action='store_true', help='队列中没有剩余任务时退出')
+    worker.add_argument('--log-file', default=None, help='日志文件路径')
+    worker.set_defaults(func=cmd_worker)
+
+    status = subparsers.add_parser('status', help='查看队列和worker状态')
+    status.add_argument('--site', choices=sorted(HANDLERS), default=None)
+    status.set_defaults(func=cmd_status)
+
+    export = subparsers.add_parser('export', help='把结果导出为JSON Lines文件')
+    export.add_argument('--site', choices=sorted(HANDLERS), default=None)
+    export.add_argument('--kind', choices=sorted(PRIORITY), default=None)
+    export.add_argument('--output', required=True)
+    export.set_defaults(func=cmd_export)
+
+    retry = subparsers.add_parser('retry-failed', help='把失败的任务重新放回队列')
+    retry.add_argument('--site', choices=sorted(HANDLERS), default=None)
+    retry.set_defaults(func=cmd_retry_failed)
+
+    args = parser.parse_args()
+    if args.output_dir is None:
+        args.output_dir = os.path.join(os.path.dirname(os.path.abspath(args.db)), 'output')
+
+    setup_logging(getattr(args, 'log_file', None),
+                  fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    queue = WorkQueue(args.db, wal=args.wal)
+    try:
+        args.func(args, queue)
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()
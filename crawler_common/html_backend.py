@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可切换的HTML解析后端
+
+各站点的提取函数只用到 BeautifulSoup 的一小部分接口：find、find_all、select、select_one、get、
+get_text、text、string、parent。make_soup 按配置返回支持这些接口的文档对象：
+
+| 后端 | 说明 |
+|------|------|
+| `html.parser` | BeautifulSoup + 标准库解析器（纯Python，原来的做法） |
+| `lxml` | BeautifulSoup + lxml 解析器（C实现的分词和建树，接口完全相同） |
+| `selectolax` | selectolax（lexbor）解析，用 SelectolaxNode 适配上述接口，不构建Python对象树 |
+
+未安装的后端会记录一次警告并退回 `html.parser`。切换后端前可用 parser_bench.py 在保存的页面上核对输出是否一致。
+
+用法：
+    from crawler_common.html_backend import make_soup
+
+    soup = make_soup(html_content, 'selectolax')
+    info_ul = soup.find('ul', class_='clearfix')
+
+    # 只解析正文容器（BeautifulSoup 后端使用 SoupStrainer），没有匹配的元素时返回None
+    soup = make_soup(html_content, 'lxml', scope=('div.article_con', 'div.attachment'))
+
+    # 字节页面按 <meta charset> 解码（没有声明时按UTF-8），抓取时可直接传入 response.content
+    soup = make_soup(response.content, 'lxml')
+
+    # 按块级元素分段提取正文，每个文本节点只输出一次
+    paragraphs = block_texts(soup.find('div', class_='art_p'))
+"""
+
+import codecs
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('html.parser', 'lxml', 'selectolax')
+DEFAULT_BACKEND = 'html.parser'
+
+# BeautifulSoup 中这些标签内的文本不是普通字符串（Script、Stylesheet 等），父节点的 get_text 不包含它们
+_SPECIAL_STRING_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+# block_texts 分段的块级元素（<br> 也视为段落边界）
+BLOCK_TAGS = frozenset(('address', 'article', 'aside', 'blockquote', 'br', 'caption', 'center', 'dd', 'div', 'dl',
+                        'dt', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+                        'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot',
+                        'th', 'thead', 'tr', 'ul'))
+# block_texts 遍历时标记块级元素结束
+_BLOCK_END = object()
+# BeautifulSoup 按空白拆分为列表的属性
+_MULTI_VALUED_ATTRIBUTES = frozenset(('class', 'rel', 'rev', 'accept-charset', 'headers', 'accesskey', 'dropzone'))
+_CSS_IDENTIFIER = re.compile(r'^[A-Za-z_][\w-]*$')
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w-]+)', re.IGNORECASE)
+# 按超集解码的编码（codecs 规范名 -> 超集）
+_SUPERSET_ENCODINGS = {'gb2312': 'gb18030', 'gbk': 'gb18030'}
+
+_unavailable_warned = set()
+
+
+def backend_available(backend):
+    """后端所需的第三方包是否已安装"""
+    try:
+        if backend == 'selectolax':
+            from selectolax.lexbor import LexborHTMLParser  # noqa: F401
+            return True
+        import bs4  # noqa: F401
+        if backend == 'lxml':
+            import lxml  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_backend(backend=None):
+    """返回实际使用的后端名称：未指定时使用默认后端，未安装时退回 html.parser"""
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的HTML解析后端: {backend}（可选: {', '.join(BACKENDS)}）")
+    if backend != DEFAULT_BACKEND and not backend_available(backend):
+        if backend not in _unavailable_warned:
+            _unavailable_warned.add(backend)
+            logger.warning(f"HTML解析后端 {backend} 未安装，退回 {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return backend
+
+
+def sniff_encoding(markup):
+    """按 <meta charset> 判断字节页面的编码，没有声明时按UTF-8
+
+    gb2312、gbk 声明按其超集 gb18030 解码（与浏览器相同），避免页面中个别不在 gb2312 中的字符被替换。
+    """
+    match = _META_CHARSET.search(markup[:2048])
+    if match:
+        encoding = match.group(1).decode('ascii').lower()
+        try:
+            encoding = codecs.lookup(encoding).name
+        except LookupError:
+            return 'utf-8'
+        return _SUPERSET_ENCODINGS.get(encoding, encoding)
+    return 'utf-8'
+
+
+def decode_markup(markup):
+    """把字节解码为字符串：优先使用 <meta charset>，否则按UTF-8解码"""
+    if isinstance(markup, str):
+        return markup
+    return markup.decode(sniff_encoding(markup), errors='replace')
+
+
+def make_soup(markup, backend=None, scope=None):
+    """按指定后端解析HTML（字符串或字节），返回支持 find/find_all/select/get_text 等接口的文档对象
+
+    Args:
+        scope: 只保留匹配这些简单选择器（'tag'、'.class'、'tag.class'）的元素及其子树，
+            列表页只保留列表容器、详情页只保留正文和附件容器；没有任何元素匹配时返回None
+    """
+    backend = resolve_backend(backend)
+    if backend == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser
+        tree = LexborHTMLParser(decode_markup(markup))
+        if not scope:
+            return SelectolaxNode(tree.root.parent or tree.root)
+        # lexbor 建树很快，开销在Python一侧的遍历，因此整页解析后只在匹配的子树中查找
+        roots = _outermost(tree.css(','.join(scope)))
+        return SelectolaxFragment(roots) if roots else None
+    from bs4 import BeautifulSoup
+    # 字节页面直接交给 BeautifulSoup 解码，先按 <meta charset> 尝试，避免逐个猜测编码
+    from_encoding = None if isinstance(markup, str) else sniff_encoding(markup)
+    if not scope:
+        return BeautifulSoup(markup, backend, from_encoding=from_encoding)
+    soup = BeautifulSoup(markup, backend, parse_only=_strainer(scope), from_encoding=from_encoding)
+    return soup if soup.contents else None
+
+
+def iter_elements(soup, selector):
+    """按文档顺序返回可能匹配 selector 的元素，供只遍历一次文档的提取函数使用
+
+    selectolax 后端由 lexbor 按 selector 预先筛选（C实现）；BeautifulSoup 后端直接返回全部元素，
+    逐个遍历比 soupsieve 执行选择器更快。返回的元素可能多于 selector 匹配的元素，调用方需自行判断。
+    """
+    if isinstance(soup, (SelectolaxNode, SelectolaxFragment)):
+        return soup.select(selector)
+    return soup.find_all(True)
+
+
+def block_texts(element):
+    """按块级元素分段提取文本，返回段落列表
+
+    只遍历一次子树，每个文本节点只输出一次，耗时与子树大小成正比：块级元素（BLOCK_TAGS）的开始和结束处分段，
+    段内的文本节点去掉首尾空白后直接拼接（与 get_text(strip=True) 相同），空段落跳过；
+    script、style 等元素中的文本和注释不输出。
+    """
+    if isinstance(element, SelectolaxFragment):
+        nodes = _lexbor_nodes([root._node for root in element._roots])
+    elif isinstance(element, SelectolaxNode):
+        nodes = _lexbor_nodes([element._node])
+    else:
+        nodes = _soup_nodes(element)
+
+    paragraphs, parts = [], []
+    for text in nodes:
+        if text is _BLOCK_END:
+            if parts:
+                paragraphs.append(''.join(parts))
+                parts = []
+        else:
+            text = text.strip()
+            if text:
+                parts.append(text)
+    if parts:
+        paragraphs.append(''.join(parts))
+    return paragraphs
+
+
+def _lexbor_nodes(roots):
+    """按文档顺序返回 lexbor 子树中的文本，块级元素开始和结束处返回 _BLOCK_END"""
+    stack = [iter(roots)]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            continue
+        if node is _BLOCK_END:
+            yield node
+            continue
+        tag = node.tag
+        if tag == '-text':
+            yield node.text_content
+        elif tag not in _SPECIAL_STRING_TAGS and tag != '-comment':
+            if tag in BLOCK_TAGS:
+                yield _BLOCK_END
+                stack.append(iter((_BLOCK_END,)))
+            stack.append(node.iter(include_text=True))
+
+
+def _soup_nodes(root):
+    """按文档顺序返回 BeautifulSoup 子树中的文本，块级元素开始和结束处返回 _BLOCK_END"""
+    from bs4.element import NavigableString, PreformattedString
+    stack = [iter((root,))]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            continue
+        if node is _BLOCK_END:
+            yield node
+        elif isinstance(node, NavigableString):
+            # 注释、文档类型等（PreformattedString）不是正文
+            if not isinstance(node, PreformattedString):
+                yield node
+        elif node.name not in _SPECIAL_STRING_TAGS:
+            if node.name in BLOCK_TAGS:
+                yield _BLOCK_END
+                stack.append(iter((_BLOCK_END,)))
+            stack.append(iter(node.contents))
+
+
+def _parse_selector(selector):
+    """拆分简单选择器 'tag.class' 为 (标签名或None, class或None)"""
+    name, _, class_name = selector.strip().partition('.')
+    return name or None, class_name or None
+
+
+def _strainer(scope):
+    """BeautifulSoup 后端：建树时只保留 scope 中的元素
+
+    SoupStrainer 按标签名集合和class集合分别匹配，可能多保留少量其他组合的元素，不影响提取结果。
+    """
+    from bs4 import SoupStrainer
+    parsed = [_parse_selector(selector) for selector in scope]
+    names = None if any(name is None for name, _ in parsed) else sorted({name for name, _ in parsed})
+    classes = None if any(c is None for _, c in parsed) else sorted({c for _, c in parsed})
+    return SoupStrainer(names, attrs={'class': classes} if classes else {})
+
+
+def _outermost(nodes):
+    """去掉嵌套在其他匹配元素中的元素，保持文档顺序"""
+    matched = {node.mem_id for node in nodes}
+    roots = []
+    for node in nodes:
+        parent = node.parent
+        while parent is not None and parent.mem_id not in matched:
+            parent = parent.parent
+        if parent is None:
+            roots.append(node)
+    return roots
+
+
+def _attribute_value(attributes, key):
+    """按 BeautifulSoup 的约定返回属性值：多值属性为列表，无值属性为空字符串"""
+    value = attributes[key]
+    if value is None:
+        return ''
+    if key in _MULTI_VALUED_ATTRIBUTES:
+        return value.split()
+    return value
+
+
+def _match_value(value, match):
+    """单个字符串与匹配条件比较（字符串、正则、函数、列表）"""
+    if callable(match) and not hasattr(match, 'search'):
+        return bool(match(value))
+    if value is None:
+        return False
+    if hasattr(match, 'search'):
+        return match.search(value) is not None
+    if isinstance(match, (list, tuple, set)):
+        return any(_match_value(value, m) for m in match)
+    return value == match
+
+
+def _match_attribute(attributes, key, match):
+    """属性匹配，规则与 BeautifulSoup 的 find(attr=...) 相同"""
+    present = key in attributes
+    if match is True:
+        return present
+    if match is None or match is False:
+        return not present
+    value = attributes.get(key) if present else None
+    if present and value is None:
+        value = ''
+    if key in _MULTI_VALUED_ATTRIBUTES and value:
+        # 多值属性：任一取值或整个属性字符串匹配即可
+        return any(_match_value(token, match) for token in value.split()) or _match_value(value, match)
+    return _match_value(value, match)
+
+
+class SelectolaxNode:
+    """把 selectolax 节点包装成各提取函数用到的 BeautifulSoup 接口"""
+
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    def __repr__(self):
+        return self._node.html or ''
+
+    def __eq__(self, other):
+        return isinstance(other, SelectolaxNode) and self._node.mem_id == other._node.mem_id
+
+    def __hash__(self):
+        return self._node.mem_id
+
+    # ---- 基本属性 ----
+
+    @property
+    def name(self):
+        tag = self._node.tag
+        return '[document]' if tag == '-document' else tag
+
+    @property
+    def attrs(self):
+        attributes = self._node.attributes
+        return {key: _attribute_value(attributes, key) for key in attributes}
+
+    def get(self, key, default=None):
+        attributes = self._node.attributes
+        if key not in attributes:
+            return default
+        return _attribute_value(attributes, key)
+
+    def __getitem__(self, key):
+        return _attribute_value(self._node.attributes, key)
+
+    def has_attr(self, key):
+        return key in self._node.attributes
+
+    @property
+    def parent(self):
+        parent = self._node.parent
+        return SelectolaxNode(parent) if parent is not None else None
+
+    # ---- 文本 ----
+
+    def _strings(self):
+        """按文档顺序返回 get_text 会包含的文本节点内容"""
+        node = self._node
+        if node.tag == '-text':
+            return [node.text_content]
+        self_special = node.tag in _SPECIAL_STRING_TAGS
+        check_container = self_special or node.css_first(','.join(_SPECIAL_STRING_TAGS)) is not None
+        strings = []
+        for child in node.traverse(include_text=True):
+            if child.tag != '-text':
+                continue
+            if check_container and (child.parent.tag in _SPECIAL_STRING_TAGS) != self_special:
+                continue
+            strings.append(child.text_content)
+        return strings
+
+    def get_text(self, separator='', strip=False):
+        strings = self._strings()
+        if strip:
+            strings = [s.strip() for s in strings]
+            strings = [s for s in strings if s]
+        return separator.join(strings)
+
+    @property
+    def text(self):
+        return self.get_text()
+
+    @property
+    def string(self):
+        """只有一个子节点时返回其文本（子节点是标签时递归），否则返回None"""
+        children = list(self._node.iter(include_text=True))
+        if len(children) != 1:
+            return None
+        child = children[0]
+        if child.tag == '-text':
+            return child.text_content
+        if child.tag == '-comment':
+            return child.comment_content
+        return SelectolaxNode(child).string
+
+    # ---- 查找 ----
+
+    def _css_for(self, name, class_match):
+        """把标签名和简单的class条件转换为CSS选择器，交给lexbor筛选"""
+        if name is None or name is True:
+            names = ['*']
+        elif isinstance(name, str):
+            names = [name]
+        elif isinstance(name, (list, tuple, set)) and all(isinstance(n, str) for n in name):
+            names = list(name)
+        else:
+            return None, False
+        suffix = ''
+        class_in_css = isinstance(class_match, str) and _CSS_IDENTIFIER.match(class_match) is not None
+        if class_in_css:
+            suffix = '.' + class_match
+        return ','.join(n + suffix for n in names), class_in_css
+
+    def _matches(self, node, name, attrs, string):
+        if name is not None and name is not True and not _match_value(node.tag, name):
+            return False
+        attributes = node.attributes
+        for key, match in attrs.items():
+            if not _match_attribute(attributes, key, match):
+                return False
+        if string is not None and not _match_value(SelectolaxNode(node).string, string):
+            return False
+        return True
+
+    @staticmethod
+    def _filters(attrs, string, kwargs):
+        """合并 attrs 和关键字参数：text= 是 string= 的旧名称，class_ 对应 class 属性"""
+        kwargs = dict(kwargs)
+        if 'text' in kwargs:
+            string = kwargs.pop('text')
+        if 'class_' in kwargs:
+            kwargs['class'] = kwargs.pop('class_')
+        return dict(attrs or {}, **kwargs), string
+
+    def _find_all(self, name, attrs, recursive, string, limit, include_self=False):
+        if recursive:
+            selector, class_in_css = self._css_for(name, attrs.get('class'))
+            if selector is not None:
+                if class_in_css:
+                    attrs = {k: v for k, v in attrs.items() if k != 'class'}
+                candidates = self._node.css(selector)
+                name_to_check = None
+            else:
+                candidates = (n for n in self._node.traverse() if n.tag[0] != '-')
+                name_to_check = name
+        else:
+            candidates = (n for n in self._node.iter() if n.tag[0] != '-')
+            name_to_check = name
+
+        # lexbor 的 css() 和 traverse() 包含节点本身，BeautifulSoup 只查找后代
+        self_id = None if include_self else self._node.mem_id
+        results = []
+        for node in candidates:
+            if node.mem_id == self_id:
+                continue
+            if not self._matches(node, name_to_check, attrs, string):
+                continue
+            results.append(SelectolaxNode(node))
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def find_all(self, name=None, attrs=None, recursive=True, string=None, limit=None, **kwargs):
+        attrs, string = self._filters(attrs, string, kwargs)
+        return self._find_all(name, attrs, recursive, string, limit)
+
+    def find(self, name=None, attrs=None, recursive=True, string=None, **kwargs):
+        found = self.find_all(name, attrs, recursive, string, 1, **kwargs)
+        return found[0] if found else None
+
+    def select(self, selector):
+        self_id = self._node.mem_id
+        return [SelectolaxNode(n) for n in self._node.css(selector) if n.mem_id != self_id]
+
+    def select_one(self, selector):
+        self_id = self._node.mem_id
+        for node in self._node.css(selector):
+            if node.mem_id != self_id:
+                return SelectolaxNode(node)
+        return None
+
+
+class SelectolaxFragment:
+    """make_soup(scope=...) 在 selectolax 后端的返回值：只在匹配的子树中查找，相当于只包含这些子树的文档"""
+
+    name = '[document]'
+
+    def __init__(self, nodes):
+        self._roots = [SelectolaxNode(node) for node in nodes]
+
+    def __repr__(self):
+        return ''.join(repr(root) for root in self._roots)
+
+    @property
+    def contents(self):
+        return list(self._roots)
+
+    def get_text(self, separator='', strip=False):
+        texts = [root.get_text(separator, strip) for root in self._roots]
+        return separator.join(t for t in texts if t or not strip)
+
+    @property
+    def text(self):
+        return self.get_text()
+
+    def find_all(self, name=None, attrs=None, recursive=True, string=None, limit=None, **kwargs):
+        attrs, string = SelectolaxNode._filters(attrs, string, kwargs)
+        results = []
+        for root in self._roots:
+            if not recursive:
+                # 子树根节点就是文档的直接子节点
+                if root._matches(root._node, name, attrs, string):
+                    results.append(root)
+            else:
+                remaining = limit - len(results) if limit else None
+                results.extend(root._find_all(name, attrs, True, string, remaining, include_self=True))
+            if limit and len(results) >= limit:
+                return results[:limit]
+        return results
+
+    def find(self, name=None, attrs=None, recursive=True, string=None, **kwargs):
+        found = self.find_all(name, attrs, recursive, string, 1, **kwargs)
+        return found[0] if found else None
+
+    def select(self, selector):
+        return [SelectolaxNode(n) for root in self._roots for n in root._node.css(selector)]
+
+    def select_one(self, selector):
+        for root in self._roots:
+            node = root._node.css_first(selector)
+            if node is not None:
+                return SelectolaxNode(node)
+        return None
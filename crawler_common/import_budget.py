@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模块导入耗时检查
+
+在独立子进程中逐个导入各站点模块，检查：
+- 导入耗时是否超过预算（默认0.5秒，不含解释器启动时间）
+- 是否在导入时加载了 pandas、numpy、bs4、openpyxl、lxml 等重型依赖
+- 是否在导入时配置了日志处理器
+- 是否在导入时创建了文件或目录（站点目录和当前工作目录）
+
+任一模块不满足要求时以非零状态码退出，可放在提交前或CI中运行。
+
+用法：
+    python -m crawler_common.import_budget
+    python -m crawler_common.import_budget --budget 0.3 --modules ndrc_crawler/ndrc_crawler
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 站点目录/模块名
+DEFAULT_MODULES = [
+    'gz_rsj_crawler/config',
+    'gz_rsj_crawler/gz_rsj_crawler',
+    'gz_rsj_crawler/url_content_parser',
+    'gz_rsj_crawler/advanced_content_parser',
+    'gz_rsj_crawler/detail_pipeline',
+    'gz_rsj_crawler/article_store',
+    'mohrss_crawler/config',
+    'mohrss_crawler/mohrss_raw_crawler',
+    'mohrss_crawler/mohrss_detailed_parser',
+    'mohrss_crawler/content_splitter',
+    'mohrss_crawler/simple_download',
+    'mohrss_crawler/mohrss_pipeline',
+    'mohrss_crawler/policy_store',
+    'mohrss_crawler/validity_refresh',
+    'ndrc_crawler/config',
+    'ndrc_crawler/ndrc_crawler',
+    'ndrc_crawler/data_extractor_full',
+    'ndrc_crawler/download_attachments',
+    'ndrc_crawler/attachment_splitter',
+    'ndrc_crawler/content_splitter',
+    'ndrc_crawler/run'
+]
+
+HEAVY_MODULES = ('pandas', 'numpy', 'bs4', 'openpyxl', 'lxml')
+
+PROBE = """
+import json, logging, sys, time
+sys.path.insert(0, {site_path!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'heavy': sorted(name for name in {heavy!r} if name in sys.modules),
+    'log_handlers': len(logging.getLogger().handlers)
+}}))
+"""
+
+
+def _snapshot(directory):
+    """列出目录下的所有文件和子目录（忽略 __pycache__）"""
+    entries = set()
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != '__pycache__']
+        for name in dirs + files:
+            entries.add(os.path.relpath(os.path.join(root, name), directory))
+    return entries
+
+
+def check_module(spec, budget):
+    """在子进程中导入单个模块，返回检查结果"""
+    site_dir, module = spec.split('/')
+    site_path = os.path.join(REPO_ROOT, site_dir)
+    code = PROBE.format(site_path=site_path, module=module, heavy=HEAVY_MODULES)
+
+    before = _snapshot(site_path)
+    with tempfile.TemporaryDirectory(prefix='import_budget_') as workdir:
+        proc = subprocess.run([sys.executable, '-c', code], cwd=workdir,
+                              capture_output=True, text=True, encoding='utf-8')
+        created = sorted(_snapshot(workdir))
+    created += sorted(os.path.join(site_dir, p) for p in _snapshot(site_path) - before)
+
+    result = {'module': spec, 'created': created, 'problems': []}
+    if proc.returncode != 0:
+        result['problems'].append(f"导入失败: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+        return result
+
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    result.update(probe)
+    if probe['seconds'] > budget:
+        result['problems'].append(f"导入耗时 {probe['seconds']:.3f}s 超过预算 {budget:.3f}s")
+    if probe['heavy']:
+        result['problems'].append(f"导入时加载了重型依赖: {', '.join(probe['heavy'])}")
+    if probe['log_handlers']:
+        result['problems'].append("导入时配置了日志处理器")
+    if created:
+        result['problems'].append(f"导入时创建了文件: {', '.join(created)}")
+    return result
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='检查各站点模块的导入耗时和导入副作用')
+    parser.add_argument('--budget', type=float, default=0.5, help='单个模块的导入耗时预算（秒）')
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES, help='要检查的模块，格式为 站点目录/模块名')
+    args = parser.parse_args()
+
+    failed = 0
+    print(f"{'模块':<42}{'耗时(s)':>10}  结果")
+    for spec in args.modules:
+        result = check_module(spec, args.budget)
+        seconds = result.get('seconds')
+        status = '✅' if not result['problems'] else '❌ ' + '；'.join(result['problems'])
+        print(f"{spec:<42}{seconds if seconds is not None else float('nan'):>10.3f}  {status}")
+        if result['problems']:
+            failed += 1
+
+    print(f"\n共检查 {len(args.modules)} 个模块，{failed} 个不满足要求（预算 {args.budget}s）")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面模板（布局）指纹缓存
+
+同一URL前缀下的详情页几乎总是使用同一个模板，没有必要每页都按固定顺序逐个尝试提取方式（候选项）。
+LayoutCache 按模板指纹记住上次成功的候选项，下次先尝试它，失败时自动按原顺序尝试其余候选项。
+
+模板指纹分两级，保证常见情况几乎没有额外开销：
+- URL前缀：主机名加目录路径，去掉文件名和日期目录（如 202508），同一栏目不同月份的页面归为一组
+- 结构哈希：页面中 class 属性取值集合的哈希（一次正则扫描，不解析HTML）。只有某个URL前缀下出现过
+  未命中（同一前缀下有多个模板）后，该前缀的页面才计算结构哈希，按“前缀#哈希”分别记忆
+
+候选项应互斥（页面不是该样式时 probe 返回空），这样无论先尝试哪个候选项，提取结果都与按原顺序尝试相同。
+
+每次查找计入指标 crawler_layout_lookups_total{stage, result}，result 为：
+- hit：已知模板，记住的候选项直接成功
+- miss：已知模板，记住的候选项失败，退回其余候选项
+- new：首次出现的模板
+- none：所有候选项都失败
+
+用法：
+    from crawler_common.layout_cache import LayoutCache
+
+    layouts = LayoutCache('ndrc_detail')
+    layout, result = layouts.find(url, html, ('article_con', 'full_page'), probe)
+    layouts.log_summary(logger)
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from crawler_common.metrics import count_layout
+
+# class 属性取值（以字面量开头，正则可以快速跳过无关内容；字符串和字节各一份，避免先解码整页）
+_CLASS_VALUE = re.compile(r'class\s*=\s*["\']([^"\']*)')
+_CLASS_VALUE_BYTES = re.compile(_CLASS_VALUE.pattern.encode('ascii'))
+# 日期目录：202508、20250808、2025-08 等
+_DATE_SEGMENT = re.compile(r'^\d{4}(?:-?\d{2}){1,2}$')
+
+
+def url_prefix(url):
+    """URL前缀：主机名加目录路径，去掉文件名和日期目录"""
+    parts = urlsplit(url)
+    segments = parts.path.split('/')[:-1]
+    return parts.netloc.lower() + '/'.join(s for s in segments if not _DATE_SEGMENT.match(s))
+
+
+def structure_hash(markup):
+    """页面结构哈希：class 属性取值集合的哈希，markup 可以是字符串或字节"""
+    if isinstance(markup, (bytes, bytearray)):
+        text = b'\n'.join(sorted(set(_CLASS_VALUE_BYTES.findall(markup))))
+    else:
+        text = '\n'.join(sorted(set(_CLASS_VALUE.findall(markup)))).encode('utf-8', 'replace')
+    return hashlib.blake2b(text, digest_size=6).hexdigest()
+
+
+class LayoutCache:
+    """记住每个页面模板成功的候选项，可在多个线程中共用"""
+
+    def __init__(self, stage, max_templates=4096, enabled=True):
+        """
+        Args:
+            stage: 指标中的阶段名，如 'ndrc_detail'
+            max_templates: 最多记住的模板数，超出时淘汰最久未使用的模板
+            enabled: False 时 find() 总是按原顺序尝试候选项（不记忆模板）
+        """
+        self.stage = stage
+        self.max_templates = max_templates
+        self.enabled = enabled
+        self._templates = OrderedDict()  # 指纹 -> {'choice', 'pages', 'hits', 'misses'}
+        self._mixed = set()  # 出现过多个模板、需要计算结构哈希的URL前缀
+        self._totals = {'hit': 0, 'miss': 0, 'new': 0, 'none': 0}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, url, markup):
+        """模板指纹：URL前缀；该前缀下有多个模板时为 URL前缀#结构哈希"""
+        prefix = url_prefix(url)
+        if prefix in self._mixed:
+            return f'{prefix}#{structure_hash(markup)}'
+        return prefix
+
+    def find(self, url, markup, candidates, probe):
+        """按页面模板记住的顺序依次调用 probe(候选项)，返回第一个非空结果
+
+        Returns:
+            (成功的候选项, probe的返回值)；全部失败时为 (None, None)
+        """
+        key = self.fingerprint(url, markup)
+        with self._lock:
+            template = self._templates.get(key) if self.enabled else None
+            learned = template['choice'] if template else None
+        order = list(candidates)
+        if learned in order:
+            order.remove(learned)
+            order.insert(0, learned)
+
+        for candidate in order:
+            result = probe(candidate)
+            if result:
+                self._record(key, markup, candidate, learned)
+                return candidate, result
+        self._record(key, markup, None, learned)
+        return None, None
+
+    def _record(self, key, markup, choice, learned):
+        """记录一次查找的结果；URL前缀级的模板未命中时，该前缀改为按结构哈希区分模板"""
+        if choice is None:
+            result = 'none'
+        elif learned is None:
+            result = 'new'
+        else:
+            result = 'hit' if choice == learned else 'miss'
+        with self._lock:
+            template = self._templates.pop(key, None)
+            if template is not None and result == 'hit':
+                template['hits'] += 1
+            elif template is not None and result == 'miss':
+                template['misses'] += 1
+            if result == 'miss' and '#' not in key:
+                # 同一前缀下有多个模板：之后按“前缀#结构哈希”记忆，本页记为该前缀下的新模板
+                self._mixed.add(key)
+                key = f'{key}#{structure_hash(markup)}'
+                template = self._templates.pop(key, None)
+            if template is None:
+                template = {'choice': None, 'pages': 0, 'hits': 0, 'misses': 0}
+            template['pages'] += 1
+            if choice is not None:
+                template['choice'] = choice
+            # 重新插入到末尾，超出上限时淘汰最久未使用的模板
+            self._templates[key] = template
+            if len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+            self._totals[result] += 1
+        count_layout(self.stage, result)
+        return result
+
+    def stats(self):
+        """命中统计：总体命中率和各模板的成功项、页数"""
+        with self._lock:
+            totals = dict(self._totals)
+            templates = {key: dict(t) for key, t in self._templates.items()}
+            mixed = sorted(self._mixed)
+        known = totals['hit'] + totals['miss']
+        return dict(totals, templates=templates, mixed_prefixes=mixed, lookups=sum(totals.values()),
+                    hit_rate=round(totals['hit'] / known, 4) if known else None)
+
+    def log_summary(self, logger, top=10):
+        """输出命中率和页数最多的几个模板"""
+        stats = self.stats()
+        if not stats['lookups']:
+            return
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else '-'
+        logger.info(f"页面模板缓存（{self.stage}）：{len(stats['templates'])} 个模板，查找 {stats['lookups']} 次，"
+                    f"命中 {stats['hit']}，未命中 {stats['miss']}，新模板 {stats['new']}，"
+                    f"无匹配 {stats['none']}，命中率 {hit_rate}")
+        ranked = sorted(stats['templates'].items(), key=lambda item: item[1]['pages'], reverse=True)
+        for key, template in ranked[:top]:
+            known = template['hits'] + template['misses']
+            rate = f"{template['hits'] / known:.1%}" if known else '-'
+            logger.info(f"  {key}: {template['pages']} 页，成功项 {template['choice']}，命中率 {rate}")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非阻塞日志配置
+
+各脚本在入口处调用一次 setup_logging()：根日志只挂一个 QueueHandler，日志记录放入内存队列后立即返回，
+由后台的 QueueListener 线程统一写入文件和控制台，工作线程不再争用文件锁、不直接做磁盘I/O。
+
+循环中逐条处理的日志应使用 DEBUG 级别，并用 ProgressLogger 周期性输出进度汇总。
+
+用法：
+    from crawler_common.log_setup import setup_logging, ProgressLogger
+
+    setup_logging('logs/data_extractor.log')
+    progress = ProgressLogger('提取政策', total=len(items))
+    for item in items:
+        ...
+        progress.update(success=1)
+    progress.finish()
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+_child_configured = False
+_setup_lock = threading.Lock()
+
+
+def setup_logging(log_file=None, level=logging.INFO, fmt=DEFAULT_FORMAT, datefmt=None, console=True):
+    """配置根日志（进程内只生效一次），返回 QueueListener；进程池子进程中调用时不生效，返回None
+
+    Args:
+        log_file: 日志文件路径，None表示不写文件；所在目录不存在时自动创建
+        level: 日志级别，可以是 logging.INFO 或 'INFO'
+        fmt: 日志格式
+        datefmt: 时间格式，None表示使用logging默认格式
+        console: 是否同时输出到控制台
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None or _child_configured:
+            return _listener
+
+        if isinstance(level, str):
+            level = getattr(logging, level.upper())
+        formatter = logging.Formatter(fmt, datefmt)
+        handlers = []
+        if log_file:
+            log_dir = os.path.dirname(log_file)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        if console:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(formatter)
+            handlers.append(stream_handler)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(level)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def setup_child_logging(level=logging.WARNING, fmt='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'):
+    """进程池子进程的日志配置：替换从父进程继承的处理器，直接输出到标准错误
+
+    之后子进程中的 setup_logging() 调用不再生效，避免每个子进程各自创建日志文件。
+    """
+    global _child_configured, _listener
+    with _setup_lock:
+        _child_configured = True
+        # fork 出的子进程继承了父进程的 listener 对象，但后台线程并未运行
+        _listener = None
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(fmt))
+        root.addHandler(handler)
+        root.setLevel(level)
+
+
+def shutdown_logging():
+    """停止后台写日志线程，确保队列中剩余的日志全部写出"""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+class ProgressLogger:
+    """周期性输出处理进度，替代逐条 INFO 日志
+
+    update() 只做计数，距上次输出超过 interval 秒时才写一条进度日志；可在多线程中共用。
+    """
+
+    def __init__(self, name, total=None, interval=10.0, logger=None):
+        self.name = name
+        self.total = total
+        self.interval = interval
+        self.logger = logger or logging.getLogger()
+        self.done = 0
+        self.counts = {}
+        self.start_time = time.monotonic()
+        self._last_report = self.start_time
+        self._lock = threading.Lock()
+
+    def update(self, n=1, **counts):
+        """完成 n 项；关键字参数按结果分类计数，如 update(success=1)"""
+        with self._lock:
+            self.done += n
+            for key, value in counts.items():
+                self.counts[key] = self.counts.get(key, 0) + value
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+            message = self._format(now)
+        self.logger.info(message)
+
+    def finish(self):
+        """输出最终汇总"""
+        with self._lock:
+            message = self._format(time.monotonic(), finished=True)
+        self.logger.info(message)
+
+    def _format(self, now, finished=False):
+        elapsed = now - self.start_time
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            progress = f"{self.done}/{self.total} ({self.done / self.total:.1%})"
+        else:
+            progress = str(self.done)
+        parts = [f"{'完成' if finished else '进度'} {self.name}: {progress}",
+                 f"{rate:.1f} 项/秒", f"已用 {elapsed:.0f} 秒"]
+        if not finished and self.total and rate > 0:
+            parts.append(f"预计剩余 {(self.total - self.done) / rate:.0f} 秒")
+        if self.counts:
+            parts.append(', '.join(f"{key}={value}" for key, value in sorted(self.counts.items())))
+        return '，'.join(parts)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量指标注册表
+
+提供计数器（Counter）、仪表（Gauge）和直方图（Histogram）三种指标，支持按标签（站点、阶段、状态码等）
+分别统计；可通过本地 /metrics 接口以 Prometheus 文本格式导出，并在每次运行结束时写出JSON汇总。
+
+常用入口：
+- observe_request(stage, url, status, seconds, size)  记录一次HTTP请求
+- parse_timer(stage)                                  统计一段解析代码的耗时
+- set_queue_depth(stage, depth)                       记录待处理队列长度
+- count_layout(stage, result)                         记录一次页面模板缓存查找
+- start_metrics_server(port)                          启动 /metrics 接口
+- write_run_summary(directory, run_name)              写出本次运行的JSON汇总
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEFAULT_PARSE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _label_key(labelnames, labels):
+    """把标签字典转换为按标签名排序的元组，缺失的标签记为空字符串"""
+    unknown = set(labels) - set(labelnames)
+    if unknown:
+        raise ValueError(f"未声明的标签: {sorted(unknown)}")
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = [(name, value) for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.extend(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+    def summary(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [{'labels': dict(zip(self.labelnames, key)), 'value': value} for key, value in items]
+
+
+class Gauge(Counter):
+    """可任意设置的瞬时值"""
+
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """按桶统计分布的直方图（用于请求延迟、解析耗时等）"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _quantile(self, counts, total, q):
+        """根据桶计数估算分位数（取所在桶的上界）"""
+        if not total:
+            return 0.0
+        target = q * total
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return self.buckets[-1]
+
+    def render(self):
+        lines = []
+        with self._lock:
+            items = sorted((key, dict(series, counts=list(series['counts']))) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['counts']):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{labels} {series["count"]}')
+        return lines
+
+    def summary(self):
+        with self._lock:
+            items = sorted((key, dict(series, counts=list(series['counts']))) for key, series in self._series.items())
+        result = []
+        for key, series in items:
+            count = series['count']
+            p95 = self._quantile(series['counts'], count, 0.95)
+            result.append({
+                'labels': dict(zip(self.labelnames, key)),
+                'count': count,
+                'sum': round(series['sum'], 6),
+                'avg': round(series['sum'] / count, 6) if count else 0.0,
+                'p50_le': _format_value(self._quantile(series['counts'], count, 0.5)),
+                'p95_le': _format_value(p95)
+            })
+        return result
+
+
+class MetricsRegistry:
+    """指标注册表，同名指标只创建一次"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif type(metric) is not cls:
+                raise ValueError(f"指标 {name} 已以其他类型注册")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render_prometheus(self):
+        """按 Prometheus 文本格式（0.0.4）导出所有指标"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """返回所有指标的JSON友好汇总"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'metrics': {
+                metric.name: {
+                    'type': metric.type_name,
+                    'help': metric.documentation,
+                    'samples': metric.summary()
+                }
+                for metric in metrics
+            }
+        }
+
+
+# 全局默认注册表
+REGISTRY = MetricsRegistry()
+
+REQUESTS_TOTAL = REGISTRY.counter(
+    'crawler_requests_total', 'HTTP请求次数（按站点、阶段、状态码）', ('host', 'stage', 'status'))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'crawler_request_seconds', 'HTTP请求耗时（秒）', ('host', 'stage'))
+RESPONSE_BYTES = REGISTRY.counter(
+    'crawler_response_bytes_total', '响应体字节数', ('host', 'stage'))
+PARSE_SECONDS = REGISTRY.histogram(
+    'crawler_parse_seconds', '页面解析耗时（秒）', ('stage',), buckets=DEFAULT_PARSE_BUCKETS)
+QUEUE_DEPTH = REGISTRY.gauge(
+    'crawler_queue_depth', '待处理任务数', ('stage',))
+ITEMS_TOTAL = REGISTRY.counter(
+    'crawler_items_total', '处理条目数（按阶段、结果）', ('stage', 'result'))
+LAYOUT_LOOKUPS = REGISTRY.counter(
+    'crawler_layout_lookups_total', '页面模板缓存查找次数（hit/miss/new/none）', ('stage', 'result'))
+
+
+def observe_request(stage, url, status, seconds, size=0):
+    """记录一次HTTP请求；请求异常时status传入 'error'"""
+    host = urlparse(url).netloc or 'unknown'
+    REQUESTS_TOTAL.inc(host=host, stage=stage, status=status)
+    REQUEST_SECONDS.observe(seconds, host=host, stage=stage)
+    if size:
+        RESPONSE_BYTES.inc(size, host=host, stage=stage)
+
+
+def parse_timer(stage):
+    """统计解析耗时的上下文管理器"""
+    return PARSE_SECONDS.time(stage=stage)
+
+
+def set_queue_depth(stage, depth):
+    QUEUE_DEPTH.set(depth, stage=stage)
+
+
+def count_item(stage, result, amount=1):
+    ITEMS_TOTAL.inc(amount, stage=stage, result=result)
+
+
+def count_layout(stage, result):
+    """记录一次页面模板缓存查找（见 layout_cache.LayoutCache）"""
+    LAYOUT_LOOKUPS.inc(stage=stage, result=result)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            body = self.server.registry.render_prometheus().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/metrics.json':
+            body = json.dumps(self.server.registry.summary(), ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port, host='127.0.0.1', registry=None):
+    """在后台线程中启动本地 /metrics 接口，返回服务器对象"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or REGISTRY
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    return server
+
+
+def write_run_summary(directory, run_name, registry=None):
+    """将本次运行的指标汇总写入 directory/{run_name}_{时间戳}.json，返回文件路径"""
+    registry = registry or REGISTRY
+    os.makedirs(directory, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(directory, f'{run_name}_{timestamp}.json')
+    summary = registry.summary()
+    summary['run_name'] = run_name
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return path
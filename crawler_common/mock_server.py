@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟站点服务器
+
+在本机模拟三个目标站点（广州市人社局JSON接口、人社部WAS5检索及详情页、发改委列表及详情页，以及详情页中的附件），
+并按配置注入常见故障：5xx错误、带Retry-After的429、连接重置、慢速逐块发送的响应体、
+以及以200状态码返回的错误页面。用于在不访问真实网站的情况下测试和评估重试逻辑。
+
+用法：
+    python -m crawler_common.mock_server --port 8765 --error-5xx-rate 0.1 --rate-limit-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 故障注入配置（各项概率按顺序独立判定，命中一项即不再判定后续项）
+FAULT_PROFILE = {
+    'reset_rate': 0.0,          # 直接重置TCP连接的概率
+    'error_5xx_rate': 0.0,      # 返回500/502/503的概率
+    'rate_limit_rate': 0.0,     # 返回429的概率
+    'retry_after': 1,           # 429响应中Retry-After头的秒数
+    'soft_error_rate': 0.0,     # 以200状态码返回错误页面的概率
+    'slow_rate': 0.0,           # 正常响应体改为慢速逐块发送的概率
+    'slow_chunk_size': 512,     # 慢速发送时每块字节数
+    'slow_chunk_delay': 0.2,    # 慢速发送时每块之间的间隔（秒）
+    'seed': None                # 随机种子，固定后故障序列可复现
+}
+
+# 模拟数据规模
+GZ_TYPES = ('505', '506', '507')
+GZ_TOTAL = 95
+GZ_PAGE_SIZE = 20
+
+MOHRSS_TOTAL = 287
+MOHRSS_PAGE_SIZE = 15
+
+NDRC_CATEGORIES = ('fzggwl', 'ghxwj', 'ghwb', 'gg', 'tz')
+NDRC_PAGES = 3
+NDRC_PAGE_SIZE = 20
+
+# 附件扩展名及对应的Content-Type
+ATTACHMENT_TYPES = {
+    'pdf': 'application/pdf',
+    'doc': 'application/msword',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'xls': 'application/vnd.ms-excel',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'ofd': 'application/ofd',
+    'zip': 'application/zip'
+}
+
+SOFT_ERROR_PAGE = (
+    '<!DOCTYPE html><html><head><meta charset="utf-8"><title>系统繁忙</title></head>'
+    '<body><div class="error">系统繁忙，请稍后再试</div></body></html>'
+)
+
+
+def _html_page(title, body):
+    """生成完整的HTML文档"""
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{title}</title></head><body>'
+        '<div class="nav"><ul><li><a href="/">首页</a><span>|</span></li>'
+        '<li><a href="/xxgk/">信息公开</a><span>|</span></li></ul></div>'
+        f'{body}'
+        '<div class="footer"><ul><li><a href="/about.html">关于我们</a><span>©</span></li></ul></div>'
+        '</body></html>'
+    )
+
+
+def _page_count(total, page_size):
+    return (total + page_size - 1) // page_size
+
+
+def gz_api_response(base_url, type_id, page):
+    """广州市人社局 gkmlpt 列表接口"""
+    start = (page - 1) * GZ_PAGE_SIZE
+    articles = []
+    for article_id in range(start + 1, min(start + GZ_PAGE_SIZE, GZ_TOTAL) + 1):
+        articles.append({
+            'id': int(type_id) * 100000 + article_id,
+            'title': f'广州市人社局{type_id}类文件第{article_id}号',
+            'document_number': f'穗人社规字〔2024〕{article_id}号',
+            'publisher': '广州市人力资源和社会保障局',
+            'classify_main_name': '劳动就业',
+            'url': f'{base_url}/gz/content/{type_id}/{article_id}.html',
+            'created_at': f'2024-{(article_id % 12) + 1:02d}-{(article_id % 28) + 1:02d} 10:00:00'
+        })
+    return {'articles': articles, 'total': GZ_TOTAL, 'page': page}
+
+
+def gz_detail_page(type_id, article_id):
+    """广州市人社局详情页"""
+    paragraphs = ''.join(
+        f'<p style="text-align: justify;">第{i}段：关于{type_id}类文件第{article_id}号的具体规定。</p>'
+        for i in range(1, 8)
+    )
+    body = (
+        '<div class="content" style="margin-top: 30px">'
+        f'<h1 class="title">广州市人社局{type_id}类文件第{article_id}号</h1>'
+        '<div class="date-row">发布日期：2024-05-01 来源：广州市人力资源和社会保障局</div>'
+        f'<div class="article-content">{paragraphs}</div>'
+        f'<a class="nfw-cms-attachment" href="/gz/files/{type_id}_{article_id}.pdf">附件{article_id}.pdf</a>'
+        '</div>'
+    )
+    return _html_page('详情', body)
+
+
+def mohrss_search_page(page, page_size=MOHRSS_PAGE_SIZE):
+    """人社部 WAS5 检索结果页（page_size 对应 perpage 参数）"""
+    page_count = _page_count(MOHRSS_TOTAL, page_size)
+    start = (page - 1) * page_size
+    cells = []
+    for policy_id in range(start + 1, min(start + page_size, MOHRSS_TOTAL) + 1):
+        url = (
+            'http://www.mohrss.gov.cn/xxgk2020/fdzdgknr/zcfg/gfxwj/rcrs/202508/'
+            f't20250808_{550000 + policy_id}.html?keywords='
+        )
+        cells.append(
+            f'<tr><td><span>2025-08-{(policy_id % 28) + 1:02d}</span></td>'
+            f'<td><a href="{url}">人社部规范性文件第{policy_id}号</a></td>'
+            f'<td>人社部发〔2025〕{policy_id}号</td></tr>'
+        )
+    body = (
+        '<table style="border-collapse:separate;">' + ''.join(cells) + '</table>'
+        f'<div class="page">共<b>{MOHRSS_TOTAL}</b>条记录 页次:<b>{page}</b>/<b>{page_count}</b></div>'
+    )
+    return _html_page('检索结果', body)
+
+
+def mohrss_detail_page(policy_id):
+    """人社部政策详情页"""
+    body = (
+        '<div class="cj_xiang"><ul class="clearfix">'
+        f'<li><div class="arti_l">标&nbsp;&nbsp;题</div><div class="arti_r">人社部规范性文件第{policy_id}号</div></li>'
+        f'<li><div class="arti_l">发文字号</div><div class="arti_r">人社部发〔2025〕{policy_id}号</div></li>'
+        '<li><div class="arti_l">是否有效</div><div class="arti_r">'
+        "<script>var isUsed = '有效'; document.write(isUsed);</script></div></li>"
+        '</ul></div>'
+        '<div class="art_p"><p><span><font>第一条 为规范人力资源市场秩序，制定本办法。</font></span></p>'
+        '<p><span>第二条 本办法适用于全国范围内的人力资源服务机构。</span></p></div>'
+        f'<div class="cj_xiang_con"><a href="./P0{policy_id}.pdf">附件{policy_id}</a></div>'
+    )
+    return _html_page('政策详情', body)
+
+
+def ndrc_list_page(category, page):
+    """发改委政策列表页（page从1开始）"""
+    start = (page - 1) * NDRC_PAGE_SIZE
+    items = []
+    for policy_id in range(start + 1, start + NDRC_PAGE_SIZE + 1):
+        month = (policy_id % 12) + 1
+        href = f'./2023{month:02d}/t2023{month:02d}01_{1300000 + policy_id}.html'
+        jiedu = ''
+        if policy_id % 5 == 0:
+            jiedu = (
+                '<strong><img src="/images/jiedu.png"></strong>'
+                f'<div class="popbox"><a href="../../jd/jd/2023{month:02d}/t2023{month:02d}01_{1400000 + policy_id}.html" '
+                f'title="解读{policy_id}">解读{policy_id}</a></div>'
+            )
+        items.append(
+            f'<li><a href="{href}" title="发改委{category}第{policy_id}号令">发改委{category}第{policy_id}号令</a>'
+            f'{jiedu}<span>2023/{month:02d}/01</span></li>'
+        )
+    pagination = ''
+    if page < NDRC_PAGES:
+        pagination = f'<div class="page"><a href="index_{page}.html">下一页</a></div>'
+    body = '<ul class="u-list">' + ''.join(items) + '</ul>' + pagination
+    return _html_page('政策发布', body)
+
+
+def ndrc_detail_page(category, doc_id):
+    """发改委政策详情页"""
+    body = (
+        '<div class="article_con"><div class="TRS_Editor">'
+        f'<p>发改委{category}政策正文，编号{doc_id}。</p><p>第一条 总则。</p><p>第二条 附则。</p>'
+        '</div></div>'
+        '<div class="attachment">'
+        f'<a href="./P0{doc_id}.pdf">附件1.pdf</a><a href="./P0{doc_id}.docx">附件2.docx</a>'
+        '</div>'
+    )
+    return _html_page('政策详情', body)
+
+
+def attachment_file(filename):
+    """附件文件内容（只用于测试下载流程，内容为占位文本）"""
+    return f'mock attachment {filename}\n' * 64
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    """模拟站点请求处理器"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MockSite/1.0'
+
+    def log_message(self, format, *args):
+        # 关闭默认的访问日志输出
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionError, OSError, ValueError):
+            pass
+
+    def finish(self):
+        try:
+            super().finish()
+        except (ConnectionError, OSError, ValueError):
+            pass
+
+    def do_GET(self):
+        server = self.server
+        fault = server.pick_fault()
+
+        if fault == 'reset':
+            server.record('reset')
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.close_connection = True
+            self.connection.close()
+            return
+        if fault == 'error_5xx':
+            server.record('error_5xx')
+            self._send(server.pick_error_status(), '<html><body>Server Error</body></html>')
+            return
+        if fault == 'rate_limited':
+            server.record('rate_limited')
+            self._send(429, '<html><body>Too Many Requests</body></html>',
+                       extra_headers={'Retry-After': str(server.fault_profile['retry_after'])})
+            return
+        if fault == 'soft_error':
+            server.record('soft_error')
+            self._send(200, SOFT_ERROR_PAGE)
+            return
+
+        status, body, content_type = self.route()
+        if status != 200:
+            server.record('not_found')
+            self._send(status, body, content_type)
+            return
+        server.record('slow' if fault == 'slow' else 'ok')
+        self._send(status, body, content_type, slow=(fault == 'slow'))
+
+    def route(self):
+        """根据路径生成模拟页面，返回 (状态码, 响应体, Content-Type)"""
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        parts = [p for p in parsed.path.split('/') if p]
+        base_url = self.server.base_url
+        html_type = 'text/html; charset=utf-8'
+
+        try:
+            # 广州市人社局 /gkmlpt/api/all/{type}?page=N
+            if parts[:3] == ['gkmlpt', 'api', 'all'] and len(parts) == 4:
+                type_id = parts[3]
+                if type_id not in GZ_TYPES:
+                    return 404, '<html><body>Not Found</body></html>', html_type
+                page = int(query.get('page', ['1'])[0])
+                data = gz_api_response(base_url, type_id, page)
+                return 200, json.dumps(data, ensure_ascii=False), 'application/json; charset=utf-8'
+
+            # 广州市人社局详情页 /gz/content/{type}/{id}.html
+            if parts[:2] == ['gz', 'content'] and len(parts) == 4:
+                return 200, gz_detail_page(parts[2], int(parts[3].split('.')[0])), html_type
+
+            # 人社部检索页 /was5/web/search?page=N[&perpage=M]
+            if parsed.path == '/was5/web/search':
+                page = int(query.get('page', ['1'])[0])
+                page_size = int(query.get('perpage', [str(MOHRSS_PAGE_SIZE)])[0])
+                return 200, mohrss_search_page(page, page_size), html_type
+
+            # 人社部详情页 /xxgk2020/.../t20250808_{id}.html
+            if parts and parts[0] == 'xxgk2020' and parts[-1].endswith('.html'):
+                policy_id = int(parts[-1].split('_')[-1].split('.')[0]) - 550000
+                return 200, mohrss_detail_page(policy_id), html_type
+
+            # 发改委列表页和详情页 /xxgk/zcfb/{cat}/...
+            if parts[:2] == ['xxgk', 'zcfb'] and len(parts) >= 4 and parts[2] in NDRC_CATEGORIES:
+                category = parts[2]
+                filename = parts[-1]
+                if len(parts) == 4 and filename.startswith('index'):
+                    page = 1 if filename == 'index.html' else int(filename[6:-5]) + 1
+                    if page > NDRC_PAGES:
+                        return 404, '<html><body>Not Found</body></html>', html_type
+                    return 200, ndrc_list_page(category, page), html_type
+                if len(parts) == 5 and filename.endswith('.html'):
+                    return 200, ndrc_detail_page(category, filename.split('_')[-1][:-5]), html_type
+
+            # 不带文件后缀的下载链接 /files/download?name=P01.pdf（只能按 Content-Type 识别为文件）
+            if parsed.path == '/files/download' and 'name' in query:
+                name = query['name'][0]
+                extension = name.rsplit('.', 1)[-1].lower()
+                if extension in ATTACHMENT_TYPES:
+                    return 200, attachment_file(name), ATTACHMENT_TYPES[extension]
+
+            # 各站点详情页中的附件 *.pdf / *.docx 等
+            if parts and parts[-1].rsplit('.', 1)[-1].lower() in ATTACHMENT_TYPES:
+                return 200, attachment_file(parts[-1]), ATTACHMENT_TYPES[parts[-1].rsplit('.', 1)[-1].lower()]
+        except (ValueError, IndexError):
+            pass
+
+        return 404, '<html><body>Not Found</body></html>', html_type
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', extra_headers=None, slow=False):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if slow:
+            chunk_size = self.server.fault_profile['slow_chunk_size']
+            chunk_delay = self.server.fault_profile['slow_chunk_delay']
+            for offset in range(0, len(data), chunk_size):
+                self.wfile.write(data[offset:offset + chunk_size])
+                self.wfile.flush()
+                time.sleep(chunk_delay)
+        else:
+            self.wfile.write(data)
+        self.server.record_bytes(len(data))
+
+
+class MockSiteServer(ThreadingHTTPServer):
+    """带故障注入和请求统计的模拟站点服务器"""
+
+    daemon_threads = True
+
+    def __init__(self, server_address, fault_profile=None):
+        super().__init__(server_address, MockSiteHandler)
+        self.fault_profile = dict(FAULT_PROFILE, **(fault_profile or {}))
+        self.rng = random.Random(self.fault_profile['seed'])
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def pick_fault(self):
+        """按配置概率选择本次请求要注入的故障，不注入时返回None"""
+        profile = self.fault_profile
+        with self.lock:
+            for name, key in (('reset', 'reset_rate'), ('error_5xx', 'error_5xx_rate'),
+                              ('rate_limited', 'rate_limit_rate'), ('soft_error', 'soft_error_rate'),
+                              ('slow', 'slow_rate')):
+                if profile[key] and self.rng.random() < profile[key]:
+                    return name
+        return None
+
+    def pick_error_status(self):
+        with self.lock:
+            return self.rng.choice((500, 502, 503))
+
+    def record(self, outcome):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def record_bytes(self, size):
+        with self.lock:
+            self.stats['bytes_sent'] += size
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {
+                'requests': 0,
+                'ok': 0,
+                'slow': 0,
+                'error_5xx': 0,
+                'rate_limited': 0,
+                'reset': 0,
+                'soft_error': 0,
+                'not_found': 0,
+                'bytes_sent': 0
+            }
+
+    def snapshot_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+
+def start_mock_server(fault_profile=None, host='127.0.0.1', port=0):
+    """在后台线程中启动模拟服务器，port为0时自动选择空闲端口"""
+    server = MockSiteServer((host, port), fault_profile)
+    thread = threading.Thread(target=server.serve_forever, name='mock-site-server', daemon=True)
+    thread.start()
+    return server
+
+
+def add_fault_arguments(parser):
+    """向命令行解析器添加故障注入参数"""
+    parser.add_argument('--reset-rate', type=float, default=0.0, help='连接重置概率')
+    parser.add_argument('--error-5xx-rate', type=float, default=0.0, help='5xx错误概率')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='429限流概率')
+    parser.add_argument('--retry-after', type=int, default=1, help='429响应的Retry-After秒数')
+    parser.add_argument('--soft-error-rate', type=float, default=0.0, help='200状态码错误页概率')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='慢速响应体概率')
+    parser.add_argument('--slow-chunk-size', type=int, default=512, help='慢速响应每块字节数')
+    parser.add_argument('--slow-chunk-delay', type=float, default=0.2, help='慢速响应每块间隔（秒）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+
+
+def fault_profile_from_args(args):
+    """从命令行参数构造故障注入配置"""
+    return {
+        'reset_rate': args.reset_rate,
+        'error_5xx_rate': args.error_5xx_rate,
+        'rate_limit_rate': args.rate_limit_rate,
+        'retry_after': args.retry_after,
+        'soft_error_rate': args.soft_error_rate,
+        'slow_rate': args.slow_rate,
+        'slow_chunk_size': args.slow_chunk_size,
+        'slow_chunk_delay': args.slow_chunk_delay,
+        'seed': args.seed
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地模拟站点服务器（支持故障注入）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockSiteServer((args.host, args.port), fault_profile_from_args(args))
+    print(f"模拟站点已启动: {server.base_url}")
+    print(f"故障注入配置: {server.fault_profile}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n用户中断，模拟站点已停止")
+        print(f"请求统计: {server.snapshot_stats()}")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
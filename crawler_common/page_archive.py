@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原始页面快照的压缩归档
+
+列表页、检索页原来每抓取一次保存为一个 page_{页码}_{时间戳}.html，长期运行后目录中有数万个小文件，
+离线解析时每次都要 os.listdir 再逐个按正则匹配文件名。PageArchive 把快照追加写入一个压缩的 pack 文件，
+另用一个索引文件记录每个快照的位置：
+
+    <归档目录>/pages.pack   追加写入，每条记录 = 记录头 + JSON元数据 + 压缩后的页面字节
+    <归档目录>/pages.idx    每行一条JSON索引：
+        {"key", "name", "url", "fetched_at", "sha1", "size", "codec", "offset", "length", ...}
+
+- key：快照对应的页面，由文件名去掉时间戳得到（如 通知/page_3），同一 key 的新快照覆盖旧快照；
+  内容（SHA-1）与该页面最新快照相同时不写入，重复抓取没有变化的页面不会增加快照，latest() 返回每个页面的最新快照
+- name：导出时的相对文件名，与原来单独保存的文件名相同
+- 已安装 zstandard 时用 zstd 压缩，否则用 zlib；每条记录单独记录压缩方式，两种记录可以混在同一归档中
+- 记录头中带有完整元数据，索引损坏或缺少末尾几条时可从 pack 文件重建；
+  pack 文件末尾因中断写入而不完整的记录在下次打开时截掉
+- 同一进程中的多个线程可以共用一个实例（for_dir），不支持多个进程同时写入同一归档
+- pack 文件和索引的读写、恢复在 RecordPack 中实现，详情页版本库（version_store.VersionStore）、
+  广州市人社局文章存储（gz_rsj_crawler/article_store.py）和人社部政策存储（mohrss_crawler/policy_store.py）
+  使用同样的存储格式
+
+用法：
+    from crawler_common.page_archive import PageArchive
+
+    archive = PageArchive.for_dir('results/archive')
+    entry, added = archive.add('通知/page_3_20250808_120000.html', response.content, url=url, category='通知', page=3)
+    for entry, content in archive.iter_pages(archive.latest().values()):
+        ...
+    content = archive.read(entry)                 # 按索引随机读取
+
+命令行（在仓库根目录运行）：
+    python -m crawler_common.page_archive ndrc_crawler/results/archive stats
+    python -m crawler_common.page_archive ndrc_crawler/results/archive compact    # 只保留每个页面的最新快照
+    python -m crawler_common.page_archive ndrc_crawler/results/archive export exported/  # 导出为普通HTML文件
+    # 导入原来单独保存的HTML文件
+    python -m crawler_common.page_archive ndrc_crawler/results/archive import ndrc_crawler/results --remove
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import zlib
+from datetime import datetime
+
+from crawler_common.log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+PACK_FILENAME = 'pages.pack'
+INDEX_FILENAME = 'pages.idx'
+# 各站点在结果目录下的归档子目录
+ARCHIVE_DIRNAME = 'archive'
+
+# 记录头：魔数、压缩方式、元数据长度、数据长度（大端）
+_RECORD_MAGIC = b'PGA1'
+_RECORD_HEADER = struct.Struct('>4sBII')
+_CODEC_IDS = {'zlib': 1, 'zstd': 2}
+_CODEC_NAMES = {value: key for key, value in _CODEC_IDS.items()}
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# 文件名中的时间戳（_20250808_120000）和页码
+_TIMESTAMP = re.compile(r'_(\d{8}_\d{6})(?=\.html?$|$)')
+_PAGE_NUMBER = re.compile(r'page_(\d+)')
+
+_zstd_module = None
+
+
+def _zstd():
+    """zstandard 模块，未安装时返回None（只在第一次用到时导入）"""
+    global _zstd_module
+    if _zstd_module is None:
+        try:
+            import zstandard
+            _zstd_module = zstandard
+        except ImportError:
+            _zstd_module = False
+    return _zstd_module or None
+
+
+def default_codec():
+    """默认压缩方式：已安装 zstandard 时为 zstd，否则为 zlib"""
+    return 'zstd' if _zstd() else 'zlib'
+
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        module = _zstd()
+        if module is None:
+            raise RuntimeError('归档中有 zstd 压缩的记录，需要安装 zstandard')
+        return module.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def snapshot_key(name):
+    """快照对应的页面：文件名去掉时间戳和扩展名，如 通知/page_3_20250808_120000.html -> 通知/page_3"""
+    name = name.replace(os.sep, '/')
+    return os.path.splitext(_TIMESTAMP.sub('', name))[0]
+
+
+def snapshot_time(name):
+    """文件名中的抓取时间（ISO格式），没有时间戳时返回None"""
+    match = _TIMESTAMP.search(name)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').isoformat(timespec='seconds')
+
+
+class RecordPack:
+    """pack 文件 + 索引文件的追加写入存储（PageArchive、VersionStore 的存储层），可在多个线程中共用
+
+    每条记录 = 记录头 + JSON元数据（至少包含 key 和 sha1）+ 压缩后的数据；索引每行一条JSON，
+    即记录的元数据加上 offset、length。子类通过 pack_filename、index_filename 指定文件名。
+    """
+
+    pack_filename = PACK_FILENAME
+    index_filename = INDEX_FILENAME
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, archive_dir, codec=None):
+        """
+        Args:
+            archive_dir: 存储目录（不存在时在第一次写入时创建）
+            codec: 新记录的压缩方式 'zstd' 或 'zlib'，None表示 default_codec()
+        """
+        self.archive_dir = archive_dir
+        self.pack_path = os.path.join(archive_dir, self.pack_filename)
+        self.index_path = os.path.join(archive_dir, self.index_filename)
+        self.codec = codec or default_codec()
+        if self.codec not in _CODEC_IDS:
+            raise ValueError(f"未知的压缩方式: {self.codec}（可选: {', '.join(_CODEC_IDS)}）")
+        if self.codec == 'zstd' and not _zstd():
+            raise ValueError('压缩方式 zstd 需要安装 zstandard')
+        self._lock = threading.Lock()
+        self._entries = None  # 索引，首次使用时加载
+        self._latest = None  # {key: 该 key 最后写入的记录的索引}
+
+    @classmethod
+    def for_dir(cls, archive_dir):
+        """同一目录在进程内共用一个实例，保证并发写入同一存储时串行"""
+        archive_dir = os.path.abspath(archive_dir)
+        with cls._instances_lock:
+            if archive_dir not in cls._instances:
+                cls._instances[archive_dir] = cls(archive_dir)
+            return cls._instances[archive_dir]
+
+    @classmethod
+    def exists(cls, archive_dir):
+        return os.path.exists(os.path.join(archive_dir, cls.pack_filename))
+
+    # ---------- 索引 ----------
+
+    def _load(self):
+        """加载索引并与 pack 文件核对：补上缺少的索引、截掉不完整的记录；调用方持有锁"""
+        if self._entries is not None:
+            return self._entries
+        entries = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"跳过无法解析的索引行: {self.index_path}")
+        pack_size = os.path.getsize(self.pack_path) if os.path.exists(self.pack_path) else 0
+
+        # 索引的最后一条记录须与 pack 文件中该位置的记录一致（compact 中断时两个文件可能不匹配）
+        if entries and not self._matches(entries[-1], pack_size):
+            logger.warning(f"索引与数据文件不一致，从数据文件重建索引: {self.archive_dir}")
+            entries = []
+            self._rewrite_index(entries)
+        end = entries[-1]['offset'] + entries[-1]['length'] if entries else 0
+        if end < pack_size:
+            recovered, valid_end = self._scan(end)
+            if recovered:
+                logger.warning(f"从数据文件补上 {len(recovered)} 条缺少的索引: {self.archive_dir}")
+                self._append_index(recovered)
+                entries.extend(recovered)
+            if valid_end < pack_size:
+                logger.warning(f"截掉数据文件末尾不完整的记录（{pack_size - valid_end} 字节）: {self.pack_path}")
+                with open(self.pack_path, 'r+b') as f:
+                    f.truncate(valid_end)
+        self._entries = entries
+        self._latest = {entry['key']: entry for entry in entries}
+        return entries
+
+    def _matches(self, entry, pack_size):
+        """pack 文件中 entry 所指位置是否是同一条记录"""
+        if entry['offset'] + entry['length'] > pack_size:
+            return False
+        with open(self.pack_path, 'rb') as f:
+            f.seek(entry['offset'])
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return False
+            magic, _, meta_length, data_length = _RECORD_HEADER.unpack(header)
+            if magic != _RECORD_MAGIC or _RECORD_HEADER.size + meta_length + data_length != entry['length']:
+                return False
+            try:
+                meta = json.loads(f.read(meta_length).decode('utf-8'))
+            except ValueError:
+                return False
+        return meta.get('sha1') == entry.get('sha1') and meta.get('key') == entry.get('key')
+
+    def _scan(self, start):
+        """从 start 开始逐条读取 pack 文件中的记录头，返回 (索引列表, 最后一条完整记录的结束位置)"""
+        entries = []
+        with open(self.pack_path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                magic, _, meta_length, data_length = _RECORD_HEADER.unpack(header)
+                if magic != _RECORD_MAGIC:
+                    break
+                meta_bytes = f.read(meta_length)
+                if len(meta_bytes) < meta_length:
+                    break
+                f.seek(data_length, os.SEEK_CUR)
+                length = _RECORD_HEADER.size + meta_length + data_length
+                if f.tell() > os.fstat(f.fileno()).st_size:
+                    break
+                try:
+                    meta = json.loads(meta_bytes.decode('utf-8'))
+                except ValueError:
+                    break
+                entries.append(dict(meta, offset=offset, length=length))
+                offset += length
+        return entries, offset
+
+    def _append_index(self, entries):
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+
+    def _rewrite_index(self, entries, path=None):
+        path = path or self.index_path
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        """全部记录的索引（按写入顺序）"""
+        if not os.path.exists(self.pack_path):
+            return []
+        with self._lock:
+            return list(self._load())
+
+    def latest(self):
+        """每个 key 最后写入的记录的索引，按该 key 首次写入的顺序排列"""
+        if not os.path.exists(self.pack_path):
+            return {}
+        with self._lock:
+            self._load()
+            return dict(self._latest)
+
+    # ---------- 写入 ----------
+
+    def _encode_record(self, record_meta, content):
+        """压缩数据并生成记录字节（不需要持有锁）"""
+        meta_bytes = json.dumps(record_meta, ensure_ascii=False).encode('utf-8')
+        data = compress(content, self.codec)
+        header = _RECORD_HEADER.pack(_RECORD_MAGIC, _CODEC_IDS[self.codec], len(meta_bytes), len(data))
+        return header + meta_bytes + data
+
+    def _append_record(self, record_meta, record):
+        """追加写入 _encode_record 生成的记录并更新索引，返回索引；调用方持有锁且已调用 _load"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(self.pack_path, 'ab') as f:
+            offset = f.tell()
+            f.write(record)
+        entry = dict(record_meta, offset=offset, length=len(record))
+        # 先写数据再写索引：中断时索引缺少的记录在下次打开时从数据文件补上
+        self._append_index([entry])
+        self._entries.append(entry)
+        self._latest[entry['key']] = entry
+        return entry
+
+    # ---------- 读取 ----------
+
+    def _decode_record(self, record, entry):
+        magic, codec_id, meta_length, data_length = _RECORD_HEADER.unpack_from(record)
+        if magic != _RECORD_MAGIC:
+            raise ValueError(f"记录损坏: {self.pack_path} @ {entry['offset']}")
+        start = _RECORD_HEADER.size + meta_length
+        return decompress(record[start:start + data_length], _CODEC_NAMES[codec_id])
+
+    def read(self, entry):
+        """按索引读取一条记录的数据"""
+        with open(self.pack_path, 'rb') as f:
+            f.seek(entry['offset'])
+            record = f.read(entry['length'])
+        return self._decode_record(record, entry)
+
+    def iter_pages(self, entries=None):
+        """依次返回 (索引, 数据)，entries 为None时返回全部记录；只打开一次数据文件"""
+        entries = self.entries() if entries is None else entries
+        if not entries:
+            return
+        with open(self.pack_path, 'rb') as f:
+            for entry in entries:
+                f.seek(entry['offset'])
+                yield entry, self._decode_record(f.read(entry['length']), entry)
+
+    # ---------- 维护 ----------
+
+    def _compact_latest(self):
+        """重写 pack 文件和索引，每个 key 只保留最后写入的记录（直接复制压缩后的记录，不重新压缩）
+
+        Returns:
+            (保留的记录数, 删除的记录数)
+        """
+        with self._lock:
+            if not os.path.exists(self.pack_path):
+                return 0, 0
+            entries = self._load()
+            # 按 key 首次写入的顺序写出，compact 前后 latest() 的顺序不变
+            kept = list(self._latest.values())
+
+            tmp_pack = self.pack_path + '.tmp'
+            new_entries = []
+            with open(self.pack_path, 'rb') as src, open(tmp_pack, 'wb') as dst:
+                for entry in kept:
+                    src.seek(entry['offset'])
+                    new_entries.append(dict(entry, offset=dst.tell()))
+                    dst.write(src.read(entry['length']))
+            tmp_index = self.index_path + '.new'
+            self._rewrite_index(new_entries, tmp_index)
+            # 先替换数据文件再替换索引；两步之间中断时，下次打开发现不一致会从数据文件重建索引
+            os.replace(tmp_pack, self.pack_path)
+            os.replace(tmp_index, self.index_path)
+            self._entries = new_entries
+            self._latest = {entry['key']: entry for entry in new_entries}
+        return len(new_entries), len(entries) - len(new_entries)
+
+
+class PageArchive(RecordPack):
+    """页面快照归档，可在多个线程中共用"""
+
+    _instances = {}
+
+    # ---------- 写入 ----------
+
+    def _unchanged(self, key, sha1):
+        """该页面的最新快照内容相同时返回其索引；调用方持有锁"""
+        self._load()
+        latest = self._latest.get(key)
+        return latest if latest is not None and latest['sha1'] == sha1 else None
+
+    def add(self, name, content, url=None, fetched_at=None, **meta):
+        """追加一个页面快照；与该页面最新快照的内容（SHA-1）相同时不写入
+
+        Returns:
+            (索引, 是否写入)：没有写入时为该页面已有的最新快照的索引
+
+        Args:
+            name: 相对文件名（如 通知/page_3_20250808_120000.html），导出时使用，去掉时间戳后作为页面的 key
+            content: 页面原始字节
+            url: 页面URL
+            fetched_at: 抓取时间（ISO格式），None表示文件名中的时间戳或当前时间
+            meta: 其他写入索引的字段（如 category、page）
+        """
+        key, sha1 = snapshot_key(name), hashlib.sha1(content).hexdigest()
+        with self._lock:
+            unchanged = self._unchanged(key, sha1)
+        if unchanged is not None:
+            return unchanged, False
+
+        fetched_at = fetched_at or snapshot_time(name) or datetime.now().isoformat(timespec='seconds')
+        record_meta = dict(meta, key=key, name=name.replace(os.sep, '/'), url=url, fetched_at=fetched_at,
+                           sha1=sha1, size=len(content), codec=self.codec)
+        record = self._encode_record(record_meta, content)
+        with self._lock:
+            # 压缩期间其他线程可能已写入相同内容
+            unchanged = self._unchanged(key, sha1)
+            if unchanged is not None:
+                return unchanged, False
+            return self._append_record(record_meta, record), True
+
+    # ---------- 维护 ----------
+
+    def compact(self):
+        """重写归档，每个页面只保留最新快照（直接复制压缩后的记录，不重新压缩）
+
+        Returns:
+            (保留的快照数, 删除的快照数)
+        """
+        return self._compact_latest()
+
+    def export(self, out_dir, latest_only=False):
+        """把快照导出为普通HTML文件（out_dir/name，内容与抓取时逐字节相同），返回导出的文件数"""
+        entries = list(self.latest().values()) if latest_only else self.entries()
+        count = 0
+        for entry, content in self.iter_pages(entries):
+            path = os.path.join(out_dir, *entry['name'].split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+            timestamp = datetime.fromisoformat(entry['fetched_at']).timestamp()
+            os.utime(path, (timestamp, timestamp))
+            count += 1
+        return count
+
+    def import_files(self, root, patterns=('*page_*.html', '*/*page_*.html'), remove=False):
+        """导入单独保存的HTML文件（按抓取时间顺序），内容与该页面上一个快照相同的文件不重复写入
+
+        Returns:
+            (写入的快照数, 内容未变化而跳过的文件数)
+
+        Args:
+            root: 文件所在目录，文件相对 root 的路径作为快照的 name
+            patterns: 相对 root 的通配符
+            remove: 导入后删除原文件
+        """
+        archive_dir = os.path.abspath(self.archive_dir)
+        paths = set()
+        for pattern in patterns:
+            paths.update(p for p in glob.glob(os.path.join(root, pattern))
+                         if not os.path.abspath(p).startswith(archive_dir + os.sep))
+
+        def fetched_at(path):
+            return snapshot_time(os.path.basename(path)) or \
+                datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+
+        added = unchanged = 0
+        for path in sorted(paths, key=lambda p: (fetched_at(p), p)):
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            meta = {}
+            category = os.path.dirname(name)
+            if category:
+                meta['category'] = category
+            page_match = _PAGE_NUMBER.search(os.path.basename(name))
+            if page_match:
+                meta['page'] = int(page_match.group(1))
+            with open(path, 'rb') as f:
+                _, is_new = self.add(name, f.read(), fetched_at=fetched_at(path), **meta)
+            added += is_new
+            unchanged += not is_new
+            if remove:
+                os.remove(path)
+        return added, unchanged
+
+    def stats(self):
+        """快照数、页面数、原始大小和归档文件大小"""
+        entries = self.entries()
+        size = sum(os.path.getsize(p) for p in (self.pack_path, self.index_path) if os.path.exists(p))
+        codecs = {}
+        for entry in entries:
+            codecs[entry['codec']] = codecs.get(entry['codec'], 0) + 1
+        return {'snapshots': len(entries), 'pages': len({e['key'] for e in entries}),
+                'raw_bytes': sum(e['size'] for e in entries), 'bytes': size, 'codecs': codecs}
+
+
+def read_saved_page(source):
+    """读取保存的页面：source 为文件路径，或 (归档目录, 索引) —— 可在子进程中使用"""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return f.read()
+    archive_dir, entry = source
+    return PageArchive.for_dir(archive_dir).read(entry)
+
+
+def main():
+    """命令行：查看、压缩、导出和导入归档"""
+    parser = argparse.ArgumentParser(description='管理原始页面快照归档')
+    parser.add_argument('archive_dir', help='归档目录，如 results/archive')
+    parser.add_argument('command', choices=['stats', 'compact', 'export', 'import'])
+    parser.add_argument('path', nargs='?', help='export：导出目录；import：单独保存的HTML文件所在目录')
+    parser.add_argument('--latest', action='store_true', help='export 时只导出每个页面的最新快照')
+    parser.add_argument('--remove', action='store_true', help='import 后删除原文件')
+    args = parser.parse_args()
+    if args.command in ('export', 'import') and not args.path:
+        parser.error(f'{args.command} 需要指定目录')
+
+    setup_logging()
+    archive = PageArchive(args.archive_dir)
+    before = archive.stats()
+    if args.command == 'compact':
+        kept, dropped = archive.compact()
+        after = archive.stats()
+        logger.info(f"保留 {kept} 个快照，删除 {dropped} 个旧快照，文件 {before['bytes']} -> {after['bytes']} 字节")
+    elif args.command == 'export':
+        count = archive.export(args.path, latest_only=args.latest)
+        logger.info(f"导出 {count} 个HTML文件到 {args.path}")
+    elif args.command == 'import':
+        added, unchanged = archive.import_files(args.path, remove=args.remove)
+        after = archive.stats()
+        logger.info(f"导入 {added} 个HTML文件，{unchanged} 个与上一个快照相同已跳过，"
+                    f"归档 {after['snapshots']} 个快照，{after['bytes']} 字节")
+    else:
+        ratio = f"{before['bytes'] / before['raw_bytes']:.1%}" if before['raw_bytes'] else '-'
+        logger.info(f"{before['pages']} 个页面，{before['snapshots']} 个快照，原始 {before['raw_bytes']} 字节，"
+                    f"归档 {before['bytes']} 字节（{ratio}），压缩方式 {before['codecs']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析后端一致性检查和吞吐基准
+
+用各后端（html_backend.BACKENDS）运行站点现有的提取函数：
+- mohrss_search: MOHRSSDetailedParser.parse_search_page（人社部检索页）
+- mohrss_detail: MOHRSSDetailedParser.parse_detail_page（人社部详情页）
+- ndrc_list:     PolicyDataExtractor.parse_list_page（发改委列表页）
+- ndrc_detail:   PolicyDataExtractor.parse_detail_page（发改委详情页）
+- ndrc_next:     NDRCCrawler.has_next_page（发改委分页判断）
+- gz_detail:     DetailPageClient.parse_detail（广州市人社局详情页）
+
+以 html.parser 的提取结果为基准，逐页比较其他后端的结果，列出不一致的页面和字段，
+并统计每个后端每秒处理的页面数。页面默认由模拟站点的页面生成函数产生（--padding 在页面中加入导航等
+无关内容，使页面大小接近真实站点）；--pages 可指定保存的真实页面，如：
+
+    python -m crawler_common.parser_bench --pages mohrss_detail='mohrss_crawler/results/detail_pages/*.html'
+
+切换配置中的 html_parser 前，应先在保存的页面上确认没有不一致。
+
+用法：
+    python -m crawler_common.parser_bench
+    python -m crawler_common.parser_bench --scenarios mohrss_detail gz_detail --rounds 5 --padding 64
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from crawler_common import mock_server
+from crawler_common.html_backend import BACKENDS, DEFAULT_BACKEND, backend_available
+from crawler_common.log_setup import setup_logging
+from crawler_common.site_loader import import_site_module
+
+
+def setup_mohrss_search():
+    module = import_site_module('mohrss_crawler', 'mohrss_detailed_parser')
+    parser = module.MOHRSSDetailedParser()
+
+    def parse(html, backend):
+        parser.html_backend = backend
+        return parser.parse_search_page(html)
+
+    pages = [mock_server.mohrss_search_page(page, 50) for page in range(1, 7)]
+    return parse, pages
+
+
+def setup_mohrss_detail():
+    module = import_site_module('mohrss_crawler', 'mohrss_detailed_parser')
+    parser = module.MOHRSSDetailedParser()
+    url = 'http://www.mohrss.gov.cn/xxgk2020/fdzdgknr/zcfg/gfxwj/rcrs/202508/t20250808_550001.html'
+    policy_info = {'title': '', 'url': url, 'date': '', 'doc_number': ''}
+
+    def parse(html, backend):
+        parser.html_backend = backend
+        return parser.parse_detail_page(policy_info, html)
+
+    pages = [mock_server.mohrss_detail_page(policy_id) for policy_id in range(1, 31)]
+    return parse, pages
+
+
+def setup_ndrc_list():
+    module = import_site_module('ndrc_crawler', 'data_extractor_full')
+    extractor = module.PolicyDataExtractor()
+
+    def parse(html, backend):
+        extractor.html_backend = backend
+        return extractor.parse_list_page(html, '发展改革委令')
+
+    pages = [mock_server.ndrc_list_page(category, page)
+             for category in mock_server.NDRC_CATEGORIES for page in range(1, mock_server.NDRC_PAGES + 1)]
+    return parse, pages
+
+
+def setup_ndrc_detail():
+    module = import_site_module('ndrc_crawler', 'data_extractor_full')
+    extractor = module.PolicyDataExtractor()
+    url = 'https://www.ndrc.gov.cn/xxgk/zcfb/fzggwl/202301/t20230101_1300001.html'
+
+    def parse(html, backend):
+        extractor.html_backend = backend
+        return extractor.parse_detail_page(html, url)
+
+    pages = [mock_server.ndrc_detail_page(category, doc_id)
+             for category in mock_server.NDRC_CATEGORIES for doc_id in range(1300001, 1300007)]
+    return parse, pages
+
+
+def setup_ndrc_next():
+    module = import_site_module('ndrc_crawler', 'ndrc_crawler')
+
+    def parse(html, backend):
+        return module.NDRCCrawler.has_next_page(html, backend)
+
+    pages = [mock_server.ndrc_list_page(category, page)
+             for category in mock_server.NDRC_CATEGORIES for page in range(1, mock_server.NDRC_PAGES + 1)]
+    return parse, pages
+
+
+def setup_gz_detail():
+    module = import_site_module('gz_rsj_crawler', 'url_content_parser')
+    client = module.DetailPageClient()
+    url = 'https://rsj.gz.gov.cn/gkmlpt/content/1/1.html'
+
+    def parse(html, backend):
+        client.html_backend = backend
+        return client.parse_detail(url, html)
+
+    pages = [mock_server.gz_detail_page(type_id, article_id)
+             for type_id in mock_server.GZ_TYPES for article_id in range(1, 11)]
+    return parse, pages
+
+
+SCENARIOS = {
+    'mohrss_search': setup_mohrss_search,
+    'mohrss_detail': setup_mohrss_detail,
+    'ndrc_list': setup_ndrc_list,
+    'ndrc_detail': setup_ndrc_detail,
+    'ndrc_next': setup_ndrc_next,
+    'gz_detail': setup_gz_detail
+}
+
+
+def pad_page(html, kilobytes):
+    """在 <body> 后插入导航、侧栏等与提取无关的内容，使模拟页面大小接近真实页面"""
+    if kilobytes <= 0:
+        return html
+    block = ('<div class="sidebar"><div class="item"><p><a href="/news/{0}.html" target="_blank">'
+             '关于做好2024年第{0}批人力资源工作的通知</a><em>2024-01-01</em></p></div></div>')
+    filler = []
+    size = 0
+    index = 0
+    while size < kilobytes * 1024:
+        index += 1
+        piece = block.format(index)
+        filler.append(piece)
+        size += len(piece.encode('utf-8'))
+    return html.replace('<body>', '<body>' + ''.join(filler), 1)
+
+
+def load_saved_pages(pattern):
+    """读取保存的页面（通配符或目录），与爬虫一样以原始字节交给解析器"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.html')
+    pages = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'rb') as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def _normalize(result):
+    return json.dumps(result, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _first_difference(expected, actual, path=''):
+    """返回第一个不一致字段的路径"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual), key=str):
+            if _normalize(expected.get(key)) != _normalize(actual.get(key)):
+                return _first_difference(expected.get(key), actual.get(key), f'{path}.{key}')
+    elif isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f'{path}（长度 {len(expected)} != {len(actual)}）'
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            if _normalize(e) != _normalize(a):
+                return _first_difference(e, a, f'{path}[{i}]')
+    return path or '(结果)'
+
+
+def run_scenario(name, backends, rounds, padding, saved_pages=None):
+    """运行单个场景：逐页核对各后端的提取结果，并统计吞吐"""
+    parse, generated = SCENARIOS[name]()
+    if saved_pages is not None:
+        pages = saved_pages
+    else:
+        # 与联网抓取时一样，解析器收到的是原始字节（response.content）
+        pages = [(f'mock#{i + 1}', pad_page(html, padding).encode('utf-8')) for i, html in enumerate(generated)]
+
+    expected = [parse(html, DEFAULT_BACKEND) for _, html in pages]
+    total_bytes = sum(len(html) for _, html in pages)
+    report = {'scenario': name, 'pages': len(pages), 'avg_kb': round(total_bytes / max(len(pages), 1) / 1024, 1),
+              'backends': {}}
+    for backend in backends:
+        mismatches = []
+        for (label, html), baseline in zip(pages, expected):
+            result = parse(html, backend)
+            if _normalize(result) != _normalize(baseline):
+                mismatches.append({'page': label, 'field': _first_difference(baseline, result)})
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for _, html in pages:
+                parse(html, backend)
+        elapsed = time.perf_counter() - start
+        processed = len(pages) * rounds
+        report['backends'][backend] = {
+            'pages_per_second': round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+            'mismatches': mismatches
+        }
+    baseline_speed = report['backends'].get(DEFAULT_BACKEND, {}).get('pages_per_second')
+    for stats in report['backends'].values():
+        stats['speedup'] = round(stats['pages_per_second'] / baseline_speed, 2) if baseline_speed else None
+    return report
+
+
+def print_report(results):
+    print("\n" + "=" * 72)
+    print("📊 HTML解析后端基准测试结果")
+    print("=" * 72)
+    print(f"{'场景':<16}{'页面':>6}{'平均KB':>8}  {'后端':<14}{'页/秒':>10}{'加速':>8}{'不一致':>8}")
+    for r in results:
+        for backend, stats in r['backends'].items():
+            print(f"{r['scenario']:<16}{r['pages']:>6}{r['avg_kb']:>8}  {backend:<14}"
+                  f"{stats['pages_per_second']:>10.1f}{stats['speedup'] or 0:>8.2f}{len(stats['mismatches']):>8}")
+    print("-" * 72)
+    mismatched = False
+    for r in results:
+        for backend, stats in r['backends'].items():
+            for m in stats['mismatches'][:5]:
+                mismatched = True
+                print(f"❌ {r['scenario']} / {backend}: {m['page']} 字段 {m['field']} 与 {DEFAULT_BACKEND} 不一致")
+    if not mismatched:
+        print(f"✅ 所有后端的提取结果与 {DEFAULT_BACKEND} 一致")
+    print("=" * 72)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='核对各HTML解析后端的提取结果并测试解析吞吐')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS),
+                        help='要运行的场景')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS), help='要比较的后端')
+    parser.add_argument('--rounds', type=int, default=3, help='吞吐测试中每个页面的解析轮数')
+    parser.add_argument('--padding', type=int, default=48,
+                        help='模拟页面中加入的无关内容大小（KB），0表示使用原始模拟页面')
+    parser.add_argument('--pages', nargs='+', default=[], metavar='场景=路径',
+                        help='使用保存的页面代替模拟页面，路径可以是目录或通配符')
+    parser.add_argument('--json', dest='json_output', default=None, help='将结果另存为JSON文件')
+    args = parser.parse_args()
+
+    saved = {}
+    for item in args.pages:
+        name, _, pattern = item.partition('=')
+        if name not in SCENARIOS or not pattern:
+            parser.error(f'--pages 格式应为 场景=路径，场景可选: {", ".join(sorted(SCENARIOS))}')
+        saved[name] = load_saved_pages(pattern)
+        if not saved[name]:
+            parser.error(f'没有找到页面: {pattern}')
+
+    backends = [b for b in args.backends if backend_available(b)]
+    skipped = sorted(set(args.backends) - set(backends))
+    if skipped:
+        print(f"⚠️ 未安装，跳过: {', '.join(skipped)}")
+    if DEFAULT_BACKEND not in backends:
+        backends.insert(0, DEFAULT_BACKEND)
+
+    # 先配置日志，避免站点类初始化时在仓库目录下创建日志文件
+    setup_logging(level=logging.WARNING)
+    results = []
+    original_cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix='parser_bench_') as workdir:
+            os.chdir(workdir)
+            os.makedirs('logs', exist_ok=True)
+            for name in args.scenarios:
+                results.append(run_scenario(name, backends, args.rounds, args.padding, saved.get(name)))
+    finally:
+        os.chdir(original_cwd)
+
+    print_report(results)
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json_output}")
+    if any(stats['mismatches'] for r in results for stats in r['backends'].values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程解析
+
+BeautifulSoup 的 html.parser 是纯Python实现，解析已保存的页面时瓶颈在CPU。
+imap_ordered 把文件分发到进程池中解析，按输入顺序逐个返回结果，由调用方（单一写入方）依次合并，
+因此多进程运行的输出与单进程完全一致。
+
+- 每个子进程处理 max_tasks_per_child 个任务后自动重启，避免长时间运行时内存持续增长
+- 子进程的日志直接输出到标准错误（只输出 WARNING 及以上），指标只在主进程中统计
+- workers=1 时不创建进程池，直接在当前进程中执行，便于调试
+
+用法：
+    from crawler_common.process_pool import imap_ordered
+
+    for path, records in zip(paths, imap_ordered(parse_file, paths, workers=8)):
+        writer.add(records)
+"""
+
+import logging
+import multiprocessing
+import os
+
+from crawler_common.log_setup import setup_child_logging
+
+DEFAULT_MAX_TASKS_PER_CHILD = 100
+
+
+def default_workers():
+    """默认进程数：CPU核数"""
+    return os.cpu_count() or 1
+
+
+def _init_child(log_level, initializer, initargs):
+    """子进程初始化：替换从父进程继承的日志处理器，再执行调用方的初始化函数"""
+    setup_child_logging(log_level)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def imap_ordered(func, items, workers=None, max_tasks_per_child=DEFAULT_MAX_TASKS_PER_CHILD, chunksize=1,
+                 initializer=None, initargs=(), log_level=logging.WARNING):
+    """在进程池中执行 func(item)，按 items 的顺序逐个返回结果
+
+    Args:
+        func: 模块级函数（需要能被pickle）
+        items: 任务参数序列
+        workers: 进程数，None表示CPU核数，1表示在当前进程中执行
+        max_tasks_per_child: 每个子进程最多处理的任务数，之后重启子进程
+        chunksize: 每次分发给子进程的任务数
+        initializer: 子进程启动时调用的函数，用于创建解析器等每个进程只需一份的对象
+        initargs: initializer 的参数
+        log_level: 子进程的日志级别
+    """
+    workers = workers or default_workers()
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in items:
+            yield func(item)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_child, initargs=(log_level, initializer, initargs),
+                              maxtasksperchild=max_tasks_per_child) as pool:
+        yield from pool.imap(func, items, chunksize)
+
+
+def add_pool_arguments(parser):
+    """为 argparse 解析器添加进程池参数"""
+    parser.add_argument('--workers', type=int, default=None, help='解析进程数（默认CPU核数，1表示单进程）')
+    parser.add_argument('--max-tasks-per-child', type=int, default=DEFAULT_MAX_TASKS_PER_CHILD,
+                        help='每个子进程处理多少个文件后重启，用于限制内存占用')
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内按主机限速
+
+多个线程并发访问同一站点时，对同一主机的请求按 min_interval 串成一条时间线：
+每次调用 wait() 预约下一个可用时间点并等待到该时间点，因此无论有多少线程，
+同一主机的请求间隔都不小于 min_interval。跨进程、跨机器共享限速请使用 work_queue.WorkQueue.reserve_host_slot。
+
+用法：
+    from crawler_common.rate_limit import HostRateLimiter
+
+    limiter = HostRateLimiter(1.0)
+    limiter.wait(url)
+    response = session.get(url)
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class HostRateLimiter:
+    """按主机限速，可在多个线程中共用"""
+
+    def __init__(self, min_interval=1.0, intervals=None):
+        """
+        Args:
+            min_interval: 默认的同一主机最小请求间隔（秒）
+            intervals: 指定主机的请求间隔，如 {'www.mohrss.gov.cn': 3.0}
+        """
+        self.min_interval = min_interval
+        self.intervals = dict(intervals or {})
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url):
+        return urlsplit(url).netloc.lower()
+
+    def reserve(self, url):
+        """预约一次请求，返回需要等待的秒数"""
+        host = self.host_of(url)
+        interval = self.intervals.get(host, self.min_interval)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(host, 0.0))
+            self._next_allowed[host] = slot + interval
+        return slot - now
+
+    def wait(self, url):
+        """等待到该主机的下一个可用时间点，返回实际等待的秒数"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def delay_host(self, url, seconds):
+        """推迟该主机的后续请求（如收到429的 Retry-After 时）"""
+        host = self.host_of(url)
+        with self._lock:
+            self._next_allowed[host] = max(self._next_allowed.get(host, 0.0), time.monotonic() + seconds)
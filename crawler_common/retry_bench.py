@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重试行为基准测试
+
+启动本地模拟站点并注入故障，直接调用各爬虫现有的重试函数：
+- gz_api:        GZRSSCrawler.crawl_page（广州市人社局列表接口）
+- gz_detail:     URLContentParser.parse_url_content（广州市人社局详情页）
+- mohrss_search: MOHRSSRawCrawler.get_page（人社部检索页）
+- ndrc_detail:   PolicyDataExtractor.get_page_content（发改委详情页）
+
+统计每个场景的有效结果数、服务端实际收到的请求数、浪费的请求数、有效吞吐（goodput）
+以及重试等待时间，便于基于数据调整重试次数、退避间隔和超时设置。
+
+用法：
+    python -m crawler_common.retry_bench --calls 30 --error-5xx-rate 0.2 --rate-limit-rate 0.1 --seed 1
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import requests
+
+from crawler_common.mock_server import start_mock_server, add_fault_arguments, fault_profile_from_args
+from crawler_common.site_loader import import_site_module
+
+
+class SleepRecorder:
+    """替换站点模块中的time模块，记录重试等待时间并按比例缩放实际等待"""
+
+    def __init__(self, scale=0.0):
+        self.scale = scale
+        self.requested = 0.0
+
+    def sleep(self, seconds):
+        self.requested += seconds
+        if self.scale > 0:
+            time.sleep(seconds * self.scale)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def setup_gz_api(base_url, workdir):
+    module = import_site_module('gz_rsj_crawler', 'gz_rsj_crawler')
+    module.CRAWLER_CONFIG['data_dir'] = workdir
+    crawler = module.GZRSSCrawler('505')
+    types = ('505', '506', '507')
+
+    def call(i):
+        crawler.crawler_type = types[i % len(types)]
+        crawler.base_url = f'{base_url}/gkmlpt/api/all/{crawler.crawler_type}'
+        data = crawler.crawl_page(i // len(types) % 5 + 1)
+        return bool(data and data.get('articles'))
+
+    return module, call
+
+
+def setup_gz_detail(base_url, workdir):
+    module = import_site_module('gz_rsj_crawler', 'url_content_parser')
+    parser = module.URLContentParser(os.path.join(workdir, 'gz_rsj_data.xlsx'), output_dir=workdir)
+
+    def call(i):
+        result = parser.parse_url_content(f'{base_url}/gz/content/505/{i % 95 + 1}.html')
+        return bool(result and result.get('title'))
+
+    return module, call
+
+
+def setup_mohrss_search(base_url, workdir):
+    module = import_site_module('mohrss_crawler', 'mohrss_raw_crawler')
+    crawler = module.MOHRSSRawCrawler(base_url=base_url)
+
+    def call(i):
+        url = f'{base_url}/was5/web/search?channelid=203464&orderby=date&default=isall&page={i % 20 + 1}'
+        response = crawler.get_page(url)
+        return bool(response is not None and 'border-collapse:separate;' in response.text)
+
+    return module, call
+
+
+def setup_ndrc_detail(base_url, workdir):
+    module = import_site_module('ndrc_crawler', 'data_extractor_full')
+    extractor = module.PolicyDataExtractor()
+
+    def call(i):
+        url = f'{base_url}/xxgk/zcfb/fzggwl/202301/t20230101_{1300000 + i}.html'
+        html = extractor.get_page_content(url)  # 原始字节
+        return bool(html and b'article_con' in html)
+
+    return module, call
+
+
+SCENARIOS = {
+    'gz_api': setup_gz_api,
+    'gz_detail': setup_gz_detail,
+    'mohrss_search': setup_mohrss_search,
+    'ndrc_detail': setup_ndrc_detail
+}
+
+
+def run_scenario(name, server, calls, sleep_scale, workdir):
+    """运行单个场景并返回统计结果"""
+    module, call = SCENARIOS[name](server.base_url, workdir)
+    recorder = SleepRecorder(sleep_scale)
+    original_time = module.time
+    module.time = recorder
+
+    server.reset_stats()
+    valid = 0
+    start = time.perf_counter()
+    try:
+        for i in range(calls):
+            # 重试用尽后抛出的网络错误记为失败调用；其他异常说明场景本身有错误，直接抛出
+            try:
+                if call(i):
+                    valid += 1
+            except requests.exceptions.RequestException:
+                pass
+    finally:
+        module.time = original_time
+    elapsed = time.perf_counter() - start
+
+    stats = server.snapshot_stats()
+    # 实际等待时间已包含在elapsed中，这里按未缩放的等待时间估算真实运行耗时
+    projected = elapsed - recorder.requested * sleep_scale + recorder.requested
+    return {
+        'scenario': name,
+        'calls': calls,
+        'valid_results': valid,
+        'failed_calls': calls - valid,
+        'server_requests': stats['requests'],
+        'wasted_requests': stats['requests'] - valid,
+        'elapsed_seconds': round(elapsed, 3),
+        'sleep_requested_seconds': round(recorder.requested, 3),
+        'projected_seconds': round(projected, 3),
+        'goodput_per_second': round(valid / projected, 3) if projected > 0 else 0.0,
+        'server_outcomes': stats
+    }
+
+
+def print_report(results, fault_profile):
+    """打印基准测试结果"""
+    print("\n" + "=" * 78)
+    print("📊 重试行为基准测试结果")
+    print("=" * 78)
+    print(f"故障注入配置: {fault_profile}")
+    print(f"{'场景':<16}{'调用':>6}{'有效':>6}{'请求':>6}{'浪费':>6}{'实测(s)':>10}{'等待(s)':>10}{'预估(s)':>10}{'goodput/s':>11}")
+    for r in results:
+        print(f"{r['scenario']:<16}{r['calls']:>6}{r['valid_results']:>6}{r['server_requests']:>6}"
+              f"{r['wasted_requests']:>6}{r['elapsed_seconds']:>10.2f}{r['sleep_requested_seconds']:>10.2f}"
+              f"{r['projected_seconds']:>10.2f}{r['goodput_per_second']:>11.3f}")
+    print("-" * 78)
+    for r in results:
+        outcomes = {k: v for k, v in r['server_outcomes'].items() if v and k not in ('requests', 'bytes_sent')}
+        print(f"{r['scenario']:<16}服务端结果分布: {outcomes}")
+    total_requests = sum(r['server_requests'] for r in results)
+    total_wasted = sum(r['wasted_requests'] for r in results)
+    print(f"\n合计请求: {total_requests}，浪费请求: {total_wasted}")
+    print("=" * 78)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='在模拟站点上测试各爬虫的重试行为')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS),
+                        help='要运行的场景')
+    parser.add_argument('--calls', type=int, default=20, help='每个场景的调用次数')
+    parser.add_argument('--sleep-scale', type=float, default=0.0,
+                        help='实际等待时间缩放比例（0表示只记录不等待，1表示真实等待）')
+    parser.add_argument('--json', dest='json_output', default=None, help='将结果另存为JSON文件')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    fault_profile = fault_profile_from_args(args)
+    server = start_mock_server(fault_profile)
+    results = []
+    original_cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix='retry_bench_') as workdir:
+            # 部分脚本会在当前目录创建 logs/ 和 results/，在临时目录中运行避免污染仓库
+            os.chdir(workdir)
+            os.makedirs('logs', exist_ok=True)
+            for name in args.scenarios:
+                results.append(run_scenario(name, server, args.calls, args.sleep_scale, workdir))
+    finally:
+        os.chdir(original_cwd)
+        server.shutdown()
+        server.server_close()
+
+    print_report(results, server.fault_profile)
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump({'fault_profile': server.fault_profile, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json_output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+从站点目录导入模块
+
+各站点脚本都使用 from config import ... 的写法，三个站点的 config 模块同名，
+公共工具在同一进程中导入站点模块时需通过 import_site_module 切换搜索路径。
+"""
+
+import importlib
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SITE_DIRS = ('gz_rsj_crawler', 'mohrss_crawler', 'ndrc_crawler')
+
+
+def import_site_module(site_dir, module_name):
+    """从站点目录导入模块
+
+    导入前把对应站点目录放到搜索路径最前面，并清除其他站点已缓存的 config 模块。
+    """
+    site_path = os.path.join(REPO_ROOT, site_dir)
+    for other in SITE_DIRS:
+        other_path = os.path.join(REPO_ROOT, other)
+        while other_path in sys.path:
+            sys.path.remove(other_path)
+    sys.path.insert(0, site_path)
+    cached = sys.modules.get('config')
+    if cached is not None and os.path.dirname(os.path.abspath(getattr(cached, '__file__', ''))) != site_path:
+        del sys.modules['config']
+    return importlib.import_module(module_name)
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+详情页和正文的历史版本库（增量存储）
+
+政府网站的政策页面经常被悄悄修改：有效性变化、追加通知、更正附件。详情页缓存按URL覆盖写入，只保留最后一次抓取的内容。
+VersionStore 保存每个文档的每个版本，每个版本只在内容（SHA-1）变化时写入：
+
+    <版本库目录>/versions.pack   追加写入，记录格式与 page_archive 相同（记录头 + JSON元数据 + 压缩数据）
+    <版本库目录>/versions.idx    每行一条JSON索引：
+        {"key", "version", "saved_at", "sha1", "size", "kind", "chain", "changes", "codec", "offset", "length", ...}
+
+- 第一个版本保存全文（kind=full），之后的版本保存相对上一版本的分段增量（kind=delta）：文档按换行和标签结束符 '>'
+  切成片段，增量由“复制上一版本第 i 到 j 段”和“插入新片段”两种操作组成，再压缩写入；
+  比较片段时以两边都只出现一次的片段为锚点（match_blocks），耗时与页面大小成线性，可以在抓取线程中直接调用
+- 增量链最长 keyframe_interval 个版本，超过时或增量不比全文小很多时重新保存全文，
+  读取任一版本最多从最近的全文开始依次应用 keyframe_interval 个增量
+- changes 记录相对上一版本增加、删除的片段数和字节数，在写入时计算；
+  changes_since(日期) 只读索引，不重建文档；inserted(entry) 只读取该版本自己的记录，返回新增的片段
+- 同一进程中的多个线程可以共用一个实例（for_dir），不支持多个进程同时写入同一版本库
+
+用法：
+    from crawler_common.version_store import VersionStore
+
+    versions = VersionStore.for_dir('results/versions/pages')
+    entry, added = versions.add(url, response.content, url=url)
+    html = versions.get(url)                        # 最新版本
+    html = versions.get(url, version=1)             # 第一个版本
+    html = versions.as_of(url, '2025-08-01')        # 该日期（含）之前保存的最后一个版本
+    for key, entries in versions.changes_since('2025-08-01').items():
+        ...
+
+命令行（在仓库根目录运行）：
+    python -m crawler_common.version_store mohrss_crawler/results/versions/bodies stats
+    python -m crawler_common.version_store mohrss_crawler/results/versions/bodies changes --since 2025-08-01 [--text]
+    python -m crawler_common.version_store mohrss_crawler/results/versions/bodies history <URL>
+    python -m crawler_common.version_store mohrss_crawler/results/versions/bodies show <URL> [--version N] [-o 文件]
+"""
+
+import argparse
+import bisect
+import hashlib
+import logging
+import os
+import re
+import struct
+import sys
+from datetime import datetime
+
+from crawler_common.log_setup import setup_logging
+from crawler_common.page_archive import RecordPack
+
+logger = logging.getLogger(__name__)
+
+PACK_FILENAME = 'versions.pack'
+INDEX_FILENAME = 'versions.idx'
+# 增量链的最大长度：超过时重新保存全文
+KEYFRAME_INTERVAL = 16
+
+# 片段：到换行或标签结束符为止（含），最后一段可以没有结束符
+_SEGMENT = re.compile(rb'[^\n>]*[\n>]|[^\n>]+')
+# 增量操作：复制上一版本的片段（起始片段、片段数），插入新内容（字节数 + 内容）
+_COPY = struct.Struct('>BII')
+_INSERT = struct.Struct('>BI')
+_OP_COPY, _OP_INSERT = 0, 1
+
+
+def split_segments(content):
+    """把文档切成片段（拼接后与原文逐字节相同）"""
+    return _SEGMENT.findall(content)
+
+
+def _longest_increasing(pairs):
+    """按 i 排好序的 (i, j) 中 j 严格递增的最长子序列（O(n log n)）"""
+    tails, tail_index, previous = [], [], [None] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        position = bisect.bisect_left(tails, j)
+        if position == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[position] = j
+            tail_index[position] = index
+        previous[index] = tail_index[position - 1] if position else None
+    result = []
+    index = tail_index[-1] if tail_index else None
+    while index is not None:
+        result.append(pairs[index])
+        index = previous[index]
+    return result[::-1]
+
+
+def match_blocks(a, b):
+    """两个片段序列的相同块 [(i, j, n), ...]，按位置递增，耗时与片段数成线性（加排序）
+
+    先去掉相同的开头和结尾；中间部分以在两边都只出现一次的片段为锚点，取顺序一致的最长锚点序列，
+    再从每个锚点向前、向后扩展。重复出现的片段（如 '<p>'、'</p>'）只能靠相邻锚点的扩展匹配，
+    结果不一定是最短增量，但不会出现 difflib 在长页面上的平方级耗时
+    """
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a_end, b_end = len(a) - suffix, len(b) - suffix
+
+    counts = {}
+    for i in range(prefix, a_end):
+        entry = counts.setdefault(a[i], [0, 0, i])
+        entry[0] += 1
+    for j in range(prefix, b_end):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry.append(j)
+    anchors = sorted((entry[2], entry[3]) for entry in counts.values() if entry[0] == 1 and entry[1] == 1)
+
+    blocks = [(0, 0, prefix)] if prefix else []
+    i_done, j_done = prefix, prefix
+    for i, j in _longest_increasing(anchors):
+        if i < i_done or j < j_done:
+            # 已被上一个块向后扩展覆盖
+            continue
+        start_i, start_j = i, j
+        while start_i > i_done and start_j > j_done and a[start_i - 1] == b[start_j - 1]:
+            start_i -= 1
+            start_j -= 1
+        end_i, end_j = i + 1, j + 1
+        while end_i < a_end and end_j < b_end and a[end_i] == b[end_j]:
+            end_i += 1
+            end_j += 1
+        blocks.append((start_i, start_j, end_i - start_i))
+        i_done, j_done = end_i, end_j
+    if suffix:
+        blocks.append((a_end, b_end, suffix))
+    return blocks
+
+
+def encode_delta(base_segments, segments):
+    """生成从上一版本片段到新版本片段的增量
+
+    Returns:
+        (增量字节, 变化统计 {'added', 'removed', 'added_bytes', 'removed_bytes'})
+    """
+    ops = []
+    changes = {'added': 0, 'removed': 0, 'added_bytes': 0, 'removed_bytes': 0}
+    i_done = j_done = 0
+    for i, j, n in match_blocks(base_segments, segments) + [(len(base_segments), len(segments), 0)]:
+        if i > i_done:
+            changes['removed'] += i - i_done
+            changes['removed_bytes'] += sum(len(s) for s in base_segments[i_done:i])
+        if j > j_done:
+            data = b''.join(segments[j_done:j])
+            ops.append(_INSERT.pack(_OP_INSERT, len(data)) + data)
+            changes['added'] += j - j_done
+            changes['added_bytes'] += len(data)
+        if n:
+            ops.append(_COPY.pack(_OP_COPY, i, n))
+        i_done, j_done = i + n, j + n
+    return b''.join(ops), changes
+
+
+def _iter_ops(delta):
+    """依次返回增量中的操作：('copy', 起始片段, 片段数) 或 ('insert', 内容)"""
+    pos = 0
+    while pos < len(delta):
+        if delta[pos] == _OP_COPY:
+            _, start, count = _COPY.unpack_from(delta, pos)
+            pos += _COPY.size
+            yield 'copy', start, count
+        else:
+            _, length = _INSERT.unpack_from(delta, pos)
+            pos += _INSERT.size
+            yield 'insert', delta[pos:pos + length]
+            pos += length
+
+
+def apply_delta_segments(base_segments, delta):
+    """在上一版本的片段上应用增量，返回新版本的片段（依次应用多个增量时不必每次重新切分全文）"""
+    segments = []
+    for op in _iter_ops(delta):
+        if op[0] == 'copy':
+            segments.extend(base_segments[op[1]:op[1] + op[2]])
+        else:
+            # 插入的内容由完整的片段组成，单独切分与在全文中切分的结果相同
+            segments.extend(split_segments(op[1]))
+    return segments
+
+
+def apply_delta(base, delta):
+    """在上一版本的内容上应用增量，返回新版本的内容"""
+    return b''.join(apply_delta_segments(split_segments(base), delta))
+
+
+def _as_timestamp(value):
+    """日期、时间或ISO格式字符串转为可与 saved_at 按字符串比较的形式"""
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class VersionStore(RecordPack):
+    """文档历史版本库，可在多个线程中共用"""
+
+    pack_filename = PACK_FILENAME
+    index_filename = INDEX_FILENAME
+    _instances = {}
+
+    def __init__(self, archive_dir, codec=None, keyframe_interval=KEYFRAME_INTERVAL):
+        """
+        Args:
+            archive_dir: 版本库目录（不存在时在第一次写入时创建）
+            codec: 新记录的压缩方式 'zstd' 或 'zlib'，None表示 default_codec()
+            keyframe_interval: 增量链的最大长度
+        """
+        super().__init__(archive_dir, codec)
+        self.keyframe_interval = keyframe_interval
+        self._by_key = None  # {key: [各版本的索引]}
+
+    def _load(self):
+        if self._entries is None:
+            entries = super()._load()
+            self._by_key = {}
+            for entry in entries:
+                self._by_key.setdefault(entry['key'], []).append(entry)
+        return self._entries
+
+    # ---------- 写入 ----------
+
+    def add(self, key, content, saved_at=None, **meta):
+        """保存文档的新版本；与最新版本内容（SHA-1）相同时不写入
+
+        Returns:
+            (索引, 是否写入)：没有写入时为已有的最新版本的索引
+
+        Args:
+            key: 文档标识（如规范化的URL）
+            content: 文档内容（字节；字符串按 UTF-8 编码后保存）
+            saved_at: 保存时间（ISO格式），None表示当前时间
+            meta: 其他写入索引的字段（如 url）
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        sha1 = hashlib.sha1(content).hexdigest()
+        while True:
+            with self._lock:
+                self._load()
+                latest = self._latest.get(key)
+            if latest is not None and latest['sha1'] == sha1:
+                return latest, False
+
+            # 在锁外生成增量和压缩，写入前确认期间没有其他线程写入该文档的新版本
+            record_meta, record = self._encode_version(key, content, sha1, latest, saved_at, meta)
+            with self._lock:
+                if self._latest.get(key) is not latest:
+                    continue
+                entry = self._append_record(record_meta, record)
+                self._by_key.setdefault(key, []).append(entry)
+            return entry, True
+
+    def _encode_version(self, key, content, sha1, latest, saved_at, meta):
+        """生成新版本的记录：第一个版本、增量链过长或增量不够小时保存全文"""
+        record_meta = dict(meta, key=key, version=latest['version'] + 1 if latest else 1,
+                           saved_at=saved_at or datetime.now().isoformat(timespec='seconds'),
+                           sha1=sha1, size=len(content), kind='full', chain=0, changes=None, codec=self.codec)
+        data = content
+        if latest is not None:
+            delta, changes = encode_delta(self._rebuild_segments(latest), split_segments(content))
+            record_meta['changes'] = changes
+            if latest['chain'] + 1 < self.keyframe_interval and len(delta) < len(content) // 2:
+                record_meta.update(kind='delta', chain=latest['chain'] + 1)
+                data = delta
+        return record_meta, self._encode_record(record_meta, data)
+
+    # ---------- 读取 ----------
+
+    def _rebuild_segments(self, entry):
+        """从最近的全文开始依次应用增量，得到 entry 对应版本的片段（全文只切分一次）"""
+        with self._lock:
+            self._load()
+            history = self._by_key[entry['key']][:entry['version']]
+        start = max(i for i, e in enumerate(history) if e['kind'] == 'full')
+        segments = None
+        for e, data in self.iter_pages(history[start:]):
+            segments = split_segments(data) if e['kind'] == 'full' else apply_delta_segments(segments, data)
+        if hashlib.sha1(b''.join(segments)).hexdigest() != entry['sha1']:
+            raise ValueError(f"版本内容校验失败: {entry['key']} 第{entry['version']}版")
+        return segments
+
+    def _rebuild(self, entry):
+        """entry 对应版本的内容"""
+        return b''.join(self._rebuild_segments(entry))
+
+    def versions(self, key):
+        """文档各版本的索引（按版本号排列），没有该文档时返回空列表"""
+        if not os.path.exists(self.pack_path):
+            return []
+        with self._lock:
+            self._load()
+            return list(self._by_key.get(key, []))
+
+    def get(self, key, version=None):
+        """读取文档的某个版本（字节），version 为None时读取最新版本；没有该版本时返回None"""
+        history = self.versions(key)
+        if not history:
+            return None
+        version = version or len(history)
+        if not 1 <= version <= len(history):
+            return None
+        return self._rebuild(history[version - 1])
+
+    def as_of(self, key, when):
+        """读取文档在 when（日期、时间或ISO格式字符串，含当天/当时）之前保存的最后一个版本，没有时返回None"""
+        when = _as_timestamp(when)
+        # 只给出日期时包含当天保存的版本
+        if len(when) == 10:
+            when += 'T23:59:59'
+        candidates = [e for e in self.versions(key) if e['saved_at'] <= when]
+        return self._rebuild(candidates[-1]) if candidates else None
+
+    def changes_since(self, since, until=None):
+        """since（含）之后保存的版本，只读索引不重建文档
+
+        Returns:
+            {key: [版本索引, ...]}：version 为1的是新文档，其余的 changes 为相对上一版本的变化统计
+        """
+        since = _as_timestamp(since)
+        until = _as_timestamp(until) if until is not None else None
+        result = {}
+        for entry in self.entries():
+            if entry['saved_at'] >= since and (until is None or entry['saved_at'] < until):
+                result.setdefault(entry['key'], []).append(entry)
+        return result
+
+    def inserted(self, entry):
+        """该版本相对上一版本新增的片段（字节列表）
+
+        增量版本只读取本版本的记录；第一个版本返回全文；
+        重新保存全文的版本（kind=full 且 version>1）需要重建上一版本后比较
+        """
+        data = self.read(entry)
+        if entry['kind'] == 'delta':
+            return [op[1] for op in _iter_ops(data) if op[0] == 'insert']
+        if entry['version'] == 1:
+            return [data]
+        previous = self.versions(entry['key'])[entry['version'] - 2]
+        delta, _ = encode_delta(self._rebuild_segments(previous), split_segments(data))
+        return [op[1] for op in _iter_ops(delta) if op[0] == 'insert']
+
+    def stats(self):
+        """文档数、版本数、全文和增量记录数、原始大小和版本库文件大小"""
+        entries = self.entries()
+        size = sum(os.path.getsize(p) for p in (self.pack_path, self.index_path) if os.path.exists(p))
+        return {'documents': len({e['key'] for e in entries}), 'versions': len(entries),
+                'full': sum(e['kind'] == 'full' for e in entries), 'delta': sum(e['kind'] == 'delta' for e in entries),
+                'raw_bytes': sum(e['size'] for e in entries), 'bytes': size}
+
+
+def main():
+    """命令行：查看版本库统计、某日期之后的变化、文档的版本列表和某个版本的内容"""
+    parser = argparse.ArgumentParser(description='查看详情页和正文的历史版本库')
+    parser.add_argument('store_dir', help='版本库目录，如 results/versions/bodies')
+    parser.add_argument('command', choices=['stats', 'changes', 'history', 'show'])
+    parser.add_argument('key', nargs='?', help='history、show：文档标识（URL）')
+    parser.add_argument('--since', help='changes：起始日期或时间（ISO格式，含）')
+    parser.add_argument('--text', action='store_true', help='changes：同时输出新增的内容')
+    parser.add_argument('--version', type=int, help='show：版本号，默认最新版本')
+    parser.add_argument('-o', '--output', help='show：输出文件，默认输出到标准输出')
+    args = parser.parse_args()
+    if args.command in ('history', 'show') and not args.key:
+        parser.error(f'{args.command} 需要指定文档标识')
+    if args.command == 'changes' and not args.since:
+        parser.error('changes 需要指定 --since')
+
+    setup_logging()
+    store = VersionStore(args.store_dir)
+    if args.command == 'changes':
+        changes = store.changes_since(args.since)
+        logger.info(f"{args.since} 之后 {len(changes)} 个文档有新版本")
+        for key, entries in changes.items():
+            for entry in entries:
+                if entry['version'] == 1:
+                    logger.info(f"[新文档] {key} 第1版 {entry['saved_at']}")
+                    continue
+                c = entry['changes']
+                logger.info(f"[修改] {key} 第{entry['version']}版 {entry['saved_at']}："
+                            f"增加 {c['added']} 段（{c['added_bytes']} 字节），删除 {c['removed']} 段（{c['removed_bytes']} 字节）")
+                if args.text:
+                    for segment in store.inserted(entry):
+                        for line in segment.decode('utf-8', errors='replace').splitlines():
+                            if line.strip():
+                                logger.info(f"    + {line.strip()}")
+    elif args.command == 'history':
+        for entry in store.versions(args.key):
+            logger.info(f"第{entry['version']}版 {entry['saved_at']} {entry['kind']} {entry['size']} 字节 {entry['sha1']}")
+    elif args.command == 'show':
+        content = store.get(args.key, args.version)
+        if content is None:
+            parser.error(f'没有该版本: {args.key}')
+        if args.output:
+            with open(args.output, 'wb') as f:
+                f.write(content)
+        else:
+            sys.stdout.buffer.write(content)
+    else:
+        stats = store.stats()
+        ratio = f"{stats['bytes'] / stats['raw_bytes']:.1%}" if stats['raw_bytes'] else '-'
+        logger.info(f"{stats['documents']} 个文档，{stats['versions']} 个版本（全文 {stats['full']}，增量 {stats['delta']}），"
+                    f"原始 {stats['raw_bytes']} 字节，版本库 {stats['bytes']} 字节（{ratio}）")
+
+
+if __name__ == '__main__':
+    main()
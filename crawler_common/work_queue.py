@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享任务队列（SQLite）
+
+多台机器上的 worker 通过同一个 SQLite 数据库文件协作抓取：
+- tasks:   待抓取的列表页、详情页、附件，按 (site, kind, url) 去重
+- hosts:   每个主机的最小请求间隔和下一次允许请求的时间，所有 worker 共用同一个限速
+- results: 抓取和解析结果，作为统一的结果存储
+- workers: worker 心跳，便于查看运行状态
+
+任务领取采用租约：worker 领取任务后在 lease_seconds 内完成，否则租约过期，任务会被其他 worker 重新领取，
+因此 worker 进程崩溃不会丢任务。失败的任务按指数退避重新排队，超过最大次数后标记为 failed。
+
+数据库放在共享存储上时默认使用 DELETE 日志模式（WAL 依赖共享内存，不能跨机器使用）；
+只有一台机器上的多个进程共用数据库时可以打开 WAL 提高并发。各机器的时钟需要同步（NTP），
+租约和主机限速都依赖系统时间。
+
+用法：
+    from crawler_common.work_queue import WorkQueue
+
+    queue = WorkQueue('crawl.db')
+    queue.add_tasks([{'site': 'ndrc', 'kind': 'list', 'url': 'https://...'}])
+    task = queue.claim('worker-1', site='ndrc')
+    ...
+    queue.complete(task, 'worker-1', data={'title': '...'}, new_tasks=[...])
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# 任务状态
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (site, kind, url)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (site, status, priority, available_at);
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    min_interval REAL NOT NULL,
+    next_allowed REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    task_id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    worker TEXT,
+    status_code INTEGER,
+    fetched_at REAL NOT NULL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_site ON results (site, kind);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    hostname TEXT,
+    pid INTEGER,
+    site TEXT,
+    started_at REAL,
+    last_seen REAL,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def default_worker_id():
+    """默认的 worker 标识：主机名-进程号"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """基于 SQLite 的共享任务队列，可在多进程、多机器间共用"""
+
+    def __init__(self, db_path, wal=False, timeout=60.0):
+        """
+        Args:
+            db_path: 数据库文件路径，多机器运行时放在共享存储上
+            wal: 是否使用 WAL 日志模式（只适用于单机多进程）
+            timeout: 等待数据库写锁的最长时间（秒）
+        """
+        self.db_path = db_path
+        self.wal = wal
+        self.timeout = timeout
+        self._local = threading.local()
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL' if wal else 'PRAGMA journal_mode=DELETE')
+        conn.executescript(SCHEMA)
+
+    def _connection(self):
+        """每个线程使用独立的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None：由 _transaction 显式控制事务
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """写事务：BEGIN IMMEDIATE 在开始时就拿到写锁，避免多个 worker 同时领取同一任务"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------- 任务 ----------
+
+    @staticmethod
+    def _insert_tasks(conn, tasks, now):
+        """插入任务，已存在的 (site, kind, url) 会被忽略，返回新增数量"""
+        before = conn.total_changes
+        conn.executemany(
+            'INSERT OR IGNORE INTO tasks (site, kind, url, payload, priority, available_at, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(t['site'], t['kind'], t['url'], json.dumps(t.get('payload') or {}, ensure_ascii=False),
+              t.get('priority', 0), now, now, now) for t in tasks]
+        )
+        return conn.total_changes - before
+
+    def add_tasks(self, tasks):
+        """添加任务
+
+        Args:
+            tasks: 字典列表，包含 site、kind、url，可选 payload（可JSON序列化）和 priority（越小越先执行）
+
+        Returns:
+            int: 新增的任务数（重复任务不计）
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return 0
+        with self._transaction() as conn:
+            return self._insert_tasks(conn, tasks, time.time())
+
+    @staticmethod
+    def _task_from_row(row):
+        task = dict(row)
+        task['payload'] = json.loads(task['payload'] or '{}')
+        return task
+
+    def claim(self, worker_id, site=None, lease_seconds=300):
+        """领取一个任务，没有可执行的任务时返回None
+
+        优先重新领取租约已过期的任务，其次按 priority、id 顺序领取待执行的任务。
+        """
+        now = time.time()
+        site_clause = 'AND site = ?' if site else ''
+        site_args = (site,) if site else ()
+        with self._transaction() as conn:
+            row = conn.execute(
+                f'SELECT * FROM tasks WHERE status = ? AND lease_expires < ? {site_clause} '
+                'ORDER BY priority, id LIMIT 1',
+                (LEASED, now) + site_args
+            ).fetchone()
+            if row is None:
+                row = conn.execute(
+                    f'SELECT * FROM tasks WHERE status = ? AND available_at <= ? {site_clause} '
+                    'ORDER BY priority, id LIMIT 1',
+                    (PENDING, now) + site_args
+                ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, '
+                'updated_at = ? WHERE id = ?',
+                (LEASED, worker_id, now + lease_seconds, now, row['id'])
+            )
+        task = self._task_from_row(row)
+        task['attempts'] += 1
+        return task
+
+    def complete(self, task, worker_id, data=None, status_code=None, new_tasks=()):
+        """标记任务完成，并在同一事务中保存结果、加入新发现的任务
+
+        Returns:
+            bool: 租约已被其他 worker 接手时返回False，此时结果不会保存
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                'UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, last_error = NULL, '
+                'updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?',
+                (DONE, now, task['id'], LEASED, worker_id)
+            ).rowcount
+            if not updated:
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO results (task_id, site, kind, url, worker, status_code, fetched_at, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (task['id'], task['site'], task['kind'], task['url'], worker_id, status_code, now,
+                 json.dumps(data, ensure_ascii=False) if data is not None else None)
+            )
+            self._insert_tasks(conn, list(new_tasks), now)
+            conn.execute('UPDATE workers SET done = done + 1, last_seen = ? WHERE worker_id = ?', (now, worker_id))
+        return True
+
+    def fail(self, task, worker_id, error, max_attempts=5, backoff=30.0, delay=None):
+        """记录失败；未超过最大次数时按指数退避重新排队，否则标记为 failed
+
+        Args:
+            delay: 指定重新排队前的等待时间（如429响应的Retry-After），None表示按指数退避计算
+
+        Returns:
+            str: 任务的新状态
+        """
+        now = time.time()
+        if task['attempts'] >= max_attempts:
+            status, available_at = FAILED, now
+        else:
+            status = PENDING
+            available_at = now + (delay if delay is not None else backoff * 2 ** (task['attempts'] - 1))
+        with self._transaction() as conn:
+            updated = conn.execute(
+                'UPDATE tasks SET status = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL, '
+                'last_error = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?',
+                (status, available_at, str(error)[:500], now, task['id'], LEASED, worker_id)
+            ).rowcount
+            if updated:
+                conn.execute('UPDATE workers SET failed = failed + 1, last_seen = ? WHERE worker_id = ?',
+                             (now, worker_id))
+        return status
+
+    def release(self, task, worker_id):
+        """归还未执行的任务（worker 正常退出时使用），不计入尝试次数"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE tasks SET status = ?, attempts = MAX(attempts - 1, 0), lease_owner = NULL, '
+                'lease_expires = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?',
+                (PENDING, now, task['id'], LEASED, worker_id)
+            )
+
+    def retry_failed(self, site=None):
+        """把 failed 状态的任务重新放回队列，返回数量"""
+        now = time.time()
+        site_clause = 'AND site = ?' if site else ''
+        with self._transaction() as conn:
+            return conn.execute(
+                f'UPDATE tasks SET status = ?, attempts = 0, available_at = ?, updated_at = ? '
+                f'WHERE status = ? {site_clause}',
+                (PENDING, now, now, FAILED) + ((site,) if site else ())
+            ).rowcount
+
+    def has_unfinished(self, site=None):
+        """是否还有待执行或执行中的任务（执行中的任务可能还会产生新任务）"""
+        site_clause = 'AND site = ?' if site else ''
+        row = self._connection().execute(
+            f'SELECT 1 FROM tasks WHERE status IN (?, ?) {site_clause} LIMIT 1',
+            (PENDING, LEASED) + ((site,) if site else ())
+        ).fetchone()
+        return row is not None
+
+    # ---------- 主机限速 ----------
+
+    def set_host_interval(self, host, min_interval):
+        """设置主机的最小请求间隔（秒）"""
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO hosts (host, min_interval, next_allowed) VALUES (?, ?, 0) '
+                'ON CONFLICT(host) DO UPDATE SET min_interval = excluded.min_interval',
+                (host, min_interval)
+            )
+
+    def reserve_host_slot(self, host, default_interval=1.0):
+        """为下一次请求预约时间槽，返回需要等待的秒数
+
+        所有 worker 对同一主机的请求按 min_interval 串成一条时间线：
+        本次请求时间 = max(当前时间, next_allowed)，next_allowed 随之后移一个间隔。
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT min_interval, next_allowed FROM hosts WHERE host = ?', (host,)).fetchone()
+            if row is None:
+                conn.execute('INSERT INTO hosts (host, min_interval, next_allowed) VALUES (?, ?, ?)',
+                             (host, default_interval, now + default_interval))
+                return 0.0
+            interval, next_allowed = row['min_interval'], row['next_allowed']
+            slot = max(now, next_allowed)
+            conn.execute('UPDATE hosts SET next_allowed = ? WHERE host = ?', (slot + interval, host))
+        return slot - now
+
+    def delay_host(self, host, seconds):
+        """暂停对主机的请求（如收到429或503），所有 worker 生效"""
+        until = time.time() + seconds
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO hosts (host, min_interval, next_allowed) VALUES (?, 1.0, ?) '
+                'ON CONFLICT(host) DO UPDATE SET next_allowed = MAX(next_allowed, excluded.next_allowed)',
+                (host, until)
+            )
+
+    # ---------- worker 与统计 ----------
+
+    def register_worker(self, worker_id, site=None):
+        """登记 worker（重复登记会刷新启动时间）"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO workers (worker_id, hostname, pid, site, started_at, last_seen) '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(worker_id) DO UPDATE SET '
+                'hostname = excluded.hostname, pid = excluded.pid, site = excluded.site, '
+                'started_at = excluded.started_at, last_seen = excluded.last_seen',
+                (worker_id, socket.gethostname(), os.getpid(), site, now, now)
+            )
+
+    def stats(self):
+        """按 site、kind、status 统计任务数"""
+        rows = self._connection().execute(
+            'SELECT site, kind, status, COUNT(*) AS n FROM tasks GROUP BY site, kind, status ORDER BY site, kind'
+        ).fetchall()
+        stats = {}
+        for row in rows:
+            stats.setdefault((row['site'], row['kind']), {})[row['status']] = row['n']
+        return stats
+
+    def workers(self):
+        """返回已登记的 worker 列表"""
+        rows = self._connection().execute('SELECT * FROM workers ORDER BY last_seen DESC').fetchall()
+        return [dict(row) for row in rows]
+
+    def failed_tasks(self, site=None, limit=20):
+        """返回最近失败的任务"""
+        site_clause = 'AND site = ?' if site else ''
+        rows = self._connection().execute(
+            f'SELECT site, kind, url, attempts, last_error FROM tasks WHERE status = ? {site_clause} '
+            'ORDER BY updated_at DESC LIMIT ?',
+            (FAILED,) + ((site,) if site else ()) + (limit,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_results(self, site=None, kind=None):
+        """按任务顺序逐条返回结果"""
+        clauses, args = [], []
+        if site:
+            clauses.append('site = ?')
+            args.append(site)
+        if kind:
+            clauses.append('kind = ?')
+            args.append(kind)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        cursor = self._connection().execute(f'SELECT * FROM results {where} ORDER BY task_id', args)
+        for row in cursor:
+            result = dict(row)
+            result['data'] = json.loads(result['data']) if result['data'] else None
+            yield result
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""广州市人社局文章存储
+
+每个类型一个追加写入的存储 data/{type}/，使用 crawler_common.page_archive.RecordPack 的 pack 文件 + 索引格式：
+    articles.pack   每条记录 = 记录头 + 元数据 + 压缩后的文章JSON（接口返回的原始文章数据）
+    articles.idx    每行一条JSON索引：{"key": 文章id（没有id时为url）, "fetched_at": 抓取时间, "sha1": 内容摘要, ...}
+
+- 同一篇文章内容没有变化时不重复写入，原始数据只保存一份；判断时只读索引，不解压已保存的文章
+- 内容有变化时追加新版本，读取时以最新版本为准
+- 写入中断时，下次打开会补上缺少的索引、截掉 pack 文件末尾不完整的记录
+- compact 命令重写文件，只保留每篇文章的最新版本
+
+用法（在本目录运行）：
+    python article_store.py import [--remove]   # 导入旧版按页保存的JSON文件和旧版 articles.jsonl.gz
+    python article_store.py compact             # 清理已被覆盖的旧版本
+    python article_store.py stats
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.log_setup import setup_logging
+from crawler_common.page_archive import RecordPack
+
+logger = logging.getLogger('article_store')
+
+PACK_FILENAME = 'articles.pack'
+INDEX_FILENAME = 'articles.idx'
+# 旧版存储文件（每行一条记录的gzip JSONL），import 命令导入
+LEGACY_STORE_FILENAME = 'articles.jsonl.gz'
+
+
+def article_key(article):
+    """文章的去重键：优先使用id，没有id时使用url"""
+    key = article.get('id')
+    if key in (None, ''):
+        key = article.get('url', '')
+    return str(key)
+
+
+def article_digest(article):
+    """文章内容摘要，用于判断内容是否有变化"""
+    return hashlib.sha1(json.dumps(article, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ArticleStore(RecordPack):
+    """单个类型的文章存储，可在多个线程中共用"""
+
+    pack_filename = PACK_FILENAME
+    index_filename = INDEX_FILENAME
+    _instances = {}
+
+    def __init__(self, type_dir, codec=None):
+        super().__init__(type_dir, codec)
+        self.type_dir = type_dir
+
+    def marker(self):
+        """存储的位置标记（记录数和最后一条记录），追加记录或 compact 重写后都会变化"""
+        entries = self.entries()
+        if not entries:
+            return [0, '']
+        return [len(entries), f"{entries[-1]['offset']}:{entries[-1]['sha1']}"]
+
+    def iter_records(self, latest_only=False):
+        """按写入顺序逐条返回记录 {"key", "fetched_at", "article"}
+
+        Args:
+            latest_only: 只返回每篇文章的最新版本（按首次写入的顺序）
+        """
+        entries = list(self.latest().values()) if latest_only else None
+        for entry, data in self.iter_pages(entries):
+            yield {'key': entry['key'], 'fetched_at': entry['fetched_at'], 'article': json.loads(data)}
+
+    def load_latest(self):
+        """返回每篇文章的最新版本，按首次写入的顺序排列"""
+        return [record['article'] for record in self.iter_records(latest_only=True)]
+
+    def add_articles(self, articles, fetched_at=None):
+        """写入一批文章，只追加新文章和内容有变化的文章
+
+        Returns:
+            (新增数, 更新数)
+        """
+        fetched_at = fetched_at or datetime.now().isoformat(timespec='seconds')
+        added = updated = 0
+        with self._lock:
+            self._load()
+            for article in articles:
+                key = article_key(article)
+                digest = article_digest(article)
+                previous = self._latest.get(key)
+                if previous is not None and previous['sha1'] == digest:
+                    continue
+                if previous is None:
+                    added += 1
+                else:
+                    updated += 1
+                record_meta = {'key': key, 'fetched_at': fetched_at, 'sha1': digest, 'codec': self.codec}
+                data = json.dumps(article, ensure_ascii=False).encode('utf-8')
+                self._append_record(record_meta, self._encode_record(record_meta, data))
+        return added, updated
+
+    def compact(self):
+        """重写存储文件，只保留每篇文章的最新版本，返回保留的文章数"""
+        kept, _ = self._compact_latest()
+        return kept
+
+    def stats(self):
+        """返回记录数、文章数和文件大小"""
+        entries = self.entries()
+        size = sum(os.path.getsize(p) for p in (self.pack_path, self.index_path) if os.path.exists(p))
+        return {'records': len(entries), 'articles': len(self.latest()), 'bytes': size}
+
+
+def iter_legacy_store(type_dir):
+    """读取旧版 articles.jsonl.gz 中的记录；文件末尾不完整或有损坏的部分时在该处停止"""
+    path = os.path.join(type_dir, LEGACY_STORE_FILENAME)
+    if not os.path.exists(path):
+        return
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    except (EOFError, OSError, ValueError) as e:
+        logger.warning(f'旧版存储文件 {path} 读取到损坏的部分，之后的记录未导入: {e}')
+
+
+def legacy_json_files(type_dir):
+    """旧版按页保存的JSON文件，按修改时间从旧到新排列"""
+    if not os.path.exists(type_dir):
+        return []
+    files = [os.path.join(type_dir, f) for f in os.listdir(type_dir) if f.endswith('.json')]
+    return sorted(files, key=lambda p: (os.path.getmtime(p), p))
+
+
+def import_legacy_store(type_dir, remove=False):
+    """把旧版 articles.jsonl.gz 导入存储，导入后删除或改名为 articles.jsonl.gz.imported（避免重复导入旧版本）
+
+    Returns:
+        (新增数, 更新数)
+    """
+    path = os.path.join(type_dir, LEGACY_STORE_FILENAME)
+    if not os.path.exists(path):
+        return 0, 0
+    store = ArticleStore.for_dir(type_dir)
+    added = updated = 0
+    batch, batch_time = [], None
+
+    def flush():
+        nonlocal added, updated
+        a, u = store.add_articles(batch, fetched_at=batch_time)
+        added += a
+        updated += u
+
+    # 同一次抓取（fetched_at 相同）的记录一起写入
+    for record in iter_legacy_store(type_dir):
+        if batch and record.get('fetched_at') != batch_time:
+            flush()
+            batch = []
+        batch_time = record.get('fetched_at')
+        batch.append(record['article'])
+    if batch:
+        flush()
+    if remove:
+        os.remove(path)
+    else:
+        os.replace(path, path + '.imported')
+    logger.info(f'已导入旧版存储文件 {path}：新增 {added} 篇，更新 {updated} 篇')
+    return added, updated
+
+
+def import_legacy_files(type_dir, remove=False):
+    """把旧版 articles.jsonl.gz 和按页保存的JSON文件导入存储（按时间顺序，新文件中的版本覆盖旧版本）"""
+    store = ArticleStore.for_dir(type_dir)
+    added, updated = import_legacy_store(type_dir, remove=remove)
+    files = legacy_json_files(type_dir)
+    for file_path in files:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f'读取文件 {file_path} 时出错: {e}')
+            continue
+        fetched_at = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(timespec='seconds')
+        a, u = store.add_articles(data.get('articles') or [], fetched_at=fetched_at)
+        added += a
+        updated += u
+        if remove:
+            os.remove(file_path)
+    return len(files), added, updated
+
+
+def main():
+    from config import CRAWLER_CONFIG, CRAWLER_TYPES
+
+    parser = argparse.ArgumentParser(description='管理广州市人社局文章存储')
+    parser.add_argument('command', choices=['import', 'compact', 'stats'])
+    parser.add_argument('--types', nargs='+', default=list(CRAWLER_TYPES), help='要处理的类型')
+    parser.add_argument('--remove', action='store_true', help='导入后删除旧版JSON文件和旧版 articles.jsonl.gz')
+    args = parser.parse_args()
+
+    setup_logging(level=CRAWLER_CONFIG['log']['level'], fmt=CRAWLER_CONFIG['log']['format'])
+    for type_id in args.types:
+        type_dir = os.path.join(CRAWLER_CONFIG['data_dir'], type_id)
+        store = ArticleStore.for_dir(type_dir)
+        if args.command == 'import':
+            files, added, updated = import_legacy_files(type_dir, remove=args.remove)
+            logger.info(f'类型 {type_id}: 导入 {files} 个JSON文件，新增 {added} 篇，更新 {updated} 篇')
+        elif args.command == 'compact':
+            before = store.stats()
+            kept = store.compact()
+            after = store.stats()
+            logger.info(f'类型 {type_id}: 保留 {kept} 篇文章，记录 {before["records"]} -> {after["records"]}，'
+                        f'文件 {before["bytes"]} -> {after["bytes"]} 字节')
+        else:
+            stats = store.stats()
+            logger.info(f'类型 {type_id}: {stats["articles"]} 篇文章，{stats["records"]} 条记录，{stats["bytes"]} 字节')
+
+
+if __name__ == '__main__':
+    main()
@@ -67,19 +67,33 @@ CRAWLER_CONFIG = {
         'default_start_page': 1,
         # 爬取多页时的默认结束页码 (当auto_crawl_all为True时，此参数无效)
         'default_end_page': 5,
-        # 爬取间隔时间(秒)
+        # 请求失败后重试前的等待基数(秒)，实际等待 delay×2 秒；请求间隔由 host_interval 控制
         'delay': 1,
         # 最大重试次数
-        'max_retries': 3
+        'max_retries': 3,
+        # 请求超时时间(秒)
+        'timeout': 30,
+        # 并发请求数（自动爬取所有页面时，先由第一页确定总页数，再并发获取其余页；设为1表示逐页爬取）
+        'max_workers': 4,
+        # 同一主机两次请求的最小间隔（秒），逐页和并发爬取、所有线程、所有类型共用
+        'host_interval': 1.0
+    },
+    # HTML解析后端：默认 'html.parser'；安装 lxml 或 selectolax 后可改为 'lxml' 或 'selectolax'
+    # （切换前先用 python -m crawler_common.parser_bench 在保存的页面上核对结果；未安装时退回 html.parser）
+    'html_parser': 'html.parser',
+    # 指标配置
+    'metrics': {
+        # 本地 /metrics 接口端口（None表示不启动）
+        'port': None,
+        # 每次运行结束时写出的JSON汇总目录
+        'summary_dir': os.path.join(PROJECT_ROOT, 'metrics')
     }
 }
 
 # 动态生成基础URL
 CRAWLER_CONFIG['base_url'] = CRAWLER_CONFIG['base_url_template'].format(CRAWLER_CONFIG['current_type'])
 
-# 确保目录存在
-os.makedirs(CRAWLER_CONFIG['data_dir'], exist_ok=True)
-os.makedirs(CRAWLER_CONFIG['log']['dir'], exist_ok=True)
+# 注意：导入配置时不创建任何目录；数据目录由爬虫初始化时创建，日志目录由 setup_logging 创建
 
 if __name__ == '__main__':
     # 打印配置信息
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""详情页一次抓取、同时输出两种格式
+
+gz_rsj_data.xlsx 中每个'链接'只下载、解析一次，同时写出：
+- parsed_content/parsed_content.json 和 parsed_content.xlsx（url_content_parser.py 的平铺格式）
+- parsed_content_formatted.xlsx（advanced_content_parser.py 的每5段一行格式）
+
+所有工作表的URL共用一个带连接池的会话，在同一个线程池中并发下载（并发数为 crawl.max_workers）。
+
+用法（在本目录运行）：
+    python detail_pipeline.py
+"""
+import os
+import sys
+import logging
+from config import CRAWLER_CONFIG
+from url_content_parser import URLContentParser, read_excel_urls
+from advanced_content_parser import AdvancedContentParser
+
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.metrics import start_metrics_server, write_run_summary
+from crawler_common.log_setup import setup_logging
+
+logger = logging.getLogger('detail_pipeline')
+
+
+def run_pipeline(excel_path, output_dir=None, formatted_file=None):
+    """下载、解析 excel_path 中的所有URL并写出两种格式的结果
+
+    Returns:
+        (平铺格式的记录列表, 分段格式的输出文件路径)
+    """
+    flat_parser = URLContentParser(excel_path, output_dir=output_dir)
+    # 分段输出只负责写表格，与平铺输出共用同一个会话
+    formatted_parser = AdvancedContentParser(excel_path, output_file=formatted_file, session=flat_parser.session)
+
+    sheets = read_excel_urls(excel_path)
+    sheet_results = flat_parser.fetch_sheets(sheets)
+
+    all_results = flat_parser.collect_results(sheet_results)
+    flat_parser.save_results(all_results)
+    for sheet_name, items in sheet_results.items():
+        formatted_parser.write_worksheet(sheet_name, items)
+    return all_results, formatted_parser.save()
+
+
+def main():
+    # 配置日志（日志由后台线程写出）
+    setup_logging(os.path.join(CRAWLER_CONFIG['log']['dir'], 'detail_pipeline.log'),
+                  level=CRAWLER_CONFIG['log']['level'], fmt=CRAWLER_CONFIG['log']['format'])
+
+    # 启动本地指标接口（可选）
+    if CRAWLER_CONFIG['metrics']['port']:
+        start_metrics_server(CRAWLER_CONFIG['metrics']['port'])
+
+    excel_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gz_rsj_data.xlsx')
+    all_results, formatted_file = run_pipeline(excel_path)
+
+    summary_file = write_run_summary(CRAWLER_CONFIG['metrics']['summary_dir'], 'detail_pipeline')
+    logger.info(f'指标汇总已保存至: {summary_file}')
+    logger.info(f'详情页解析任务执行完毕，共解析 {len(all_results)} 个页面，分段结果已保存至: {formatted_file}')
+
+
+if __name__ == '__main__':
+    main()
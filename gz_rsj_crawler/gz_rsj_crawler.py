@@ -1,25 +1,48 @@
 #!/usr/bin/env python3
 import requests
-import json
 import os
+import sys
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import logging
+from requests.adapters import HTTPAdapter
 from config import CRAWLER_CONFIG, CRAWLER_TYPES
+from article_store import ArticleStore, import_legacy_store
+
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.metrics import observe_request, count_item, start_metrics_server, write_run_summary
+from crawler_common.log_setup import setup_logging
+from crawler_common.rate_limit import HostRateLimiter
 
-# 配置日志
-logging.basicConfig(
-    level=getattr(logging, CRAWLER_CONFIG['log']['level']),
-    format=CRAWLER_CONFIG['log']['format'],
-    handlers=[
-        logging.FileHandler(os.path.join(CRAWLER_CONFIG['log']['dir'], 'gz_rsj_crawler.log')),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger('gz_rsj_crawler')
 
+
+class PageFetchError(Exception):
+    """重试用尽后仍无法获取某一页（区别于没有数据的空页）"""
+
+def create_session(pool_size=10):
+    """创建带连接池的会话，所有类型、所有页共用同一组长连接"""
+    session = requests.Session()
+    session.headers.update(CRAWLER_CONFIG['headers'])
+    session.cookies.update(CRAWLER_CONFIG['cookies'])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
 class GZRSSCrawler:
-    def __init__(self, crawler_type=None):
+    def __init__(self, crawler_type=None, session=None, rate_limiter=None):
+        """
+        Args:
+            crawler_type: 爬取类型（505、506 或 507），默认使用配置中的类型
+            session: 共用的会话，并发爬取多个类型时传入同一个会话
+            rate_limiter: 与其他线程共用的按主机限速器（crawler_common.rate_limit.HostRateLimiter），
+                          设置后每次请求前等待该主机的下一个可用时间点
+        """
         # 如果未指定类型，使用配置文件中的默认类型
         self.crawler_type = crawler_type or CRAWLER_CONFIG['current_type']
         # 动态生成基础URL
@@ -33,10 +56,23 @@ class GZRSSCrawler:
         self.auto_crawl_all = CRAWLER_CONFIG['crawl']['auto_crawl_all']
         self.delay = CRAWLER_CONFIG['crawl']['delay']
         self.max_retries = CRAWLER_CONFIG['crawl']['max_retries']
+        self.timeout = CRAWLER_CONFIG['crawl']['timeout']
+        self.max_workers = CRAWLER_CONFIG['crawl']['max_workers']
         self.params = CRAWLER_CONFIG['params']
+        # 复用长连接；并发爬取多个类型时传入同一个会话
+        self.session = session or create_session(self.max_workers)
+        self.rate_limiter = rate_limiter
 
-        # 确保数据目录存在
+        self.store = self.open_store()
+
+    def open_store(self):
+        """打开当前类型的文章存储（data/{type}/articles.pack + articles.idx，按文章id去重）
+
+        目录中还有旧版 articles.jsonl.gz 时先导入，避免之后再导入时旧版本覆盖新抓取的文章
+        """
         os.makedirs(self.data_dir, exist_ok=True)
+        import_legacy_store(self.data_dir)
+        return ArticleStore.for_dir(self.data_dir)
 
     def set_crawler_type(self, crawler_type):
         """设置爬虫类型"""
@@ -47,7 +83,7 @@ class GZRSSCrawler:
         self.crawler_type = crawler_type
         self.base_url = CRAWLER_CONFIG['base_url_template'].format(self.crawler_type)
         self.data_dir = os.path.join(CRAWLER_CONFIG['data_dir'], self.crawler_type)
-        os.makedirs(self.data_dir, exist_ok=True)
+        self.store = self.open_store()
         logger.info(f'已切换爬虫类型至: {crawler_type} ({CRAWLER_TYPES[crawler_type]})')
         return True
 
@@ -62,32 +98,34 @@ class GZRSSCrawler:
         while retries <= self.max_retries:
             try:
                 logger.info(f'开始爬取第 {page_num} 页数据 (类型: {self.crawler_type} - {CRAWLER_TYPES[self.crawler_type]})')
-                response = requests.get(
-                    self.base_url,
-                    headers=self.headers,
-                    cookies=self.cookies,
-                    params=params
-                )
+                # 共用限速器时由限速器控制同一主机的请求间隔
+                if self.rate_limiter is not None:
+                    self.rate_limiter.wait(self.base_url)
+                request_start = time.perf_counter()
+                try:
+                    response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                except Exception:
+                    observe_request('gz_list', self.base_url, 'error', time.perf_counter() - request_start)
+                    raise
+                observe_request('gz_list', self.base_url, response.status_code,
+                                time.perf_counter() - request_start, len(response.content))
 
                 if response.status_code == 200:
                     try:
                         data = response.json()
-                        # 检查数据是否为空
+                        # 检查数据是否为空（返回空列表，与获取失败时返回的None区分）
                         if not data or ('articles' not in data) or (not data['articles']):
                             logger.warning(f'第 {page_num} 页没有数据')
-                            return None
-
-                        # 保存数据
-                        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                        filename = f'gz_rsj_{self.crawler_type}_page_{page_num}_{timestamp}.json'
-                        filepath = os.path.join(self.data_dir, filename)
+                            return {'articles': []}
 
-                        with open(filepath, 'w', encoding='utf-8') as f:
-                            json.dump(data, f, ensure_ascii=False, indent=2)
+                        # 保存数据（已保存且内容未变化的文章不重复写入）
+                        added, updated = self.store.add_articles(data['articles'])
 
-                        logger.info(f'成功爬取第 {page_num} 页数据，共 {len(data["articles"])} 条记录，已保存至: {filepath}')
+                        count_item('gz_list', 'articles', len(data['articles']))
+                        logger.info(f'成功爬取第 {page_num} 页数据，共 {len(data["articles"])} 条记录'
+                                    f'（新增 {added}，更新 {updated}），已保存至: {self.store.pack_path}')
                         return data
-                    except json.JSONDecodeError as e:
+                    except ValueError as e:
                         logger.error(f'第 {page_num} 页数据解析失败: {str(e)}')
                         return None
                 elif response.status_code == 404:
@@ -113,21 +151,33 @@ class GZRSSCrawler:
                     logger.error(f'超过最大重试次数，无法爬取第 {page_num} 页')
                     return None
 
+    def ensure_rate_limiter(self, interval=None):
+        """未设置限速器时按 interval（默认 crawl.host_interval）创建；逐页爬取和并发爬取都只由限速器控制请求间隔"""
+        if self.rate_limiter is None:
+            self.rate_limiter = HostRateLimiter(interval or CRAWLER_CONFIG['crawl']['host_interval'])
+        return self.rate_limiter
+
     def crawl_multiple_pages(self, start_page=None, end_page=None, delay=None):
-        """爬取多个页码的数据"""
+        """爬取多个页码的数据
+
+        Args:
+            delay: 同一主机两次请求的最小间隔（秒），默认 crawl.host_interval（已设置限速器时不生效）
+        """
         # 使用默认参数
         start_page = start_page or self.default_start_page
         end_page = end_page or self.default_end_page
-        delay = delay or self.delay
+        self.ensure_rate_limiter(delay)
 
         # 如果启用自动爬取所有页面，则忽略end_page
-        if self.auto_crawl_all:
+        if self.auto_crawl_all and self.max_workers > 1:
+            return self.crawl_all_pages(start_page)
+        elif self.auto_crawl_all:
             logger.info(f'开始自动爬取所有页面 (类型: {self.crawler_type} - {CRAWLER_TYPES[self.crawler_type]})')
             page_num = start_page
             while True:
                 data = self.crawl_page(page_num)
                 if not data:
-                    logger.info('没有更多数据，停止爬取')
+                    logger.error(f'第 {page_num} 页获取失败，停止爬取')
                     break
                 elif 'no_more_data' in data and data['no_more_data']:
                     logger.info(f'检测到404错误，当前类型 {self.crawler_type} 没有更多数据')
@@ -136,7 +186,6 @@ class GZRSSCrawler:
                     logger.info('没有更多数据，停止爬取')
                     break
                 page_num += 1
-                time.sleep(delay)
             logger.info(f'完成自动爬取所有页面，共爬取 {page_num - start_page} 页')
             return True
         else:
@@ -146,18 +195,132 @@ class GZRSSCrawler:
                 if data and 'no_more_data' in data and data['no_more_data']:
                     logger.info(f'检测到404错误，当前类型 {self.crawler_type} 没有更多数据')
                     return False  # 返回False表示遇到404，需要切换类型
-                # 添加延时，避免请求过快
-                if page_num < end_page:
-                    time.sleep(delay)
             logger.info(f'完成爬取第 {start_page} 至 {end_page} 页数据')
             return True
 
+    def find_last_page(self):
+        """确定当前类型的最后一页页码
+
+        优先使用第一页响应中的 total 计算总页数；响应中没有 total 时，按 2、4、8… 指数探测到第一个空页，
+        再在最后一个有数据的页和第一个空页之间二分查找。
+
+        Returns:
+            (最后一页页码, {页码: 数据})：第二项为探测过程中已获取并保存的页，之后不必重复请求；
+            第一页就没有数据时返回 (0, {})，遇到404时返回 (None, {})
+
+        Raises:
+            PageFetchError: 某一页重试用尽后仍获取失败。失败的页不能当作空页，否则会把最后一页判断得过小
+        """
+        fetched = {}
+
+        def fetch(page_num):
+            data = self.crawl_page(page_num)
+            if data is None:
+                raise PageFetchError(f'类型 {self.crawler_type} 第 {page_num} 页获取失败，无法确定最后一页')
+            return data
+
+        def has_data(page_num):
+            data = fetch(page_num)
+            if data.get('articles'):
+                fetched[page_num] = data
+                return True
+            return False
+
+        first = fetch(1)
+        if first.get('no_more_data'):
+            return None, fetched
+        if not first.get('articles'):
+            return 0, fetched
+        fetched[1] = first
+
+        total = first.get('total')
+        if total:
+            page_size = len(first['articles'])
+            last_page = max(1, -(-int(total) // page_size))
+            logger.info(f'类型 {self.crawler_type} 共 {total} 条记录，每页 {page_size} 条，共 {last_page} 页')
+            return last_page, fetched
+
+        # 指数探测：good 为已知有数据的页，empty 为已知的空页
+        good, probe = 1, 2
+        while has_data(probe):
+            good, probe = probe, probe * 2
+        empty = probe
+        # 二分查找最后一个有数据的页
+        while empty - good > 1:
+            middle = (good + empty) // 2
+            if has_data(middle):
+                good = middle
+            else:
+                empty = middle
+        logger.info(f'类型 {self.crawler_type} 探测到最后一页为第 {good} 页')
+        return good, fetched
+
+    def discover(self):
+        """find_last_page()，获取失败时记录错误并返回 (0, 已获取的页)，不爬取该类型的其余页"""
+        try:
+            return self.find_last_page()
+        except PageFetchError as e:
+            logger.error(f'{e}，跳过类型 {self.crawler_type} 的其余页')
+            return 0, {}
+
+    def crawl_all_pages(self, start_page=None):
+        """确定总页数后并发爬取当前类型从 start_page 开始的其余页"""
+        start_page = start_page or self.default_start_page
+        # 由限速器控制同一主机的请求间隔，代替逐页的固定等待
+        self.ensure_rate_limiter()
+        logger.info(f'开始并发爬取第 {start_page} 页起的所有页面 (类型: {self.crawler_type} - {CRAWLER_TYPES[self.crawler_type]})')
+        last_page, fetched = self.discover()
+        if last_page is None:
+            logger.info(f'检测到404错误，当前类型 {self.crawler_type} 没有更多数据')
+            return False
+        pages = [p for p in range(start_page, last_page + 1) if p not in fetched]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self.crawl_page, pages))
+        failed = [p for p, data in zip(pages, results) if not data or not data.get('articles')]
+        if failed:
+            logger.warning(f'类型 {self.crawler_type} 有 {len(failed)} 页爬取失败或没有数据: {failed}')
+        logger.info(f'完成并发爬取所有页面，共 {last_page} 页')
+        return True
+
+    def crawl_all_types_concurrently(self, types_to_crawl, start_page=None):
+        """并发爬取多个类型：先并发获取各类型第一页确定总页数，再把所有类型从 start_page 开始的其余页放入同一个线程池
+
+        所有类型共用同一个会话和按主机限速器，同一主机的请求间隔不小于 host_interval
+        """
+        start_page = start_page or self.default_start_page
+        self.ensure_rate_limiter()
+        crawlers = [GZRSSCrawler(crawler_type, session=self.session, rate_limiter=self.rate_limiter)
+                    for crawler_type in types_to_crawl]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            discovered = list(executor.map(lambda crawler: crawler.discover(), crawlers))
+
+            jobs = []
+            for crawler, (last_page, fetched) in zip(crawlers, discovered):
+                if last_page is None:
+                    logger.info(f'当前类型 {crawler.crawler_type} 爬取遇到404，跳过')
+                    continue
+                for page_num in range(start_page, last_page + 1):
+                    if page_num not in fetched:
+                        jobs.append((crawler, page_num, executor.submit(crawler.crawl_page, page_num)))
+
+            failed = [(crawler.crawler_type, page_num) for crawler, page_num, future in jobs
+                      if not (future.result() or {}).get('articles')]
+        if failed:
+            logger.warning(f'有 {len(failed)} 页爬取失败或没有数据: {failed}')
+        total_pages = sum(last_page or 0 for last_page, _ in discovered)
+        logger.info(f'完成并发爬取所有类型，共 {total_pages} 页')
+
     def crawl_all_types(self):
         """爬取所有类型的数据"""
         logger.info('开始爬取所有类型的数据')
         current_type_index = list(CRAWLER_TYPES.keys()).index(self.crawler_type)
         types_to_crawl = list(CRAWLER_TYPES.keys())[current_type_index:]
         
+        if self.auto_crawl_all and self.max_workers > 1:
+            self.crawl_all_types_concurrently(types_to_crawl)
+            logger.info('完成爬取所有类型的数据')
+            return
+        
         for crawler_type in types_to_crawl:
             self.set_crawler_type(crawler_type)
             result = self.crawl_multiple_pages()
@@ -167,6 +330,14 @@ class GZRSSCrawler:
         logger.info('完成爬取所有类型的数据')
 
 if __name__ == '__main__':
+    # 配置日志（日志由后台线程写出）
+    setup_logging(os.path.join(CRAWLER_CONFIG['log']['dir'], 'gz_rsj_crawler.log'),
+                  level=CRAWLER_CONFIG['log']['level'], fmt=CRAWLER_CONFIG['log']['format'])
+
+    # 启动本地指标接口（可选）
+    if CRAWLER_CONFIG['metrics']['port']:
+        start_metrics_server(CRAWLER_CONFIG['metrics']['port'])
+
     # 创建爬虫实例
     crawler = GZRSSCrawler()
 
@@ -179,4 +350,6 @@ if __name__ == '__main__':
     # 如果需要爬取所有类型的数据，可以使用以下方法
     # crawler.crawl_all_types()
 
+    summary_file = write_run_summary(CRAWLER_CONFIG['metrics']['summary_dir'], 'gz_rsj_crawler')
+    logger.info(f'指标汇总已保存至: {summary_file}')
     logger.info('爬虫任务执行完毕')
\ No newline at end of file
@@ -1,10 +1,22 @@
 #!/usr/bin/env python3
-"""将JSON数据导入到Excel表格的脚本"""
-import os
+"""将文章存储（data/{type}/articles.pack）中的数据导入到Excel表格的脚本
+
+- 按存储索引只读取每篇文章的最新版本，读取时只保留表格需要的6个字段
+- 每次都以只写模式流式重建表格（openpyxl 打开已有表格再保存的耗时和内存随表格大小增长，比重建更慢）：
+  按类型逐条读取记录直接写入工作表，内存中只保留每篇文章的字段摘要，不保留全部行数据
+- 状态文件 gz_rsj_data.xlsx.state.json 记录每个类型存储的位置标记（记录数和最后一条记录）和每篇文章的字段摘要：
+  存储文件没有新记录时不读取存储；新记录没有改变导出的字段时不替换表格
+
+用法（在本目录运行）：
+    python json_to_excel.py          # 有变化时重建表格
+    python json_to_excel.py --full   # 忽略状态文件，总是重建表格
+"""
+import argparse
+import hashlib
 import json
-import pandas as pd
+import os
 from datetime import datetime
-from openpyxl import load_workbook
+from article_store import ArticleStore, LEGACY_STORE_FILENAME, legacy_json_files
 
 # 项目根目录
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -20,90 +32,167 @@ CRAWLER_TYPES = {
     '507': '解读文件'
 }
 
+# 导出的字段及对应的中文列名
+COLUMN_MAPPING = {
+    'title': '标题',
+    'document_number': '文号',
+    'publisher': '发布单位',
+    'classify_main_name': '分类',
+    'url': '链接',
+    'created_at': '创建时间'
+}
+
+STATE_VERSION = 2
+
+
+def state_path(excel_path):
+    """增量更新状态文件路径"""
+    return excel_path + '.state.json'
 
-def load_json_files(type_id):
-    """加载指定类型的所有JSON文件"""
+
+def sheet_name_for(type_id):
+    """工作表名称（限制为31个字符）"""
+    return f"{type_id}_{CRAWLER_TYPES[type_id][:5]}"
+
+
+def project_article(article):
+    """只取表格需要的字段，返回 (行数据, 行摘要)"""
+    row = [article.get(field) for field in COLUMN_MAPPING]
+    row = ['' if value is None else value for value in row]
+    digest = hashlib.sha1(json.dumps(row, ensure_ascii=False).encode('utf-8')).hexdigest()
+    return row, digest
+
+
+def open_store(type_id):
+    """返回指定类型的文章存储，存储文件不存在时返回None"""
     type_dir = os.path.join(DATA_DIR, type_id)
     if not os.path.exists(type_dir):
         print(f"类型 {type_id} 的目录不存在: {type_dir}")
-        return []
-
-    json_files = [f for f in os.listdir(type_dir) if f.endswith('.json')]
-    all_data = []
-
-    for file_name in json_files:
-        file_path = os.path.join(type_dir, file_name)
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # 提取articles数据
-                if 'articles' in data and isinstance(data['articles'], list):
-                    all_data.extend(data['articles'])
-                    print(f"成功加载文件: {file_name}，读取到 {len(data['articles'])} 条记录")
-                else:
-                    print(f"文件 {file_name} 格式不正确，缺少articles字段")
-        except Exception as e:
-            print(f"读取文件 {file_name} 时出错: {str(e)}")
-
-    return all_data
-
-
-def json_to_excel():
-    """将所有类型的JSON数据导入到Excel表格"""
-    # 创建一个ExcelWriter对象
-    writer = pd.ExcelWriter(OUTPUT_EXCEL, engine='openpyxl')
-
-    for type_id, type_name in CRAWLER_TYPES.items():
-        print(f"\n处理类型: {type_id} ({type_name})...")
-        # 加载JSON数据
-        data = load_json_files(type_id)
-        if not data:
+        return None
+
+    if not ArticleStore.exists(type_dir):
+        if legacy_json_files(type_dir) or os.path.exists(os.path.join(type_dir, LEGACY_STORE_FILENAME)):
+            print(f"类型 {type_id} 只有旧版的JSON文件或 {LEGACY_STORE_FILENAME}，请先运行: python article_store.py import")
+        return None
+    return ArticleStore.for_dir(type_dir)
+
+
+def iter_rows(store):
+    """逐条读取存储记录并投影为表格行，返回 (去重键, 行数据, 行摘要)"""
+    for record in store.iter_records(latest_only=True):
+        row, digest = project_article(record['article'])
+        yield record['key'], row, digest
+
+
+def load_state(excel_path):
+    """读取状态文件，表格或状态文件不存在、版本不匹配时返回None"""
+    path = state_path(excel_path)
+    if not (os.path.exists(excel_path) and os.path.exists(path)):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def save_state(excel_path, state):
+    path = state_path(excel_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def write_excel(stores, excel_path, state=None):
+    """按类型逐个把存储中的最新记录流式写入只写表格，同时计算每篇文章的字段摘要
+
+    内存中只保留 {去重键: 行摘要}，不保留行数据。先写入临时文件，与状态文件相比有新增、更新或删除的行时
+    才替换原表格（state 为None时总是替换）。
+
+    Returns:
+        ({类型: {去重键: 行摘要}}, 是否替换了表格)
+    """
+    from openpyxl import Workbook
+
+    previous_types = state['types'] if state is not None else {}
+    workbook = Workbook(write_only=True)
+    digests = {}
+    changed = state is None
+    for type_id, store in stores.items():
+        previous = previous_types.get(type_id, {}).get('rows', {})
+        sheet = None
+        rows = {}
+        added = updated = 0
+        for key, row, digest in iter_rows(store):
+            if sheet is None:
+                sheet = workbook.create_sheet(sheet_name_for(type_id))
+                sheet.append(list(COLUMN_MAPPING.values()))
+            sheet.append(row)
+            rows[key] = digest
+            if key not in previous:
+                added += 1
+            elif previous[key] != digest:
+                updated += 1
+        if not rows:
             print(f"类型 {type_id} 没有数据")
             continue
+        digests[type_id] = rows
+        if state is not None:
+            print(f"类型 {type_id}: 新增 {added} 篇，更新 {updated} 篇")
+            changed = changed or added or updated or len(previous) != len(rows)
+        print(f"已将类型 {type_id} 的 {len(rows)} 篇文章写入Excel工作表: {sheet_name_for(type_id)}")
+    changed = changed or set(previous_types) != set(digests)
+    if not digests:
+        return digests, False
+
+    # 只写工作簿的行先写入临时XML文件，保存时才打包；没有变化时丢弃临时表格
+    tmp_path = excel_path + '.tmp.xlsx'
+    workbook.save(tmp_path)
+    if changed:
+        os.replace(tmp_path, excel_path)
+    else:
+        os.remove(tmp_path)
+    return digests, bool(changed)
+
 
-        # 转换为DataFrame
-        df = pd.DataFrame(data)
-        
-        # 只保留指定的字段
-        specified_columns = ['title', 'document_number', 'publisher', 'classify_main_name', 'url', 'created_at']
-        # 检查存在的列
-        existing_columns = [col for col in specified_columns if col in df.columns]
-        missing_columns = [col for col in specified_columns if col not in df.columns]
-        
-        if missing_columns:
-            print(f"类型 {type_id} 缺少以下字段: {', '.join(missing_columns)}")
-        
-        # 筛选列
-        df = df[existing_columns]
-        print(f"类型 {type_id} 共有 {len(df)} 条记录，已筛选保留 {len(existing_columns)} 个字段")
-        
-        # 将字段名翻译为中文
-        column_mapping = {
-            'title': '标题',
-            'document_number': '文号',
-            'publisher': '发布单位',
-            'classify_main_name': '分类',
-            'url': '链接',
-            'created_at': '创建时间'
-        }
-        # 只映射存在的列
-        existing_column_mapping = {k: v for k, v in column_mapping.items() if k in df.columns}
-        df = df.rename(columns=existing_column_mapping)
-        print(f"已将字段名翻译为中文: {list(existing_column_mapping.values())}")
-
-        # 将DataFrame写入Excel工作表
-        sheet_name = f"{type_id}_{type_name[:5]}"  # 工作表名称限制为31个字符
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-        print(f"已将类型 {type_id} 的数据写入Excel工作表: {sheet_name}")
-
-    # 保存Excel文件
-    writer.close()
-    print(f"\n所有数据已成功导入到Excel文件: {OUTPUT_EXCEL}")
+def json_to_excel(excel_path=OUTPUT_EXCEL, full=False):
+    """将所有类型的文章数据导入到Excel表格；存储没有变化或导出的字段没有变化时不替换表格"""
+    stores = {}
+    for type_id in CRAWLER_TYPES:
+        store = open_store(type_id)
+        if store is not None:
+            stores[type_id] = store
+
+    state = None if full else load_state(excel_path)
+    markers = {type_id: store.marker() for type_id, store in stores.items()}
+    if state is not None and {t: s['marker'] for t, s in state['types'].items()} == markers:
+        print("存储文件没有新记录，表格无需更新")
+        return
+
+    print("流式重建Excel表格...")
+    digests, changed = write_excel(stores, excel_path, state)
+    if not digests:
+        print("没有可导出的数据")
+        return
+    if not changed:
+        print("导出的字段没有变化，表格无需更新")
+    save_state(excel_path, {
+        'version': STATE_VERSION,
+        'types': {type_id: {'marker': markers[type_id], 'rows': rows} for type_id, rows in digests.items()}
+    })
+    if changed:
+        print(f"\n所有数据已成功导入到Excel文件: {excel_path}")
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='将文章存储中的数据导入到Excel表格')
+    parser.add_argument('--full', action='store_true', help='忽略状态文件，总是重建表格')
+    args = parser.parse_args()
+
     print("开始将JSON数据导入到Excel表格...")
     start_time = datetime.now()
-    json_to_excel()
+    json_to_excel(full=args.full)
     end_time = datetime.now()
-    print(f"导入完成，耗时: {end_time - start_time}")
\ No newline at end of file
+    print(f"导入完成，耗时: {end_time - start_time}")
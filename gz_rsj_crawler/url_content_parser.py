@@ -1,170 +1,272 @@
 #!/usr/bin/env python3
 """解析Excel表格中URL内容的爬虫"""
-import requests
-import pandas as pd
 import os
+import sys
 import json
 import time
 import logging
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from config import CRAWLER_CONFIG
+from gz_rsj_crawler import create_session
+
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.metrics import (observe_request, parse_timer, set_queue_depth, count_item,
+                                    start_metrics_server, write_run_summary)
+from crawler_common.log_setup import setup_logging, ProgressLogger
+from crawler_common.html_backend import make_soup
+from crawler_common.rate_limit import HostRateLimiter
 
-# 配置日志
-logging.basicConfig(
-    level=getattr(logging, CRAWLER_CONFIG['log']['level']),
-    format=CRAWLER_CONFIG['log']['format'],
-    handlers=[
-        logging.FileHandler(os.path.join(CRAWLER_CONFIG['log']['dir'], 'url_content_parser.log')),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger('url_content_parser')
 
+# 详情页只解析正文容器，导航、页脚、侧栏不进入解析树
+DETAIL_SCOPE = ('div.content',)
 
-class URLContentParser:
-    def __init__(self, excel_path, output_dir=None):
-        self.excel_path = excel_path
-        self.output_dir = output_dir or os.path.join(os.path.dirname(excel_path), 'parsed_content')
+
+def read_excel_urls(excel_path):
+    """读取Excel文件中每个工作表'链接'列的URL，返回 {工作表名: [URL]}"""
+    import pandas as pd
+
+    logger.info(f'开始从Excel文件读取URL: {excel_path}')
+    sheets = {}
+    for sheet_name, df in pd.read_excel(excel_path, sheet_name=None).items():
+        if '链接' in df.columns:
+            sheets[sheet_name] = df['链接'].dropna().tolist()
+            logger.info(f'工作表 {sheet_name} 中找到 {len(sheets[sheet_name])} 个URL')
+        else:
+            logger.warning(f'工作表 {sheet_name} 中未找到"链接"列')
+    return sheets
+
+
+def flat_result(detail):
+    """详情页解析结果转换为 parsed_content.json/xlsx 的格式"""
+    return {
+        'url': detail['url'],
+        'title': detail['title'],
+        'date_info': detail['date_info'],
+        'content': detail['content'],
+        'attachments': json.dumps(detail['attachments'], ensure_ascii=False)  # 将附件列表转换为JSON字符串
+    }
+
+
+class DetailPageClient:
+    """详情页下载和解析：共用带连接池的会话，每个页面只下载、解析一次"""
+
+    # 指标中使用的数据源名称
+    metrics_source = 'gz_detail'
+
+    def __init__(self, session=None, rate_limiter=None):
         self.headers = CRAWLER_CONFIG['headers']
         self.cookies = CRAWLER_CONFIG['cookies']
         self.delay = CRAWLER_CONFIG['crawl']['delay']
         self.max_retries = CRAWLER_CONFIG['crawl']['max_retries']
-        
-        # 确保输出目录存在
-        os.makedirs(self.output_dir, exist_ok=True)
-        
-    def parse_url_content(self, url):
-        """解析单个URL的内容，提取特定样式的容器"""
+        self.timeout = CRAWLER_CONFIG['crawl']['timeout']
+        self.max_workers = CRAWLER_CONFIG['crawl']['max_workers']
+        self.html_backend = CRAWLER_CONFIG['html_parser']
+        self.session = session or create_session(self.max_workers)
+        # 与其他线程共用的按主机限速器（fetch_sheets 中未设置时按 crawl.host_interval 创建）
+        self.rate_limiter = rate_limiter
+
+    def fetch(self, url):
+        """下载详情页，返回页面内容，超过最大重试次数时返回None"""
         retries = 0
         while retries <= self.max_retries:
             try:
-                logger.info(f'开始解析URL: {url}')
-                response = requests.get(url, headers=self.headers, cookies=self.cookies)
-                
+                logger.debug('开始下载URL: %s', url)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.wait(url)
+                request_start = time.perf_counter()
+                try:
+                    response = self.session.get(url, timeout=self.timeout)
+                except Exception:
+                    observe_request(self.metrics_source, url, 'error', time.perf_counter() - request_start)
+                    raise
+                observe_request(self.metrics_source, url, response.status_code,
+                                time.perf_counter() - request_start, len(response.content))
+
                 if response.status_code == 200:
-                    # 使用BeautifulSoup解析HTML
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # 查找具有特定样式的容器
-                    content_div = soup.find('div', class_='content', style='margin-top: 30px')
-                    
-                    if content_div:
-                        # 提取标题
-                        title_element = content_div.find('h1', class_='title')
-                        title = title_element.get_text(strip=True) if title_element else ''
-                        
-                        # 提取日期行
-                        date_row = content_div.find('div', class_='date-row')
-                        date_text = date_row.get_text(strip=True) if date_row else ''
-                        
-                        # 提取文章内容
-                        article_content = content_div.find('div', class_='article-content')
-                        content_text = article_content.get_text(strip=True) if article_content else ''
-                        
-                        # 提取附件链接
-                        attachments = []
-                        attachment_links = content_div.find_all('a', class_='nfw-cms-attachment')
-                        for link in attachment_links:
-                            attachment_url = link.get('href', '')
-                            attachment_name = link.get_text(strip=True)
-                            attachments.append({
-                                'name': attachment_name,
-                                'url': attachment_url
-                            })
-                        
-                        result = {
-                            'url': url,
-                            'title': title,
-                            'date_info': date_text,
-                            'content': content_text,
-                            'attachments': json.dumps(attachments, ensure_ascii=False)  # 将附件列表转换为JSON字符串
-                        }
-                        
-                        logger.info(f'成功解析URL: {url}')
-                        return result
-                    else:
-                        logger.warning(f'未找到指定样式的容器: {url}')
-                        return None
-                else:
-                    logger.error(f'请求失败，状态码: {response.status_code}, URL: {url}')
-                    retries += 1
-                    if retries <= self.max_retries:
-                        logger.info(f'第 {retries} 次重试URL: {url}')
-                        time.sleep(self.delay * 2)
-                    else:
-                        logger.error(f'超过最大重试次数，无法解析URL: {url}')
-                        return None
+                    return response.content
+                logger.error(f'请求失败，状态码: {response.status_code}, URL: {url}')
             except Exception as e:
                 logger.error(f'解析URL时发生错误: {str(e)}, URL: {url}')
-                retries += 1
-                if retries <= self.max_retries:
-                    logger.info(f'第 {retries} 次重试URL: {url}')
-                    time.sleep(self.delay * 2)
-                else:
-                    logger.error(f'超过最大重试次数，无法解析URL: {url}')
-                    return None
-    
-    def parse_all_urls_from_excel(self):
-        """从Excel文件中读取所有URL并解析其内容"""
-        logger.info(f'开始从Excel文件读取URL: {self.excel_path}')
-        
-        # 读取Excel文件中的所有工作表
-        excel_data = pd.read_excel(self.excel_path, sheet_name=None)
-        
-        # 存储所有解析结果
-        all_results = []
-        
-        # 遍历每个工作表
-        for sheet_name, df in excel_data.items():
-            logger.info(f'处理工作表: {sheet_name}')
-            
-            # 检查是否存在'链接'列
-            if '链接' in df.columns:
-                urls = df['链接'].dropna().tolist()
-                logger.info(f'工作表 {sheet_name} 中找到 {len(urls)} 个URL')
-                
-                # 解析每个URL
-                for i, url in enumerate(urls):
-                    logger.info(f'处理进度: {i+1}/{len(urls)}')
-                    result = self.parse_url_content(url)
-                    if result:
-                        result['sheet_name'] = sheet_name
-                        all_results.append(result)
-                    
-                    # 添加延时，避免请求过快
-                    time.sleep(self.delay)
+            retries += 1
+            if retries <= self.max_retries:
+                logger.info(f'第 {retries} 次重试URL: {url}')
+                time.sleep(self.delay * 2)
+        logger.error(f'超过最大重试次数，无法解析URL: {url}')
+        return None
+
+    def parse_detail(self, url, content):
+        """解析详情页HTML，一次提取平铺输出和分段输出需要的全部字段，未找到指定样式的容器时返回None"""
+        # 按配置的后端只解析正文容器
+        with parse_timer(self.metrics_source):
+            soup = make_soup(content, self.html_backend, scope=DETAIL_SCOPE)
+
+        # 查找具有特定样式的容器
+        content_div = soup.find('div', class_='content', style='margin-top: 30px') if soup else None
+
+        if not content_div:
+            count_item(self.metrics_source, 'no_container')
+            logger.warning(f'未找到指定样式的容器: {url}')
+            return None
+
+        # 提取标题
+        title_element = content_div.find('h1', class_='title')
+        title = title_element.get_text(strip=True) if title_element else ''
+
+        # 提取日期行
+        date_row = content_div.find('div', class_='date-row')
+        date_text = date_row.get_text(strip=True) if date_row else ''
+
+        # 提取文章内容
+        article_content = content_div.find('div', class_='article-content')
+        content_text = article_content.get_text(strip=True) if article_content else ''
+
+        # 提取具有特定样式的段落：所有style属性包含text-align的p标签
+        paragraphs = []
+        for p in content_div.find_all('p', style=lambda s: s and 'text-align' in s):
+            p_text = p.get_text(strip=True)
+            if p_text:
+                paragraphs.append(p_text)
+
+        # 提取附件链接
+        attachments = []
+        for link in content_div.find_all('a', class_='nfw-cms-attachment'):
+            attachments.append({
+                'name': link.get_text(strip=True),
+                'url': link.get('href', '')
+            })
+
+        count_item(self.metrics_source, 'parsed')
+        logger.debug('成功解析URL: %s', url)
+        return {
+            'url': url,
+            'title': title,
+            'date_info': date_text,
+            'content': content_text,
+            'paragraphs': paragraphs,
+            'attachments': attachments
+        }
+
+    def fetch_detail(self, url):
+        """下载并解析单个详情页，失败时返回None"""
+        content = self.fetch(url)
+        if content is None:
+            return None
+        return self.parse_detail(url, content)
+
+    def fetch_sheets(self, sheets):
+        """下载并解析所有工作表中的URL
+
+        所有工作表的URL放入同一个线程池并发处理（max_workers 为1时逐个处理），
+        无论是否并发，同一主机的请求间隔都只由按主机限速器控制（不小于 crawl.host_interval）。
+
+        Returns:
+            {工作表名: [(URL, 解析结果或None)]}，按工作表和URL的原始顺序排列
+        """
+        if self.rate_limiter is None:
+            self.rate_limiter = HostRateLimiter(CRAWLER_CONFIG['crawl']['host_interval'])
+        total = sum(len(urls) for urls in sheets.values())
+        progress = ProgressLogger('解析详情页', total=total, logger=logger)
+
+        def handle(url):
+            detail = self.fetch_detail(url)
+            if detail:
+                progress.update(success=1)
             else:
-                logger.warning(f'工作表 {sheet_name} 中未找到"链接"列')
-        
-        # 保存结果到JSON文件
+                progress.update(failed=1)
+            set_queue_depth(self.metrics_source, total - progress.done)
+            return detail
+
+        set_queue_depth(self.metrics_source, total)
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) as executor:
+            futures = {sheet_name: [(url, executor.submit(handle, url)) for url in urls]
+                       for sheet_name, urls in sheets.items()}
+            results = {sheet_name: [(url, future.result()) for url, future in items]
+                       for sheet_name, items in futures.items()}
+        set_queue_depth(self.metrics_source, 0)
+        progress.finish()
+        return results
+
+
+class URLContentParser(DetailPageClient):
+    def __init__(self, excel_path, output_dir=None, session=None):
+        super().__init__(session)
+        self.excel_path = excel_path
+        self.output_dir = output_dir or os.path.join(os.path.dirname(excel_path), 'parsed_content')
+
+        # 确保输出目录存在
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def parse_url_content(self, url):
+        """解析单个URL的内容，提取特定样式的容器"""
+        content = self.fetch(url)
+        if content is None:
+            return None
+        return self.parse_html(url, content)
+
+    def parse_html(self, url, content):
+        """解析详情页HTML，未找到指定样式的容器时返回None"""
+        detail = self.parse_detail(url, content)
+        return flat_result(detail) if detail else None
+
+    def collect_results(self, sheet_results):
+        """把 fetch_sheets 的结果整理为平铺输出的记录列表"""
+        all_results = []
+        for sheet_name, items in sheet_results.items():
+            for url, detail in items:
+                if detail:
+                    result = flat_result(detail)
+                    result['sheet_name'] = sheet_name
+                    all_results.append(result)
+        return all_results
+
+    def save_results(self, all_results):
+        """保存结果到 parsed_content.json 和 parsed_content.xlsx"""
         json_output_file = os.path.join(self.output_dir, 'parsed_content.json')
         with open(json_output_file, 'w', encoding='utf-8') as f:
             json.dump(all_results, f, ensure_ascii=False, indent=2)
-        
-        # 保存结果到Excel文件
+
         excel_output_file = os.path.join(self.output_dir, 'parsed_content.xlsx')
         if all_results:
-            # 转换为DataFrame
-            df = pd.DataFrame(all_results)
-            # 保存到Excel
-            df.to_excel(excel_output_file, index=False)
-        
+            import pandas as pd
+            pd.DataFrame(all_results).to_excel(excel_output_file, index=False)
+
         logger.info(f'解析完成，共处理 {len(all_results)} 个URL，结果已保存至: {json_output_file} 和 {excel_output_file}')
+        return json_output_file, excel_output_file
+
+    def parse_all_urls_from_excel(self):
+        """从Excel文件中读取所有URL并解析其内容"""
+        sheets = read_excel_urls(self.excel_path)
+        all_results = self.collect_results(self.fetch_sheets(sheets))
+        self.save_results(all_results)
         return all_results
 
 
 def main():
+    # 配置日志（日志由后台线程写出）
+    setup_logging(os.path.join(CRAWLER_CONFIG['log']['dir'], 'url_content_parser.log'),
+                  level=CRAWLER_CONFIG['log']['level'], fmt=CRAWLER_CONFIG['log']['format'])
+
+    # 启动本地指标接口（可选）
+    if CRAWLER_CONFIG['metrics']['port']:
+        start_metrics_server(CRAWLER_CONFIG['metrics']['port'])
+
     # Excel文件路径
     excel_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gz_rsj_data.xlsx')
-    
+
     # 创建解析器实例
     parser = URLContentParser(excel_path)
-    
+
     # 解析所有URL
     parser.parse_all_urls_from_excel()
-    
+
+    summary_file = write_run_summary(CRAWLER_CONFIG['metrics']['summary_dir'], 'url_content_parser')
+    logger.info(f'指标汇总已保存至: {summary_file}')
     logger.info('URL内容解析任务执行完毕')
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -51,7 +51,27 @@ CRAWL_CONFIG = {
     'min_delay': 1,
     'max_delay': 3,
     'page_delay_min': 3,
-    'page_delay_max': 6
+    'page_delay_max': 6,
+    'per_page': 50,         # 每页结果数（WAS5的perpage参数，None表示使用站点默认值）
+    'max_workers': 4,       # 自动确定总页数后并发获取检索页的线程数
+    'host_interval': 1.0    # 并发获取时同一主机两次请求的最小间隔（秒）
+}
+
+# 流水线模式配置（mohrss_pipeline.py：检索页、详情页、附件同时抓取）
+PIPELINE_CONFIG = {
+    'host_interval': 1.0,         # 同一主机两次请求的最小间隔（秒），检索页、详情页和附件共用；不建议小于1秒
+    'detail_workers': 4,          # 详情页抓取线程数
+    'attachment_workers': 2,      # 附件下载线程数
+    'download_attachments': True, # 是否在详情页完成后立即下载附件
+    'download_dir': 'downloads'   # 附件保存目录（相对模块目录）
+}
+
+# “是否有效”快速刷新配置（validity_refresh.py）
+VALIDITY_CONFIG = {
+    'workers': 2,                                   # 并发线程数（请求间隔由 host_interval 控制，线程只用于重叠响应等待）
+    'host_interval': 1.0,                           # 同一主机两次请求的最小间隔（秒），不建议小于1秒
+    'chunk_size': 4096,                             # 流式读取详情页的块大小（字节）
+    'change_log': 'results/validity_changes.jsonl'  # 变更日志（相对模块目录）
 }
 
 # 文件保存配置
@@ -62,7 +82,12 @@ SAVE_CONFIG = {
     'extracted_dir': 'extracted_content',
     'save_raw_html': True,
     'save_json': True,
-    'save_excel': True
+    'save_excel': True,
+    'detail_cache_dir': 'results/detail_pages',  # 详情页缓存目录（相对模块目录，None表示不缓存），供 --offline 离线重新解析
+    'policy_store': 'results/policy_store',  # 已解析政策存储目录（相对模块目录，None表示每次获取全部详情页）
+    'policy_store_batch': 20,  # 每新解析多少个政策写入一次政策存储（中断后下次运行从已写入的政策继续）
+    'version_dir': 'results/versions',  # 详情页（pages/）和正文（bodies/）的历史版本库（相对模块目录，None表示不保存历史版本）
+    'archive_pages': True  # 检索页保存到 results/archive 压缩归档（False 表示每页保存为单独的HTML文件）
 }
 
 # 日志配置
@@ -73,8 +98,21 @@ LOG_CONFIG = {
     'encoding': 'utf-8'
 }
 
+# 指标配置
+METRICS_CONFIG = {
+    'port': None,              # 本地 /metrics 接口端口（None表示不启动）
+    'summary_dir': 'metrics'   # 每次运行结束时写出的JSON汇总目录（相对模块目录）
+}
+
 # 数据解析配置
 PARSER_CONFIG = {
+    # HTML解析后端：默认 'html.parser'；安装 lxml 或 selectolax 后可改为 'lxml' 或 'selectolax'
+    # （切换前先用 python -m crawler_common.parser_bench 在保存的页面上核对结果；未安装时退回 html.parser）
+    'html_parser': 'html.parser',
+    
+    # 页面模板缓存：按URL前缀和页面结构记住每种模板的正文容器，下次先尝试该容器
+    'layout_cache': True,
+    
     # 可能的搜索结果容器选择器
     'search_result_selectors': [
         'div.search-result-item',
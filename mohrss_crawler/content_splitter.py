@@ -5,21 +5,17 @@
 对Excel文件Sheet2的正文内容进行智能分段，确保每行不超过1000字并保持语义完整
 """
 
-import pandas as pd
 import re
 import os
+import sys
 import logging
 from datetime import datetime
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/content_splitter.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.log_setup import setup_logging, ProgressLogger
 
 class ContentSplitter:
     """正文内容分段器"""
@@ -207,6 +203,8 @@ class ContentSplitter:
     
     def process_excel_file(self, input_file, output_file):
         """处理Excel文件"""
+        import pandas as pd
+        
         try:
             logging.info(f"开始处理Excel文件: {input_file}")
             
@@ -216,12 +214,13 @@ class ContentSplitter:
             
             # 创建新的分段数据
             split_data = []
+            progress = ProgressLogger('正文分段', total=len(df))
             
             for index, row in df.iterrows():
                 policy_title = row['政策标题']
                 content = str(row['正文内容'])
                 
-                logging.info(f"处理政策: {policy_title}")
+                logging.debug("处理政策: %s", policy_title)
                 
                 # 分段处理正文内容
                 segments = self.split_content(content)
@@ -252,7 +251,9 @@ class ContentSplitter:
                             '字符数': len(segment)
                         })
                 
-                logging.info(f"政策 '{policy_title}' 分段完成，共 {len(segments)} 段")
+                logging.debug("政策 '%s' 分段完成，共 %d 段", policy_title, len(segments))
+                progress.update(segments=len(segments))
+            progress.finish()
             
             # 创建新的DataFrame
             split_df = pd.DataFrame(split_data)
@@ -293,8 +294,7 @@ class ContentSplitter:
 
 def main():
     """主函数"""
-    # 确保日志目录存在
-    os.makedirs('logs', exist_ok=True)
+    setup_logging('logs/content_splitter.log')
     
     # 输入和输出文件
     input_file = 'policy_data_full.xlsx'
@@ -5,15 +5,38 @@
 从results目录提取政策链接，访问详情页获取三种信息结构
 """
 
+from __future__ import annotations
+
 import os
 import re
+import sys
+import hashlib
 import time
 import requests
-import pandas as pd
 from datetime import datetime
-from bs4 import BeautifulSoup
-from typing import Dict, List
+from typing import Dict, List, Optional, TYPE_CHECKING, Union
 import logging
+
+if TYPE_CHECKING:
+	# 仅用于类型注解；运行时在用到的函数内再导入，避免导入模块时加载 pandas/bs4
+	import pandas as pd
+	from bs4 import BeautifulSoup
+
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+	sys.path.append(_REPO_ROOT)
+from crawler_common.metrics import (observe_request, parse_timer, set_queue_depth, count_item,
+									start_metrics_server, write_run_summary)
+from crawler_common.log_setup import setup_logging, ProgressLogger
+from crawler_common.process_pool import imap_ordered, add_pool_arguments
+from crawler_common.html_backend import make_soup, block_texts
+from crawler_common.page_archive import PageArchive, ARCHIVE_DIRNAME, read_saved_page, snapshot_key
+from crawler_common.version_store import VersionStore
+from crawler_common.layout_cache import LayoutCache
+from crawler_common.content_types import is_document_url, is_html_response, document_name
+from config import METRICS_CONFIG, PARSER_CONFIG, SAVE_CONFIG
+from policy_store import open_policy_store, canonical_url, list_hash, make_record
 try:
 	# 优先使用本模块的分段逻辑（章节/段落/句子/标点优先级）
 	from mohrss_crawler.content_splitter import ContentSplitter  # type: ignore
@@ -40,14 +63,39 @@ except Exception:
 							segments.append(p[i:i + self.max_chars])
 				return segments
 
+# 详情页只解析基本信息、正文和附件容器，导航、页脚、侧栏不进入解析树
+DETAIL_SCOPE = ('ul.clearfix', 'div.art_p', 'div.gz_content', 'div.cj_xiang_con')
+# 正文容器样式，按默认尝试顺序排列（见 find_content_div）
+CONTENT_LAYOUTS = ('art_p', 'gz_content')
+
 class MOHRSSDetailedParser:
-	def __init__(self):
+	def __init__(self, rate_limiter=None):
 		self.results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
 		self.output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parsed_content')
+		# 详情页缓存目录（None表示不缓存）
+		cache_dir = SAVE_CONFIG.get('detail_cache_dir')
+		self.detail_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), cache_dir) if cache_dir else None
+		# 已解析政策存储（None表示每次都获取全部详情页）
+		store_path = SAVE_CONFIG.get('policy_store')
+		self.policy_store = open_policy_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), store_path)) if store_path else None
+		# 详情页和正文的历史版本库（None表示不保存历史版本）
+		version_dir = SAVE_CONFIG.get('version_dir')
+		if version_dir:
+			version_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), version_dir)
+			self.page_versions = VersionStore.for_dir(os.path.join(version_dir, 'pages'))
+			self.body_versions = VersionStore.for_dir(os.path.join(version_dir, 'bodies'))
+		else:
+			self.page_versions = self.body_versions = None
 		os.makedirs(self.output_dir, exist_ok=True)
 		self.setup_logging()
 		# 正文分段器（仿照 ndrc 的做法）
 		self.splitter = ContentSplitter(max_chars=1000)
+		# 与其他线程共用的按主机限速器（流水线模式下设置）
+		self.rate_limiter = rate_limiter
+		# HTML解析后端
+		self.html_backend = PARSER_CONFIG['html_parser']
+		# 页面模板缓存：同一模板的详情页先尝试上次成功的正文容器
+		self.layouts = LayoutCache('mohrss_detail', enabled=PARSER_CONFIG['layout_cache'])
 		
 		# 设置请求session
 		self.session = requests.Session()
@@ -69,67 +117,49 @@ class MOHRSSDetailedParser:
 	def setup_logging(self):
 		timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 		log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-		os.makedirs(log_dir, exist_ok=True)
 		
-		logging.basicConfig(
-			level=logging.INFO,
-			format='%(asctime)s - %(levelname)s - %(message)s',
-			handlers=[
-				logging.FileHandler(f'{log_dir}/detailed_parser_{timestamp}.log', encoding='utf-8'),
-				logging.StreamHandler()
-			]
-		)
+		# 进程内只配置一次，日志由后台线程写出
+		setup_logging(f'{log_dir}/detailed_parser_{timestamp}.log')
 		self.logger = logging.getLogger(__name__)
 		
-	def extract_policy_links(self) -> List[Dict]:
-		"""从results目录提取政策链接"""
+	def list_search_files(self) -> List:
+		"""列出results目录和归档（results/archive）中保存的检索页，按页码排序，每页只取最新快照
+
+		返回页面来源列表：文件路径，或 (归档目录, 索引)，用 read_saved_page 读取。
+		同一页保存过多次时只解析文件名中时间戳最大的一份
+		"""
+		def sort_key(filename):
+			page_match = re.search(r'page_(\d+)', filename)
+			return (int(page_match.group(1)) if page_match else 0, filename)
+		
+		pages = []
+		archive_dir = os.path.join(self.results_dir, ARCHIVE_DIRNAME)
+		if PageArchive.exists(archive_dir):
+			pages.extend((entry['name'], (archive_dir, entry)) for entry in PageArchive.for_dir(archive_dir).latest().values())
+		if os.path.isdir(self.results_dir):
+			pages.extend((f, os.path.join(self.results_dir, f)) for f in os.listdir(self.results_dir) if f.endswith('.html'))
+		pages.sort(key=lambda page: sort_key(page[0]))
+		latest = {snapshot_key(name): source for name, source in pages}
+		return list(latest.values())
+		
+	def extract_policy_links(self, workers: int = 1, max_tasks_per_child: int = 100) -> List[Dict]:
+		"""从results目录提取政策链接
+
+		Args:
+			workers: 解析进程数，1表示在当前进程中解析
+			max_tasks_per_child: 每个子进程处理多少个文件后重启
+		"""
 		policy_links = []
 		
 		try:
-			html_files = [f for f in os.listdir(self.results_dir) if f.endswith('.html')]
-			
-			for html_file in html_files:
-				filepath = os.path.join(self.results_dir, html_file)
-				self.logger.info(f"解析文件: {html_file}")
-				
-				with open(filepath, 'r', encoding='utf-8') as f:
-					html_content = f.read()
-					
-				soup = BeautifulSoup(html_content, 'html.parser')
-				
-				# 查找所有表格
-				tables = soup.find_all('table', style='border-collapse:separate;')
-				
-				for table in tables:
-					# 查找所有td元素，按3个一组处理
-					td_elements = table.find_all('td')
-					
-					# 每3个td为一组：日期、标题链接、文号
-					for i in range(0, len(td_elements) - 2, 3):
-						if i + 2 < len(td_elements):
-							date_td = td_elements[i]
-							title_td = td_elements[i + 1]
-							doc_td = td_elements[i + 2]
-							
-							# 提取日期
-							date_span = date_td.find('span')
-							date = date_span.text.strip() if date_span else ''
-							
-							# 提取标题和链接
-							title_link = title_td.find('a')
-							if title_link:
-								title = title_link.text.strip()
-								url = title_link.get('href', '')
-								doc_number = doc_td.text.strip()
-								
-								if url and title:
-									policy_info = {
-										'title': title,
-										'url': url,
-										'date': date,
-										'doc_number': doc_number
-									}
-									policy_links.append(policy_info)
+			html_files = self.list_search_files()
+			if workers == 1:
+				pages = map(self.parse_search_file, html_files)
+			else:
+				pages = imap_ordered(_parse_search_file, html_files, workers=workers,
+									 max_tasks_per_child=max_tasks_per_child, initializer=_init_worker)
+			for links in pages:
+				policy_links.extend(links)
 									
 			self.logger.info(f"提取到 {len(policy_links)} 个政策链接")
 			return policy_links
@@ -138,40 +168,123 @@ class MOHRSSDetailedParser:
 			self.logger.error(f"提取政策链接时出错: {e}")
 			return []
 			
+	def unique_policy_links(self, policy_links: List[Dict]) -> List[Dict]:
+		"""按规范化URL去重（同一政策出现在多个检索页或重复保存的检索页中），保留首次出现的条目（位置和元数据）
+
+		流水线模式（mohrss_pipeline.py）边获取检索页边去重，使用相同的规则
+		"""
+		unique = {}
+		for policy_info in policy_links:
+			unique.setdefault(canonical_url(policy_info['url']), policy_info)
+		return list(unique.values())
+		
+	def save_policy_records(self, records: List[Dict]):
+		"""把一批新解析的记录写入政策存储并清空列表；中断的运行已写入的政策下次不再获取"""
+		if self.policy_store and records:
+			self.policy_store.add_records(records)
+		records.clear()
+		
+	def stored_result(self, policy_info: Dict, records: Dict[str, Dict]) -> Optional[Dict]:
+		"""已保存且检索页元数据没有变化的政策返回保存的解析结果，否则返回None"""
+		record = records.get(canonical_url(policy_info['url']))
+		if not record or record['list_hash'] != list_hash(policy_info) or 'error' in record['result']:
+			return None
+		return dict(record['result'], url=policy_info['url'])
+		
+	def parse_search_file(self, source) -> List[Dict]:
+		"""读取并解析一个保存的检索页（文件路径或归档中的快照）"""
+		self.logger.debug("解析检索页: %s", os.path.basename(source) if isinstance(source, str) else source[1]['name'])
+		return self.parse_search_page(read_saved_page(source))
+			
+	def parse_search_page(self, html_content: Union[str, bytes]) -> List[Dict]:
+		"""解析一页检索结果（字符串或原始字节），返回政策链接列表"""
+		with parse_timer('mohrss_search'):
+			soup = make_soup(html_content, self.html_backend)
+		
+		policy_links = []
+		# 查找所有表格
+		tables = soup.find_all('table', style='border-collapse:separate;')
+		
+		for table in tables:
+			# 查找所有td元素，按3个一组处理
+			td_elements = table.find_all('td')
+			
+			# 每3个td为一组：日期、标题链接、文号
+			for i in range(0, len(td_elements) - 2, 3):
+				if i + 2 < len(td_elements):
+					date_td = td_elements[i]
+					title_td = td_elements[i + 1]
+					doc_td = td_elements[i + 2]
+					
+					# 提取日期
+					date_span = date_td.find('span')
+					date = date_span.text.strip() if date_span else ''
+					
+					# 提取标题和链接
+					title_link = title_td.find('a')
+					if title_link:
+						title = title_link.text.strip()
+						url = title_link.get('href', '')
+						doc_number = doc_td.text.strip()
+						
+						if url and title:
+							policy_info = {
+								'title': title,
+								'url': url,
+								'date': date,
+								'doc_number': doc_number
+							}
+							policy_links.append(policy_info)
+		
+		return policy_links
+			
 	def fetch_policy_detail(self, policy_info: Dict) -> Dict:
 		"""获取政策详情页"""
 		try:
 			url = policy_info['url']
 			title = policy_info['title']
 			
-			self.logger.info(f"获取详情: {title}")
+			self.logger.debug("获取详情: %s", title)
+			
+			# 直接链接到文件（PDF、Word、OFD等）的条目不按网页下载，交给附件下载
+			if is_document_url(url):
+				count_item('mohrss_detail', 'document')
+				return self.document_result(policy_info)
 			
 			headers = {
 				'Referer': 'https://www.mohrss.gov.cn/was5/web/search?channelid=203464&orderby=date&default=isall&page=1'
 			}
 			
-			response = self.session.get(url, headers=headers, timeout=30)
+			if self.rate_limiter is not None:
+				self.rate_limiter.wait(url)
+			request_start = time.perf_counter()
+			try:
+				# 先只读取响应头，按 Content-Type 判断是否是网页
+				response = self.session.get(url, headers=headers, timeout=30, stream=True)
+			except requests.exceptions.RequestException:
+				observe_request('mohrss_detail', url, 'error', time.perf_counter() - request_start)
+				raise
+			if response.ok and not is_html_response(response):
+				response.close()
+				observe_request('mohrss_detail', url, response.status_code, time.perf_counter() - request_start)
+				count_item('mohrss_detail', 'document')
+				content_type = response.headers.get('Content-Type')
+				self.logger.info(f"详情链接不是网页（{content_type}），作为附件处理: {url}")
+				return self.document_result(policy_info, content_type)
+			body = response.content
+			observe_request('mohrss_detail', url, response.status_code,
+							time.perf_counter() - request_start, len(body))
 			response.raise_for_status()
-			response.encoding = 'utf-8'
+			# 缓存和解析都使用原始字节，不先解码再编码
+			self.save_cached_detail(url, body)
 			
-			soup = BeautifulSoup(response.text, 'html.parser')
-			
-			# 提取三种信息结构
-			basic_info = self.extract_basic_info(soup)
-			content = self.extract_content(soup)
-			attachments = self.extract_attachments(soup, url)
-			
-			return {
-				'title': title,
-				'url': url,
-				'date': policy_info['date'],
-				'doc_number': policy_info['doc_number'],
-				'basic_info': basic_info,
-				'content': content,
-				'attachments': attachments
-			}
+			result = self.parse_detail_page(policy_info, body)
+			self.save_versions(url, body, result)
+			count_item('mohrss_detail', 'parsed')
+			return result
 			
 		except Exception as e:
+			count_item('mohrss_detail', 'error')
 			self.logger.error(f"获取详情时出错: {e}")
 			return {
 				'title': policy_info['title'],
@@ -179,6 +292,83 @@ class MOHRSSDetailedParser:
 				'error': str(e)
 			}
 			
+	def document_result(self, policy_info: Dict, content_type: str = None) -> Dict:
+		"""直接链接到文件的政策：没有基本信息和正文，文件本身作为唯一的附件"""
+		url = policy_info['url']
+		return {
+			'title': policy_info['title'],
+			'url': url,
+			'date': policy_info['date'],
+			'doc_number': policy_info['doc_number'],
+			'basic_info': {},
+			'content': '',
+			'attachments': [{'name': document_name(url, content_type), 'url': url}]
+		}
+		
+	def detail_cache_path(self, url: str) -> str:
+		"""详情页缓存文件路径（按URL哈希命名）"""
+		return os.path.join(self.detail_cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.html')
+		
+	def save_cached_detail(self, url: str, html_content: bytes):
+		"""保存详情页HTML到缓存目录（按收到的字节原样写入）"""
+		if not self.detail_cache_dir:
+			return
+		try:
+			os.makedirs(self.detail_cache_dir, exist_ok=True)
+			with open(self.detail_cache_path(url), 'wb') as f:
+				f.write(html_content)
+		except OSError as e:
+			self.logger.warning(f"保存详情页缓存失败: {url}, {e}")
+			
+	def save_versions(self, url: str, html_content: bytes, result: Dict):
+		"""把详情页和解析出的正文写入历史版本库（与最新版本相同时不写入），以规范化URL为键"""
+		if self.page_versions is None:
+			return
+		key = canonical_url(url)
+		try:
+			self.page_versions.add(key, html_content, url=url)
+			entry, added = self.body_versions.add(key, result.get('content') or '', url=url, title=result.get('title', ''))
+		except (OSError, ValueError) as e:
+			self.logger.warning(f"保存历史版本失败: {url}, {e}")
+			return
+		if added and entry['version'] > 1:
+			changes = entry['changes']
+			self.logger.info(f"正文有变化（第{entry['version']}版，增加 {changes['added']} 段，删除 {changes['removed']} 段）: {url}")
+			
+	def parse_cached_detail(self, policy_info: Dict) -> Dict:
+		"""从缓存解析详情页，未缓存时返回带 error 的结果"""
+		url = policy_info['url']
+		if is_document_url(url):
+			return self.document_result(policy_info)
+		path = self.detail_cache_path(url) if self.detail_cache_dir else None
+		if not path or not os.path.exists(path):
+			return {'title': policy_info['title'], 'url': url, 'error': '详情页未缓存'}
+		with open(path, 'rb') as f:
+			return self.parse_detail_page(policy_info, f.read())
+			
+	def parse_detail_page(self, policy_info: Dict, html_content: Union[str, bytes]) -> Dict:
+		"""解析详情页HTML（字符串或原始字节），提取基本信息、正文和附件三种信息结构"""
+		url = policy_info['url']
+		with parse_timer('mohrss_detail'):
+			# 页面中没有这些容器时退回整页解析
+			soup = (make_soup(html_content, self.html_backend, scope=DETAIL_SCOPE)
+					or make_soup(html_content, self.html_backend))
+			
+			# 提取三种信息结构
+			basic_info = self.extract_basic_info(soup)
+			content = self.extract_content(soup, url, html_content)
+			attachments = self.extract_attachments(soup, url)
+		
+		return {
+			'title': policy_info['title'],
+			'url': url,
+			'date': policy_info['date'],
+			'doc_number': policy_info['doc_number'],
+			'basic_info': basic_info,
+			'content': content,
+			'attachments': attachments
+		}
+		
 	def extract_basic_info(self, soup: BeautifulSoup) -> Dict:
 		"""提取基本信息"""
 		basic_info = {}
@@ -228,37 +418,41 @@ class MOHRSSDetailedParser:
 			self.logger.error(f"提取基本信息时出错: {e}")
 			return {}
 			
-	def extract_content(self, soup: BeautifulSoup) -> str:
-		"""提取正文内容"""
+	def find_content_div(self, soup: BeautifulSoup, layout: str, html_content=None):
+		"""按正文容器样式查找正文区域：art_p 为 div.art_p，gz_content 为 div.gz_content 中的 div.gz_content_txt
+
+		只查找该样式的容器。页面有 art_p 时不使用 gz_content（与原来的查找顺序一致），
+		给出 html_content 且其中不含 art_p 字样时不再查找 art_p。
+		"""
+		if layout == 'art_p':
+			return soup.find('div', class_='art_p')
+		marker = b'art_p' if isinstance(html_content, (bytes, bytearray)) else 'art_p'
+		if (html_content is None or marker in html_content) and soup.find('div', class_='art_p'):
+			return None
+		gz_content = soup.find('div', class_='gz_content')
+		return gz_content.find('div', class_='gz_content_txt') if gz_content else None
+		
+	def extract_content(self, soup: BeautifulSoup, url: str = None, html_content=None) -> str:
+		"""提取正文内容
+
+		Args:
+			url, html_content: 给出时按页面模板（LayoutCache）先尝试该模板上次成功的正文容器
+		"""
 		try:
-			# 查找正文内容区域 - 支持多种HTML结构
-			content_div = None
-			
-			# 尝试查找 art_p 类的div
-			content_div = soup.find('div', class_='art_p')
-			
-			# 如果没有找到，尝试查找 gz_content 类的div
-			if not content_div:
-				gz_content = soup.find('div', class_='gz_content')
-				if gz_content:
-					content_div = gz_content.find('div', class_='gz_content_txt')
+			# 查找正文内容区域 - 支持多种HTML结构，依次尝试 art_p 和 gz_content
+			if url is not None:
+				_, content_div = self.layouts.find(url, html_content, CONTENT_LAYOUTS,
+												   lambda layout: self.find_content_div(soup, layout, html_content))
+			else:
+				content_div = None
+				for layout in CONTENT_LAYOUTS:
+					content_div = self.find_content_div(soup, layout, html_content)
+					if content_div:
+						break
 			
 			if content_div:
-				# 提取所有文本内容，包括各种HTML标签
-				paragraphs = []
-				
-				# 处理所有子元素
-				for element in content_div.find_all(['p', 'span', 'div', 'font']):
-					# 获取元素的文本内容
-					text = element.get_text(strip=True)
-					if text:
-						paragraphs.append(text)
-				
-				# 如果没有找到子元素，直接获取整个div的文本
-				if not paragraphs:
-					text = content_div.get_text(strip=True)
-					if text:
-						paragraphs.append(text)
+				# 按块级元素分段，每段文本只输出一次（嵌套的 <p><span><font> 不会重复输出）
+				paragraphs = block_texts(content_div)
 				
 				content = '\n'.join(paragraphs)
 				return content
@@ -344,7 +538,7 @@ class MOHRSSDetailedParser:
 				path_before_date = url_without_params.split(f'/{date_part}/')[0]
 				# 构建基础路径
 				base_path = f"{path_before_date}/{date_part}/"
-				self.logger.info(f"从URL提取基础路径: {base_path}")
+				self.logger.debug("从URL提取基础路径: %s", base_path)
 				return base_path
 			else:
 				# 如果无法提取日期，返回默认路径
@@ -374,6 +568,8 @@ class MOHRSSDetailedParser:
 			
 	def save_results(self, results: List[Dict]):
 		"""保存三张表到一个Excel文件的三个sheet中"""
+		import pandas as pd
+		
 		if not results:
 			self.logger.warning("没有结果可保存")
 			return
@@ -454,37 +650,130 @@ class MOHRSSDetailedParser:
 		
 		self.logger.info(f"所有信息已保存到: {excel_file}")
 			
-	def parse_all_details_from_results(self):
-		"""主处理函数"""
+	def parse_all_details_from_results(self, full: bool = False):
+		"""主处理函数：只获取新政策和检索页元数据有变化的政策，其余直接使用已保存的解析结果
+
+		Args:
+			full: 忽略已保存的解析结果，重新获取全部详情页
+		"""
 		try:
-			policy_links = self.extract_policy_links()
+			policy_links = self.unique_policy_links(self.extract_policy_links())
 			
 			if not policy_links:
 				self.logger.warning("没有找到政策链接")
 				return
 				
-			self.logger.info(f"找到 {len(policy_links)} 个政策链接，开始处理所有链接")
-			results = []
+			records = self.policy_store.load() if self.policy_store and not full else {}
+			results = [self.stored_result(policy_info, records) for policy_info in policy_links]
+			pending = [i for i, result in enumerate(results) if result is None]
+			self.logger.info(f"找到 {len(policy_links)} 个政策链接，{len(policy_links) - len(pending)} 个没有变化，"
+							 f"需要获取 {len(pending)} 个详情页")
+			progress = ProgressLogger('获取政策详情', total=len(pending), logger=self.logger)
+			new_records = []
+			batch_size = SAVE_CONFIG.get('policy_store_batch') or 1
 			
-			for i, policy_info in enumerate(policy_links, 1):
-				self.logger.info(f"处理第 {i}/{len(policy_links)} 个政策: {policy_info['title'][:50]}...")
-				result = self.fetch_policy_detail(policy_info)
-				results.append(result)
-				
-				# 添加延迟避免请求过快
-				if i < len(policy_links):
-					time.sleep(1)
+			try:
+				for n, i in enumerate(pending, 1):
+					policy_info = policy_links[i]
+					self.logger.debug("处理第 %d/%d 个政策: %s...", n, len(pending), policy_info['title'][:50])
+					set_queue_depth('mohrss_detail', len(pending) - n + 1)
+					result = self.fetch_policy_detail(policy_info)
+					results[i] = result
+					if 'error' not in result:
+						new_records.append(make_record(policy_info, result))
+						# 边获取边分批写入，中断（异常、Ctrl-C）时已解析的政策不会丢失
+						if len(new_records) >= batch_size:
+							self.save_policy_records(new_records)
+					progress.update()
 					
+					# 添加延迟避免请求过快
+					if n < len(pending):
+						time.sleep(1)
+			finally:
+				self.save_policy_records(new_records)
+			set_queue_depth('mohrss_detail', 0)
+			progress.finish()
+			self.layouts.log_summary(self.logger)
+			count_item('mohrss_detail', 'unchanged', len(policy_links) - len(pending))
+			
 			self.save_results(results)
-			self.logger.info(f"所有 {len(policy_links)} 个政策处理完成")
+			self.logger.info(f"所有 {len(policy_links)} 个政策处理完成（新获取 {len(pending)} 个）")
 			
 		except Exception as e:
 			self.logger.error(f"处理时出错: {e}")
+			
+	def parse_all_details_offline(self, workers: int = None, max_tasks_per_child: int = 100):
+		"""离线重新解析：不访问网络，多进程解析检索页和缓存的详情页，按检索页顺序合并结果"""
+		policy_links = self.unique_policy_links(
+			self.extract_policy_links(workers=workers, max_tasks_per_child=max_tasks_per_child))
+		if not policy_links:
+			self.logger.warning("没有找到政策链接")
+			return
+			
+		self.logger.info(f"找到 {len(policy_links)} 个政策链接，开始离线解析缓存的详情页")
+		results = []
+		progress = ProgressLogger('离线解析政策详情', total=len(policy_links), logger=self.logger)
+		if workers == 1:
+			details = map(self.parse_cached_detail, policy_links)
+		else:
+			details = imap_ordered(_parse_cached_detail, policy_links, workers=workers,
+								   max_tasks_per_child=max_tasks_per_child, chunksize=16, initializer=_init_worker)
+		for result in details:
+			results.append(result)
+			count_item('mohrss_detail', 'cache_miss' if 'error' in result else 'parsed')
+			progress.update(cache_miss=int('error' in result))
+		progress.finish()
+		# 多进程解析时各子进程有各自的模板缓存，这里只有单进程解析的统计
+		self.layouts.log_summary(self.logger)
+		
+		missing = sum(1 for r in results if 'error' in r)
+		if missing:
+			self.logger.warning(f"{missing} 个政策的详情页没有缓存（需联网解析一次以生成缓存）")
+		self.save_results(results)
+
+
+# 进程池中每个子进程共用的解析器
+_worker_parser = None
+
+
+def _init_worker():
+	"""子进程初始化：创建解析器"""
+	global _worker_parser
+	_worker_parser = MOHRSSDetailedParser()
+
+
+def _parse_search_file(source) -> List[Dict]:
+	"""在子进程中解析一个保存的检索页"""
+	return _worker_parser.parse_search_file(source)
+
+
+def _parse_cached_detail(policy_info: Dict) -> Dict:
+	"""在子进程中解析一个缓存的详情页"""
+	return _worker_parser.parse_cached_detail(policy_info)
 
 
 def main():
+	import argparse
+	
+	arg_parser = argparse.ArgumentParser(description='人社部政策详细信息解析')
+	arg_parser.add_argument('--offline', action='store_true',
+							help='离线重新解析：不访问网络，多进程解析检索页和缓存的详情页')
+	arg_parser.add_argument('--full', action='store_true',
+							help='忽略已保存的解析结果，重新获取全部详情页')
+	add_pool_arguments(arg_parser)
+	args = arg_parser.parse_args()
+	
+	# 启动本地指标接口（可选）
+	if METRICS_CONFIG['port']:
+		start_metrics_server(METRICS_CONFIG['port'])
 	parser = MOHRSSDetailedParser()
-	parser.parse_all_details_from_results()
+	if args.offline:
+		parser.parse_all_details_offline(workers=args.workers, max_tasks_per_child=args.max_tasks_per_child)
+	else:
+		parser.parse_all_details_from_results(full=args.full)
+	summary_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), METRICS_CONFIG['summary_dir'])
+	summary_file = write_run_summary(summary_dir, 'mohrss_detailed_parser')
+	parser.logger.info(f"指标汇总已保存到: {summary_file}")
 
 if __name__ == "__main__":
 	main()
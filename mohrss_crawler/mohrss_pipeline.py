@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人社部流水线抓取
+
+原来的流程分两个阶段：mohrss_raw_crawler.py 先保存全部检索页，mohrss_detailed_parser.py 再重新读取文件逐个获取详情。
+流水线模式把三个阶段重叠起来：
+1. 检索页线程逐页获取检索页，保存原始HTML后立即解析，政策链接直接放入详情队列
+2. 详情线程从队列取链接获取详情页（同时写入详情页缓存），解析出的附件放入附件队列
+3. 附件线程下载附件到 downloads/
+
+所有请求共用一个按主机限速器（PIPELINE_CONFIG['host_interval']），代替原来每个请求前后的固定等待；
+详情结果按检索页中的顺序合并，输出与 mohrss_detailed_parser.py 相同格式的Excel。
+保存的检索页和详情页缓存仍可用 mohrss_detailed_parser.py --offline 离线重新解析。
+
+用法（在本目录运行）：
+    python mohrss_pipeline.py               # 根据第一页的分页信息确定总页数
+    python mohrss_pipeline.py --end-page 5
+    python mohrss_pipeline.py --no-attachments
+"""
+
+import argparse
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from crawler_common.metrics import set_queue_depth, count_item, start_metrics_server, write_run_summary
+from crawler_common.log_setup import ProgressLogger
+from crawler_common.rate_limit import HostRateLimiter
+from config import METRICS_CONFIG, PIPELINE_CONFIG, SAVE_CONFIG, WEBSITE_CONFIG
+from mohrss_raw_crawler import MOHRSSRawCrawler, parse_page_info
+from mohrss_detailed_parser import MOHRSSDetailedParser
+from simple_download import attachment_filename, fetch_attachment
+from policy_store import canonical_url, make_record
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 队列结束标记
+_DONE = object()
+
+
+class MOHRSSPipeline:
+    """检索页、详情页、附件三个阶段同时运行的流水线"""
+
+    def __init__(self, base_url: str = WEBSITE_CONFIG['base_url'], host_interval: float = None,
+                 detail_workers: int = None, attachment_workers: int = None,
+                 download_attachments: bool = None, download_dir: str = None):
+        host_interval = PIPELINE_CONFIG['host_interval'] if host_interval is None else host_interval
+        self.limiter = HostRateLimiter(host_interval)
+        self.raw_crawler = MOHRSSRawCrawler(base_url, rate_limiter=self.limiter)
+        self.parser = MOHRSSDetailedParser(rate_limiter=self.limiter)
+        self.logger = logging.getLogger(__name__)
+
+        self.detail_workers = detail_workers or PIPELINE_CONFIG['detail_workers']
+        self.attachment_workers = attachment_workers or PIPELINE_CONFIG['attachment_workers']
+        if download_attachments is None:
+            download_attachments = PIPELINE_CONFIG['download_attachments']
+        self.download_attachments = download_attachments
+        self.download_dir = download_dir or os.path.join(MODULE_DIR, PIPELINE_CONFIG['download_dir'])
+
+        self.detail_queue = queue.Queue()
+        self.attachment_queue = queue.Queue()
+        self.results = {}           # {检索顺序: 详情结果}
+        self.stored_records = {}    # 已保存的解析结果 {规范化URL: 记录}
+        self.new_records = []       # 新获取、尚未写入政策存储的解析结果，每 policy_store_batch 个写入一次
+        self.new_count = 0          # 本次新获取的政策数
+        self.store_batch = SAVE_CONFIG.get('policy_store_batch') or 1
+        self.attachment_stats = {'success': 0, 'failed': 0}
+        self._attachment_index = 0  # 附件序号，用于附件名称为空时的兜底文件名
+        self._lock = threading.Lock()
+
+    def search_stage(self, start_page: int, end_page: int = None):
+        """逐页获取检索页，解析出的政策链接立即放入详情队列
+
+        end_page 为None时从第一个检索页的分页信息读取总页数；某页没有结果时提前停止。
+        """
+        seen = set()
+        order = 0
+        page_num = start_page
+        while end_page is None or page_num <= end_page:
+            html_content = self.raw_crawler.fetch_search_page(page_num)
+            if html_content is None:
+                count_item('mohrss_search', 'failed')
+                if end_page is None:
+                    self.logger.error(f"第{page_num}页获取失败，无法确定总页数，停止获取检索页")
+                    break
+                page_num += 1
+                continue
+            if end_page is None:
+                total, page_count = parse_page_info(html_content)
+                if page_count is not None:
+                    end_page = page_count
+                    self.logger.info(f"检索结果共 {total} 条记录，{page_count} 页")
+            links = self.parser.parse_search_page(html_content)
+            count_item('mohrss_search', 'parsed')
+            if not links:
+                self.logger.info(f"第{page_num}页没有检索结果，停止获取检索页")
+                break
+            for policy_info in links:
+                # 同一政策出现在多页时只获取一次，保留首次出现的条目（与 unique_policy_links 相同）
+                key = canonical_url(policy_info['url'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                # 检索页元数据没有变化的政策直接使用已保存的解析结果
+                stored = self.parser.stored_result(policy_info, self.stored_records)
+                if stored is not None:
+                    with self._lock:
+                        self.results[order] = stored
+                    count_item('mohrss_detail', 'unchanged')
+                else:
+                    self.detail_queue.put((order, policy_info))
+                order += 1
+            set_queue_depth('mohrss_detail', self.detail_queue.qsize())
+            self.logger.info(f"第{page_num}页解析出 {len(links)} 个政策链接，详情队列 {self.detail_queue.qsize()} 个")
+            page_num += 1
+
+    def detail_stage(self, progress: ProgressLogger):
+        """详情线程：获取并解析详情页，附件放入附件队列"""
+        while True:
+            item = self.detail_queue.get()
+            if item is _DONE:
+                break
+            order, policy_info = item
+            result = self.parser.fetch_policy_detail(policy_info)
+            batch = None
+            with self._lock:
+                self.results[order] = result
+                if 'error' not in result:
+                    self.new_records.append(make_record(policy_info, result))
+                    self.new_count += 1
+                    if len(self.new_records) >= self.store_batch:
+                        batch, self.new_records = self.new_records, []
+            # 边获取边分批写入政策存储，中断时已解析的政策不会丢失
+            if batch:
+                self.parser.save_policy_records(batch)
+            progress.update(failed=int('error' in result))
+            set_queue_depth('mohrss_detail', self.detail_queue.qsize())
+            if self.download_attachments and 'error' not in result:
+                for attachment in result['attachments']:
+                    self.attachment_queue.put((result['title'], attachment))
+                set_queue_depth('mohrss_attachment', self.attachment_queue.qsize())
+
+    def attachment_stage(self):
+        """附件线程：下载附件"""
+        while True:
+            item = self.attachment_queue.get()
+            if item is _DONE:
+                break
+            title, attachment = item
+            url = attachment['url']
+            with self._lock:
+                self._attachment_index += 1
+                index = self._attachment_index
+            if not url.startswith('http'):
+                ok, message = False, "⚠️ 无效URL"
+            else:
+                filepath = os.path.join(self.download_dir, attachment_filename(title, attachment['name'], index))
+                if not os.path.exists(filepath):
+                    self.limiter.wait(url)
+                ok, message = fetch_attachment(url, filepath, session=self.parser.session)
+            with self._lock:
+                self.attachment_stats['success' if ok else 'failed'] += 1
+            count_item('mohrss_attachment', 'success' if ok else 'failed')
+            self.logger.debug("附件 %s: %s", url, message)
+            set_queue_depth('mohrss_attachment', self.attachment_queue.qsize())
+
+    def run(self, start_page: int = 1, end_page: int = None, full: bool = False):
+        """运行流水线，返回按检索顺序排列的详情结果
+
+        Args:
+            full: 忽略已保存的解析结果，重新获取全部详情页
+        """
+        start_time = time.perf_counter()
+        if self.parser.policy_store and not full:
+            self.stored_records = self.parser.policy_store.load()
+        os.makedirs(self.download_dir, exist_ok=True)
+        progress = ProgressLogger('流水线获取政策详情', logger=self.logger)
+
+        detail_threads = [threading.Thread(target=self.detail_stage, args=(progress,), name=f'mohrss-detail-{i}',
+                                           daemon=True) for i in range(self.detail_workers)]
+        attachment_threads = []
+        if self.download_attachments:
+            attachment_threads = [threading.Thread(target=self.attachment_stage, name=f'mohrss-attachment-{i}',
+                                                   daemon=True) for i in range(self.attachment_workers)]
+        for thread in detail_threads + attachment_threads:
+            thread.start()
+
+        try:
+            self.search_stage(start_page, end_page)
+        finally:
+            # 检索页全部完成后通知详情线程结束，详情线程全部结束后再通知附件线程
+            for _ in detail_threads:
+                self.detail_queue.put(_DONE)
+            for thread in detail_threads:
+                thread.join()
+            for _ in attachment_threads:
+                self.attachment_queue.put(_DONE)
+            for thread in attachment_threads:
+                thread.join()
+            self.parser.save_policy_records(self.new_records)
+        set_queue_depth('mohrss_detail', 0)
+        set_queue_depth('mohrss_attachment', 0)
+        progress.finish()
+        self.parser.layouts.log_summary(self.logger)
+
+        results = [self.results[order] for order in sorted(self.results)]
+        self.parser.save_results(results)
+        failed = sum(1 for r in results if 'error' in r)
+        self.logger.info(f"流水线完成：{len(results)} 个政策（新获取 {self.new_count} 个，失败 {failed} 个），"
+                         f"附件成功 {self.attachment_stats['success']} 个、失败 {self.attachment_stats['failed']} 个，"
+                         f"耗时 {time.perf_counter() - start_time:.1f} 秒")
+        return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='人社部流水线抓取：检索页、详情页、附件同时进行')
+    arg_parser.add_argument('--start-page', type=int, default=1, help='开始页码')
+    arg_parser.add_argument('--end-page', type=int, default=None,
+                            help='结束页码（默认根据第一页的分页信息自动确定；某页没有结果时提前停止）')
+    arg_parser.add_argument('--detail-workers', type=int, default=None, help='详情页抓取线程数')
+    arg_parser.add_argument('--attachment-workers', type=int, default=None, help='附件下载线程数')
+    arg_parser.add_argument('--host-interval', type=float, default=None, help='同一主机两次请求的最小间隔（秒）')
+    arg_parser.add_argument('--no-attachments', action='store_true', help='不下载附件')
+    arg_parser.add_argument('--full', action='store_true', help='忽略已保存的解析结果，重新获取全部详情页')
+    args = arg_parser.parse_args()
+
+    # 启动本地指标接口（可选）
+    if METRICS_CONFIG['port']:
+        start_metrics_server(METRICS_CONFIG['port'])
+
+    pipeline = MOHRSSPipeline(host_interval=args.host_interval, detail_workers=args.detail_workers,
+                              attachment_workers=args.attachment_workers,
+                              download_attachments=False if args.no_attachments else None)
+    pipeline.run(args.start_page, args.end_page, full=args.full)
+
+    summary_file = write_run_summary(os.path.join(MODULE_DIR, METRICS_CONFIG['summary_dir']), 'mohrss_pipeline')
+    pipeline.logger.info(f"指标汇总已保存到: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
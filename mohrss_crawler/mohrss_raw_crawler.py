@@ -19,27 +19,63 @@ import time
 import random
 import logging
 import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple, Union
 import warnings
 warnings.filterwarnings('ignore')
 MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+if os.path.dirname(MODULE_DIR) not in sys.path:
+    sys.path.append(os.path.dirname(MODULE_DIR))
+from crawler_common.metrics import observe_request, start_metrics_server, write_run_summary
+from crawler_common.log_setup import setup_logging
+from crawler_common.rate_limit import HostRateLimiter
+from crawler_common.html_backend import decode_markup
+from crawler_common.page_archive import PageArchive, ARCHIVE_DIRNAME
+from config import METRICS_CONFIG, CRAWL_CONFIG, SAVE_CONFIG
+
+
+def parse_page_info(html_content: Union[str, bytes]) -> Tuple[Optional[int], Optional[int]]:
+    """从WAS5检索页的分页信息（如“共287条记录 页次:1/20”）中读取总记录数和总页数，找不到时返回None"""
+    text = re.sub(r'<[^>]+>', '', decode_markup(html_content))
+    total_match = re.search(r'共\s*(\d+)\s*条', text)
+    pages_match = re.search(r'页次\s*[:：]?\s*\d+\s*/\s*(\d+)', text)
+    total = int(total_match.group(1)) if total_match else None
+    page_count = int(pages_match.group(1)) if pages_match else None
+    return total, page_count
+
+
 class MOHRSSRawCrawler:
     """人力资源和社会保障部网站原始页面爬虫类"""
     
-    def __init__(self, base_url: str = "https://www.mohrss.gov.cn"):
+    def __init__(self, base_url: str = "https://www.mohrss.gov.cn", rate_limiter=None):
         """
         初始化爬虫
         
         Args:
             base_url: 网站基础URL
+            rate_limiter: 与其他线程共用的按主机限速器（crawler_common.rate_limit.HostRateLimiter），
+                          设置后代替每次请求前的随机延迟
         """
         self.base_url = base_url
+        self.rate_limiter = rate_limiter
+        # 每页结果数（WAS5的perpage参数，None表示使用站点默认值）和并发获取检索页的线程数
+        self.per_page = CRAWL_CONFIG.get('per_page')
+        self.max_workers = CRAWL_CONFIG.get('max_workers', 1)
+        # 检索页快照归档（未启用时每页保存为单独的HTML文件）
+        self.archive = PageArchive.for_dir(os.path.join(MODULE_DIR, 'results', ARCHIVE_DIRNAME)) \
+            if SAVE_CONFIG.get('archive_pages') else None
         self.session = requests.Session()
         self.setup_session()
         self.setup_logging()
+        # 请求失败次数（并发获取检索页时在多个线程中累加，由锁保护）
         self.error_count = 0
+        self._error_lock = threading.Lock()
         
     def setup_session(self):
         """设置会话参数"""
@@ -71,10 +107,7 @@ class MOHRSSRawCrawler:
         })
         
     def setup_logging(self):
-        """设置日志记录"""
-        # 创建logs目录
-        os.makedirs('logs', exist_ok=True)
-        
+        """设置日志记录（进程内只配置一次，日志由后台线程写出）"""
         # 设置日志格式
         log_format = '%(asctime)s - %(levelname)s - %(message)s'
         date_format = '%Y-%m-%d %H:%M:%S'
@@ -84,15 +117,7 @@ class MOHRSSRawCrawler:
         log_filename = f'logs/mohrss_raw_crawler_{timestamp}.log'
         
         # 配置日志
-        logging.basicConfig(
-            level=logging.INFO,
-            format=log_format,
-            datefmt=date_format,
-            handlers=[
-                logging.FileHandler(log_filename, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        setup_logging(log_filename, fmt=log_format, datefmt=date_format)
         
         self.logger = logging.getLogger(__name__)
         self.logger.info("人力资源和社会保障部网站原始页面爬虫初始化完成")
@@ -111,22 +136,32 @@ class MOHRSSRawCrawler:
         """
         for attempt in range(max_retries):
             try:
-                # 设置Referer
-                if referer:
-                    self.session.headers['Referer'] = referer
+                # 设置Referer（按请求传入，多个线程共用会话时互不影响）
+                headers = {'Referer': referer} if referer else None
                 
-                # 随机延迟
-                time.sleep(random.uniform(1, 3))
+                # 随机延迟；共用限速器时由限速器控制请求间隔
+                if self.rate_limiter is not None:
+                    self.rate_limiter.wait(url)
+                else:
+                    time.sleep(random.uniform(1, 3))
                 
                 # 发送请求
-                response = self.session.get(url, timeout=30)
+                request_start = time.perf_counter()
+                try:
+                    response = self.session.get(url, headers=headers, timeout=30)
+                except requests.exceptions.RequestException:
+                    observe_request('mohrss_search', url, 'error', time.perf_counter() - request_start)
+                    raise
+                observe_request('mohrss_search', url, response.status_code,
+                                time.perf_counter() - request_start, len(response.content))
                 response.raise_for_status()
                 
-                self.logger.info(f"成功获取页面: {url}")
+                self.logger.debug("成功获取页面: %s", url)
                 return response
                 
             except requests.exceptions.RequestException as e:
-                self.error_count += 1
+                with self._error_lock:
+                    self.error_count += 1
                 self.logger.warning(f"第{attempt + 1}次请求失败: {url}, 错误: {e}")
                 if attempt < max_retries - 1:
                     time.sleep(random.uniform(2, 5))
@@ -134,20 +169,36 @@ class MOHRSSRawCrawler:
                     self.logger.error(f"请求失败，已达到最大重试次数: {url}")
                     return None
                     
-    def save_raw_page(self, html_content: str, page_num: int):
-        """保存原始页面内容"""
+    def search_url(self, page_num: int) -> str:
+        """检索结果页URL"""
+        url = f"{self.base_url}/was5/web/search?channelid=203464&orderby=date&default=isall&page={page_num}"
+        if self.per_page:
+            url += f"&perpage={self.per_page}"
+        return url
+        
+    def save_raw_page(self, html_content: bytes, page_num: int, url: str = None):
+        """保存原始页面内容（按收到的字节原样写入），返回保存位置"""
         try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            name = f"mohrss_raw_page_{page_num}_{timestamp}.html"
+            
+            if self.archive is not None:
+                entry, added = self.archive.add(name, html_content, url=url, page=page_num)
+                if added:
+                    self.logger.debug("原始页面内容已归档: %s", name)
+                else:
+                    self.logger.debug("原始页面内容未变化，沿用快照: %s", entry['name'])
+                return f"{self.archive.archive_dir}#{entry['name']}"
+            
             # 创建results目录（相对脚本目录）
             results_dir = os.path.join(MODULE_DIR, 'results')
             os.makedirs(results_dir, exist_ok=True)
+            filename = os.path.join(results_dir, name)
             
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = os.path.join(results_dir, f"mohrss_raw_page_{page_num}_{timestamp}.html")
-            
-            with open(filename, 'w', encoding='utf-8') as f:
+            with open(filename, 'wb') as f:
                 f.write(html_content)
                 
-            self.logger.info(f"原始页面内容已保存: {filename}")
+            self.logger.debug("原始页面内容已保存: %s", filename)
             return filename
             
         except Exception as e:
@@ -164,12 +215,16 @@ class MOHRSSRawCrawler:
         Returns:
             是否成功
         """
+        return self.fetch_search_page(page_num) is not None
+        
+    def fetch_search_page(self, page_num: int) -> Optional[bytes]:
+        """获取并保存指定检索页，返回页面HTML（原始字节），失败时返回None"""
         # 构建URL
-        url = f"{self.base_url}/was5/web/search?channelid=203464&orderby=date&default=isall&page={page_num}"
+        url = self.search_url(page_num)
         
         # 设置Referer
         if page_num > 1:
-            referer = f"{self.base_url}/was5/web/search?channelid=203464&orderby=date&default=isall&page={page_num-1}"
+            referer = self.search_url(page_num - 1)
         else:
             referer = None
             
@@ -178,17 +233,17 @@ class MOHRSSRawCrawler:
         # 获取页面内容
         response = self.get_page(url, referer)
         if not response:
-            return False
+            return None
             
         # 保存原始页面内容
-        saved_file = self.save_raw_page(response.text, page_num)
+        saved_file = self.save_raw_page(response.content, page_num, url)
         
         if saved_file:
             self.logger.info(f"第{page_num}页爬取完成，文件已保存: {saved_file}")
-            return True
+            return response.content
         else:
             self.logger.error(f"第{page_num}页保存失败")
-            return False
+            return None
         
     def crawl_multiple_pages(self, start_page: int = 1, end_page: int = 30):
         """
@@ -224,13 +279,63 @@ class MOHRSSRawCrawler:
         
         return success_count
         
-    def run(self, start_page: int = 1, end_page: int = 30):
+    def discover_pages(self) -> Tuple[Optional[int], Optional[int]]:
+        """获取第一页，从分页信息中读取总记录数和总页数
+
+        总页数由站点按实际生效的每页结果数计算，站点不接受 perpage 参数时也能得到正确的页数。
+
+        Returns:
+            (总记录数, 总页数)，第一页获取失败时总页数为None
+        """
+        html_content = self.fetch_search_page(1)
+        if html_content is None:
+            return None, None
+        total, page_count = parse_page_info(html_content)
+        if page_count is None:
+            page_count = CRAWL_CONFIG['end_page']
+            self.logger.warning(f"第1页中没有找到分页信息，无法确定总页数，改为按配置的结束页码 "
+                                f"CRAWL_CONFIG['end_page']={page_count} 爬取（实际页数更多时其余页不会被获取）")
+        self.logger.info(f"检索结果共 {total} 条记录，{page_count} 页")
+        return total, page_count
+        
+    def crawl_all_pages(self, max_pages: int = None) -> int:
+        """
+        根据第一页的分页信息确定总页数，并发获取其余检索页
+        
+        Args:
+            max_pages: 最多爬取的页数（None表示全部）
+            
+        Returns:
+            成功爬取的页数
+        """
+        # 由限速器控制同一主机的请求间隔，代替逐页的随机等待
+        if self.rate_limiter is None:
+            self.rate_limiter = HostRateLimiter(CRAWL_CONFIG['host_interval'])
+        
+        total, page_count = self.discover_pages()
+        if page_count is None:
+            self.logger.error("第1页获取失败，无法确定总页数")
+            return 0
+        if max_pages:
+            page_count = min(page_count, max_pages)
+        pages = list(range(2, page_count + 1))
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) as executor:
+            results = list(executor.map(self.crawl_page, pages))
+        
+        success_count = 1 + sum(results)
+        failed = [page for page, ok in zip(pages, results) if not ok]
+        if failed:
+            self.logger.warning(f"以下检索页爬取失败: {failed}")
+        self.logger.info(f"成功爬取: {success_count}/{page_count} 页，错误次数: {self.error_count}")
+        return success_count
+        
+    def run(self, start_page: int = 1, end_page: int = None):
         """
         运行爬虫
         
         Args:
             start_page: 开始页码
-            end_page: 结束页码
+            end_page: 结束页码（None表示根据第一页的分页信息自动确定并发获取所有页）
         """
         try:
             self.logger.info("=" * 50)
@@ -238,7 +343,10 @@ class MOHRSSRawCrawler:
             self.logger.info("=" * 50)
             
             # 爬取数据
-            success_count = self.crawl_multiple_pages(start_page, end_page)
+            if end_page is None:
+                success_count = self.crawl_all_pages()
+            else:
+                success_count = self.crawl_multiple_pages(start_page, end_page)
             
             self.logger.info("=" * 50)
             self.logger.info("爬虫运行完成")
@@ -255,13 +363,19 @@ class MOHRSSRawCrawler:
 def main():
     """主函数"""
     try:
+        # 启动本地指标接口（可选）
+        if METRICS_CONFIG['port']:
+            start_metrics_server(METRICS_CONFIG['port'])
+
         # 创建爬虫实例
         crawler = MOHRSSRawCrawler()
         
-        # 运行爬虫（爬取前5页）
-        success_count = crawler.run(start_page=1, end_page=30)
+        # 运行爬虫（根据第一页的分页信息自动确定总页数）
+        success_count = crawler.run()
         
+        summary_file = write_run_summary(os.path.join(MODULE_DIR, METRICS_CONFIG['summary_dir']), 'mohrss_raw_crawler')
         print(f"\n爬取完成！成功爬取 {success_count} 页")
+        print(f"指标汇总已保存至: {summary_file}")
         print("原始页面文件保存在 results/ 目录下")
         print("日志文件保存在 logs/ 目录下")
         
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人社部已解析政策存储
+
+追加写入的存储目录（默认 results/policy_store/，SAVE_CONFIG['policy_store']），
+使用 crawler_common.page_archive.RecordPack 的 pack 文件 + 索引格式：
+    policies.pack   每条记录 = 记录头 + 元数据 + 压缩后的解析结果JSON
+    policies.idx    每行一条JSON索引：
+        {"key": 规范化URL, "list_hash": 列表元数据摘要, "content_hash": 解析结果摘要, "parsed_at": 解析时间, "sha1", ...}
+
+- 规范化URL去掉 ?keywords= 等检索参数，同一政策出现在多个检索页或多次保存的检索页中时只对应一条记录
+- 检索页中的标题、日期、文号没有变化的政策不再获取详情页，直接使用已保存的解析结果
+- 同一URL写入多次时以最后一条为准；解析结果和列表元数据都没有变化时不重复写入，compact 重写文件只保留最新记录
+- 写入中断时，下次打开会补上缺少的索引、截掉 pack 文件末尾不完整的记录（由 RecordPack 处理）
+- 旧版存储文件（results/policy_store.jsonl.gz，每行一条记录的gzip JSONL）在第一次打开存储时自动导入
+
+用法（在本目录运行）：
+    python policy_store.py stats
+    python policy_store.py compact
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Iterator
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from crawler_common.log_setup import setup_logging
+from crawler_common.page_archive import RecordPack
+
+logger = logging.getLogger(__name__)
+
+# 规范化URL时去掉的检索参数
+IGNORED_QUERY_PARAMS = ('keywords',)
+# 列表元数据字段（来自检索页），任一字段变化时重新获取详情页
+LIST_FIELDS = ('title', 'date', 'doc_number')
+# 旧版存储文件的扩展名（存储目录名加该扩展名，如 results/policy_store.jsonl.gz）
+LEGACY_SUFFIX = '.jsonl.gz'
+# 导入旧版存储时每批写入的记录数
+_IMPORT_BATCH = 500
+
+
+def canonical_url(url: str) -> str:
+    """规范化政策URL：主机名小写，去掉检索参数和锚点"""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in IGNORED_QUERY_PARAMS]
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+def _digest(data) -> str:
+    return hashlib.sha1(json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def list_hash(policy_info: Dict) -> str:
+    """检索页中列表元数据的摘要"""
+    return _digest([policy_info.get(field, '') for field in LIST_FIELDS])
+
+
+def content_hash(result: Dict) -> str:
+    """详情页解析结果（基本信息、正文、附件）的摘要"""
+    return _digest([result.get('basic_info'), result.get('content'), result.get('attachments')])
+
+
+class PolicyStore(RecordPack):
+    """已解析政策的追加写入存储，可在多个线程中共用"""
+
+    pack_filename = 'policies.pack'
+    index_filename = 'policies.idx'
+    _instances = {}
+
+    def iter_records(self, latest_only: bool = False) -> Iterator[Dict]:
+        """按写入顺序逐条返回记录 {"url", "list_hash", "content_hash", "parsed_at", "result"}
+
+        Args:
+            latest_only: 只返回每个URL的最新记录（按首次写入的顺序）
+        """
+        entries = list(self.latest().values()) if latest_only else None
+        for entry, data in self.iter_pages(entries):
+            yield {'url': entry['key'], 'list_hash': entry.get('list_hash'), 'content_hash': entry.get('content_hash'),
+                   'parsed_at': entry.get('parsed_at'), 'result': json.loads(data)}
+
+    def load(self) -> Dict[str, Dict]:
+        """返回 {规范化URL: 最新记录}"""
+        return {record['url']: record for record in self.iter_records(latest_only=True)}
+
+    def add_records(self, records: Iterable[Dict]) -> int:
+        """追加写入一批记录（make_record 的返回值），解析结果和列表元数据都与最新记录相同的跳过，返回写入条数"""
+        encoded = []
+        for record in records:
+            data = json.dumps(record['result'], ensure_ascii=False).encode('utf-8')
+            record_meta = {'key': record['url'], 'list_hash': record.get('list_hash'),
+                           'content_hash': record.get('content_hash'), 'parsed_at': record.get('parsed_at'),
+                           'sha1': hashlib.sha1(data).hexdigest(), 'codec': self.codec}
+            # 压缩不需要持有锁
+            encoded.append((record_meta, self._encode_record(record_meta, data)))
+        written = 0
+        with self._lock:
+            self._load()
+            for record_meta, record in encoded:
+                previous = self._latest.get(record_meta['key'])
+                if previous is not None and previous['sha1'] == record_meta['sha1'] \
+                        and previous.get('list_hash') == record_meta['list_hash']:
+                    continue
+                self._append_record(record_meta, record)
+                written += 1
+        return written
+
+    def compact(self) -> int:
+        """重写存储文件，每个URL只保留最新记录，返回保留的记录数"""
+        kept, _ = self._compact_latest()
+        return kept
+
+    def stats(self) -> Dict:
+        entries = self.entries()
+        size = sum(os.path.getsize(p) for p in (self.pack_path, self.index_path) if os.path.exists(p))
+        return {'records': len(entries), 'policies': len(self.latest()), 'bytes': size}
+
+
+def iter_legacy_records(path: str) -> Iterator[Dict]:
+    """读取旧版 policy_store.jsonl.gz 中的记录；文件末尾不完整或有损坏的部分时在该处停止"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    except (EOFError, OSError, ValueError) as e:
+        logger.warning(f"旧版政策存储文件 {path} 读取到损坏的部分，之后的记录未导入（这些政策下次运行时重新获取）: {e}")
+
+
+def import_legacy_store(store_dir: str) -> int:
+    """把旧版存储文件（存储目录名 + .jsonl.gz）导入存储，导入后改名为 .imported（避免重复导入旧版本），返回写入条数"""
+    path = store_dir + LEGACY_SUFFIX
+    if not os.path.exists(path):
+        return 0
+    store = PolicyStore.for_dir(store_dir)
+    written = 0
+    batch = []
+    for record in iter_legacy_records(path):
+        batch.append(record)
+        if len(batch) >= _IMPORT_BATCH:
+            written += store.add_records(batch)
+            batch = []
+    written += store.add_records(batch)
+    os.replace(path, path + '.imported')
+    logger.info(f"已导入旧版政策存储文件 {path}：写入 {written} 条记录")
+    return written
+
+
+def open_policy_store(store_dir: str) -> PolicyStore:
+    """打开政策存储；同目录下还有旧版存储文件时先导入"""
+    import_legacy_store(store_dir)
+    return PolicyStore.for_dir(store_dir)
+
+
+def make_record(policy_info: Dict, result: Dict) -> Dict:
+    """根据检索页元数据和详情页解析结果生成存储记录"""
+    return {
+        'url': canonical_url(policy_info['url']),
+        'list_hash': list_hash(policy_info),
+        'content_hash': content_hash(result),
+        'parsed_at': datetime.now().isoformat(timespec='seconds'),
+        'result': result
+    }
+
+
+def main():
+    from config import SAVE_CONFIG, LOG_CONFIG
+
+    parser = argparse.ArgumentParser(description='管理人社部已解析政策存储')
+    parser.add_argument('command', choices=['compact', 'stats'])
+    args = parser.parse_args()
+
+    setup_logging(level=LOG_CONFIG['level'], fmt=LOG_CONFIG['format'], datefmt=LOG_CONFIG['date_format'])
+    store = open_policy_store(os.path.join(os.path.dirname(os.path.abspath(__file__)), SAVE_CONFIG['policy_store']))
+    before = store.stats()
+    if args.command == 'compact':
+        kept = store.compact()
+        after = store.stats()
+        logger.info(f"保留 {kept} 个政策，记录 {before['records']} -> {after['records']}，"
+                    f"文件 {before['bytes']} -> {after['bytes']} 字节")
+    else:
+        logger.info(f"{before['policies']} 个政策，{before['records']} 条记录，{before['bytes']} 字节")
+
+
+if __name__ == '__main__':
+    main()
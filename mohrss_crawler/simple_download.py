@@ -5,12 +5,110 @@
 """
 
 import os
+import re
+import sys
 import requests
-import pandas as pd
 import time
 
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from crawler_common.metrics import observe_request, count_item, write_run_summary
+from crawler_common.content_types import stream_to_file
+from config import METRICS_CONFIG
+
+DOWNLOAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+def attachment_filename(title, name, index):
+    """根据政策标题和附件名称构建保存文件名，index 用于名称为空时的兜底命名"""
+    # 构建文件名 - 更安全的处理
+    safe_title = re.sub(r'[<>:"/\\|?*\n\r\t]', '_', title)[:30]
+    safe_name = re.sub(r'[<>:"/\\|?*\n\r\t]', '_', name)
+    
+    # 确保文件名不为空
+    if not safe_title or not safe_name:
+        safe_title = "政策文件"
+        safe_name = f"附件{index}"
+        
+    # 限制总文件名长度
+    max_filename_length = 100
+    temp_filename = f"{safe_title}_{safe_name}"
+    if len(temp_filename) > max_filename_length:
+        # 保留扩展名
+        if '.' in safe_name:
+            name_parts = safe_name.rsplit('.', 1)
+            extension = '.' + name_parts[1]
+            name_part = name_parts[0]
+        else:
+            extension = ''
+            name_part = safe_name
+        
+        # 计算可用长度
+        available_length = max_filename_length - len(safe_title) - len(extension) - 1  # -1 for underscore
+        if available_length > 0:
+            safe_name = name_part[:available_length] + extension
+        else:
+            safe_name = f"附件{index}{extension}"
+        
+    return f"{safe_title}_{safe_name}"
+
+
+def fetch_attachment(url, filepath, session=None, headers=None):
+    """下载单个附件到 filepath，返回 (是否成功, 提示信息)；文件已存在时直接视为成功"""
+    # 如果文件已存在，跳过
+    if os.path.exists(filepath):
+        return True, "✅ 已存在，跳过"
+    
+    try:
+        # 下载文件
+        request_start = time.perf_counter()
+        try:
+            response = (session or requests).get(url, headers=headers or DOWNLOAD_HEADERS, timeout=30, stream=True)
+        except requests.exceptions.RequestException:
+            observe_request('mohrss_attachment', url, 'error', time.perf_counter() - request_start)
+            raise
+        if not response.ok:
+            response.close()
+            observe_request('mohrss_attachment', url, response.status_code, time.perf_counter() - request_start)
+            response.raise_for_status()
+        
+        # 检查响应内容类型：网页读入内存检查是否是错误页面，其他文件直接流式写入磁盘
+        if 'text/html' in response.headers.get('content-type', ''):
+            content = response.content
+            observe_request('mohrss_attachment', url, response.status_code,
+                            time.perf_counter() - request_start, len(content))
+            if len(content) < 1000:
+                return False, "⚠️ 可能是错误页面，跳过"
+            with open(filepath, 'wb') as f:
+                f.write(content)
+        else:
+            size = stream_to_file(response, filepath)
+            observe_request('mohrss_attachment', url, response.status_code, time.perf_counter() - request_start, size)
+        
+        # 检查文件大小
+        file_size = os.path.getsize(filepath)
+        if file_size == 0:
+            os.remove(filepath)
+            return False, "⚠️ 文件大小为0，删除空文件"
+        return True, f"✅ 下载成功 ({file_size} bytes)"
+        
+    except requests.exceptions.Timeout:
+        return False, "❌ 下载超时"
+    except requests.exceptions.ConnectionError:
+        return False, "❌ 连接错误"
+    except requests.exceptions.HTTPError as e:
+        return False, f"❌ HTTP错误: {e}"
+    except Exception as e:
+        return False, f"❌ 下载失败: {e}"
+
+
 def download_attachments():
     """下载Sheet3中的附件"""
+    import pandas as pd
     
     # 找到最新的Excel文件
     parsed_content_dir = 'parsed_content'
@@ -36,11 +134,6 @@ def download_attachments():
         df = pd.read_excel(excel_path, sheet_name='附件信息')
         print(f"📋 找到 {len(df)} 个附件")
         
-        # 设置请求头
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
         success = 0
         failed = 0
         
@@ -61,91 +154,31 @@ def download_attachments():
                 failed += 1
                 continue
             
-            # 构建文件名 - 更安全的处理
-            import re
-            safe_title = re.sub(r'[<>:"/\\|?*\n\r\t]', '_', title)[:30]
-            safe_name = re.sub(r'[<>:"/\\|?*\n\r\t]', '_', name)
-            
-            # 确保文件名不为空
-            if not safe_title or not safe_name:
-                safe_title = "政策文件"
-                safe_name = f"附件{i+1}"
-                
-            # 限制总文件名长度
-            max_filename_length = 100
-            temp_filename = f"{safe_title}_{safe_name}"
-            if len(temp_filename) > max_filename_length:
-                # 保留扩展名
-                if '.' in safe_name:
-                    name_parts = safe_name.rsplit('.', 1)
-                    extension = '.' + name_parts[1]
-                    name_part = name_parts[0]
-                else:
-                    extension = ''
-                    name_part = safe_name
-                
-                # 计算可用长度
-                available_length = max_filename_length - len(safe_title) - len(extension) - 1  # -1 for underscore
-                if available_length > 0:
-                    safe_name = name_part[:available_length] + extension
-                else:
-                    safe_name = f"附件{i+1}{extension}"
-                
-            filename = f"{safe_title}_{safe_name}"
-            
+            filename = attachment_filename(title, name, i + 1)
             filepath = os.path.join(download_dir, filename)
             
             print(f"⏳ 下载 {i+1}/{len(df)}: {filename}")
             
-            try:
-                # 如果文件已存在，跳过
-                if os.path.exists(filepath):
-                    print(f"   ✅ 已存在，跳过")
-                    success += 1
-                    continue
-                
-                # 下载文件
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                
-                # 检查响应内容类型
-                content_type = response.headers.get('content-type', '')
-                if 'text/html' in content_type and len(response.content) < 1000:
-                    print(f"   ⚠️ 可能是错误页面，跳过")
-                    failed += 1
-                    continue
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                
-                # 检查文件大小
-                file_size = os.path.getsize(filepath)
-                if file_size == 0:
-                    print(f"   ⚠️ 文件大小为0，删除空文件")
-                    os.remove(filepath)
-                    failed += 1
-                else:
-                    print(f"   ✅ 下载成功 ({file_size} bytes)")
-                    success += 1
-                
-            except requests.exceptions.Timeout:
-                print(f"   ❌ 下载超时")
-                failed += 1
-            except requests.exceptions.ConnectionError:
-                print(f"   ❌ 连接错误")
-                failed += 1
-            except requests.exceptions.HTTPError as e:
-                print(f"   ❌ HTTP错误: {e}")
-                failed += 1
-            except Exception as e:
-                print(f"   ❌ 下载失败: {e}")
+            existed = os.path.exists(filepath)
+            ok, message = fetch_attachment(url, filepath)
+            print(f"   {message}")
+            if ok:
+                success += 1
+            else:
                 failed += 1
+            if existed:
+                continue
             
             # 延迟1秒
             time.sleep(1)
         
+        count_item('mohrss_attachment', 'success', success)
+        count_item('mohrss_attachment', 'failed', failed)
+        summary_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), METRICS_CONFIG['summary_dir'])
+        summary_file = write_run_summary(summary_dir, 'simple_download')
         print(f"\n🎉 下载完成！成功: {success}, 失败: {failed}")
         print(f"📂 文件保存在: {download_dir}")
+        print(f"📊 指标汇总: {summary_file}")
         
     except Exception as e:
         print(f"❌ 读取Excel文件失败: {e}")
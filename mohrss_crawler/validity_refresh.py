@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人社部政策“是否有效”快速刷新
+
+只刷新已解析政策（results/policy_store/）的“是否有效”字段，不重新抓取和解析整个详情页：
+- 流式读取详情页，边读边在字节流中查找基本信息区块（第一个 ul.clearfix，其中包含 isUsed 脚本），
+  读到区块结束标签后立即关闭连接，只用 extract_basic_info 解析这一小段HTML，取值规则与完整解析一致
+- 所有政策在线程池中并发刷新，同一主机的请求间隔由限速器控制
+- 有变化的政策写入变更日志（每行一条JSON：url、title、old、new、checked_at），并把更新后的解析结果追加到政策存储
+
+用法（在本目录运行）：
+    python validity_refresh.py
+    python validity_refresh.py --workers 2 --host-interval 1 --limit 100
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+from crawler_common.metrics import (observe_request, count_item, set_queue_depth, start_metrics_server,
+                                    write_run_summary)
+from crawler_common.log_setup import ProgressLogger
+from crawler_common.rate_limit import HostRateLimiter
+from crawler_common.html_backend import make_soup
+from crawler_common.content_types import is_html_response
+from config import METRICS_CONFIG, VALIDITY_CONFIG
+from mohrss_detailed_parser import MOHRSSDetailedParser
+from policy_store import make_record
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+VALIDITY_LABEL = '是否有效'
+
+# 基本信息区块：extract_basic_info 使用的第一个 ul.clearfix
+_BLOCK_START = re.compile(rb'<ul\b[^>]*\bclass\s*=\s*["\']?[^"\'>]*\bclearfix\b', re.IGNORECASE)
+_BLOCK_END = re.compile(rb'</ul\s*>', re.IGNORECASE)
+
+
+def scan_info_block(chunks: Iterable[bytes]) -> Tuple[Optional[bytes], int]:
+    """在字节流中查找基本信息区块，找到区块结束标签后立即停止读取
+
+    Returns:
+        (区块HTML或None, 已读取的字节数)
+    """
+    buffer = bytearray()
+    start = None
+    searched = 0  # 已查找过结束标签的位置，避免每收到一块都从头查找
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer.extend(chunk)
+        if start is None:
+            match = _BLOCK_START.search(buffer)
+            if match is None:
+                continue
+            start = match.start()
+            searched = match.end()
+        end = _BLOCK_END.search(buffer, searched)
+        if end is not None:
+            return bytes(buffer[start:end.end()]), len(buffer)
+        # 结束标签可能被拆在两块之间，下次从稍前的位置开始查找
+        searched = max(searched, len(buffer) - 8)
+    return None, len(buffer)
+
+
+class ValidityRefresher:
+    """并发刷新已解析政策的“是否有效”字段"""
+
+    def __init__(self, workers: int = None, host_interval: float = None, chunk_size: int = None,
+                 change_log: str = None):
+        self.parser = MOHRSSDetailedParser()
+        self.logger = logging.getLogger(__name__)
+        self.workers = workers or VALIDITY_CONFIG['workers']
+        host_interval = VALIDITY_CONFIG['host_interval'] if host_interval is None else host_interval
+        self.limiter = HostRateLimiter(host_interval)
+        self.chunk_size = chunk_size or VALIDITY_CONFIG['chunk_size']
+        self.change_log = change_log or os.path.join(MODULE_DIR, VALIDITY_CONFIG['change_log'])
+        self.stats = {'checked': 0, 'changed': 0, 'failed': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+
+    def fetch_validity(self, url: str) -> Tuple[Optional[str], int]:
+        """流式获取详情页中的“是否有效”取值
+
+        Returns:
+            (取值或None, 已读取的字节数)
+        """
+        self.limiter.wait(url)
+        request_start = time.perf_counter()
+        try:
+            response = self.parser.session.get(url, timeout=30, stream=True)
+        except Exception:
+            observe_request('mohrss_validity', url, 'error', time.perf_counter() - request_start)
+            raise
+        try:
+            response.raise_for_status()
+            if not is_html_response(response):
+                # 直接链接到文件的政策没有基本信息区块，不读取文件内容
+                observe_request('mohrss_validity', url, response.status_code, time.perf_counter() - request_start)
+                return None, 0
+            block, size = scan_info_block(response.iter_content(chunk_size=self.chunk_size))
+        finally:
+            # 提前关闭连接，不读取区块之后的正文和附件部分
+            response.close()
+        observe_request('mohrss_validity', url, response.status_code, time.perf_counter() - request_start, size)
+        if block is None:
+            return None, size
+
+        basic_info = self.parser.extract_basic_info(make_soup(block, self.parser.html_backend))
+        for label, value in basic_info.items():
+            if VALIDITY_LABEL in label:
+                return value, size
+        return None, size
+
+    def refresh_one(self, record: Dict) -> Optional[Dict]:
+        """刷新一个政策，取值有变化时返回变更记录"""
+        result = record['result']
+        url = result['url']
+        try:
+            value, size = self.fetch_validity(url)
+        except Exception as e:
+            self.logger.warning(f"获取是否有效失败: {url}, {e}")
+            value, size = None, 0
+        with self._lock:
+            self.stats['checked'] += 1
+            self.stats['bytes'] += size
+            if value is None:
+                self.stats['failed'] += 1
+        if value is None:
+            count_item('mohrss_validity', 'failed')
+            return None
+
+        basic_info = result.get('basic_info') or {}
+        label = next((k for k in basic_info if VALIDITY_LABEL in k), VALIDITY_LABEL)
+        old = basic_info.get(label)
+        if old == value:
+            count_item('mohrss_validity', 'unchanged')
+            return None
+
+        count_item('mohrss_validity', 'changed')
+        updated = dict(result, basic_info=dict(basic_info, **{label: value}))
+        return {
+            'change': {'url': url, 'title': result.get('title', ''), 'old': old, 'new': value,
+                       'checked_at': datetime.now().isoformat(timespec='seconds')},
+            'record': make_record(updated, updated)
+        }
+
+    def run(self, limit: int = None) -> Dict:
+        """刷新政策存储中的所有政策，返回统计信息"""
+        store = self.parser.policy_store
+        if store is None:
+            self.logger.error("未配置政策存储（SAVE_CONFIG['policy_store']），没有可刷新的政策")
+            return self.stats
+        records = [r for r in store.load().values() if 'error' not in r['result']]
+        if limit:
+            records = records[:limit]
+        self.logger.info(f"开始刷新 {len(records)} 个政策的是否有效字段")
+
+        progress = ProgressLogger('刷新是否有效', total=len(records), logger=self.logger)
+        changes = []
+
+        def handle(record):
+            change = self.refresh_one(record)
+            progress.update(changed=int(change is not None))
+            set_queue_depth('mohrss_validity', len(records) - progress.done)
+            return change
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for change in executor.map(handle, records):
+                if change is not None:
+                    changes.append(change)
+        progress.finish()
+
+        if changes:
+            os.makedirs(os.path.dirname(self.change_log), exist_ok=True)
+            with open(self.change_log, 'a', encoding='utf-8') as f:
+                for change in changes:
+                    f.write(json.dumps(change['change'], ensure_ascii=False) + '\n')
+            store.add_records(change['record'] for change in changes)
+        self.stats['changed'] = len(changes)
+        self.logger.info(f"刷新完成：检查 {self.stats['checked']} 个，变化 {self.stats['changed']} 个，"
+                         f"失败 {self.stats['failed']} 个，读取 {self.stats['bytes']} 字节，"
+                         f"耗时 {time.perf_counter() - start_time:.1f} 秒")
+        if changes:
+            self.logger.info(f"变更日志已追加到: {self.change_log}")
+        return self.stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='快速刷新人社部政策的是否有效字段')
+    arg_parser.add_argument('--workers', type=int, default=None, help='并发线程数')
+    arg_parser.add_argument('--host-interval', type=float, default=None, help='同一主机两次请求的最小间隔（秒）')
+    arg_parser.add_argument('--limit', type=int, default=None, help='最多刷新的政策数')
+    args = arg_parser.parse_args()
+
+    # 启动本地指标接口（可选）
+    if METRICS_CONFIG['port']:
+        start_metrics_server(METRICS_CONFIG['port'])
+
+    refresher = ValidityRefresher(workers=args.workers, host_interval=args.host_interval)
+    refresher.run(limit=args.limit)
+
+    summary_file = write_run_summary(os.path.join(MODULE_DIR, METRICS_CONFIG['summary_dir']), 'validity_refresh')
+    refresher.logger.info(f"指标汇总已保存到: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
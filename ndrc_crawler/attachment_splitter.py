@@ -5,22 +5,18 @@
 对Excel文件Sheet3的附件信息进行拆解，将包含多个附件的行拆分成多行，并根据链接后缀自动填入文件类型
 """
 
-import pandas as pd
 import re
 import os
+import sys
 import logging
 from datetime import datetime
 from urllib.parse import urlparse
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/attachment_splitter.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.log_setup import setup_logging, ProgressLogger
 
 class AttachmentSplitter:
     """附件信息拆解器"""
@@ -69,6 +65,8 @@ class AttachmentSplitter:
     
     def detect_file_type(self, url):
         """根据URL后缀检测文件类型"""
+        import pandas as pd
+        
         if not url or pd.isna(url):
             return '未知类型'
         
@@ -105,6 +103,8 @@ class AttachmentSplitter:
     
     def split_attachments(self, attachment_names, attachment_links):
         """拆解附件名称和链接"""
+        import pandas as pd
+        
         if pd.isna(attachment_names) or pd.isna(attachment_links):
             return []
         
@@ -170,7 +170,7 @@ class AttachmentSplitter:
                 seen.add(link)
                 unique_links.append(link)
         
-        logging.info(f"提取到 {len(unique_links)} 个http链接")
+        logging.debug("提取到 %d 个http链接", len(unique_links))
         return unique_links
     
     def split_names_by_links(self, names_str, links_str, links):
@@ -178,12 +178,12 @@ class AttachmentSplitter:
         if len(links) == 1:
             return [names_str]
         
-        logging.info(f"链接数量: {len(links)}")
+        logging.debug("链接数量: %d", len(links))
         
         # 策略1: 尝试根据明显的序号或符号拆分名称
         name_parts = self.split_by_clear_markers(names_str, len(links))
         if len(name_parts) == len(links):
-            logging.info(f"根据明显标记拆分成功，共 {len(name_parts)} 个")
+            logging.debug("根据明显标记拆分成功，共 %d 个", len(name_parts))
             return name_parts
         
         # 策略2: 尝试不同的分隔符来拆分名称
@@ -203,12 +203,12 @@ class AttachmentSplitter:
             if sep in names_str:
                 name_parts = [part.strip() for part in names_str.split(sep) if part.strip()]
                 if len(name_parts) == len(links):
-                    logging.info(f"使用分隔符 '{sep}' 拆解附件名称，共 {len(name_parts)} 个")
+                    logging.debug("使用分隔符 '%s' 拆解附件名称，共 %d 个", sep, len(name_parts))
                     return name_parts
         
         # 策略3: 如果无法拆分，使用默认的序号分配
         name_parts = self.split_by_default_sequence(names_str, len(links))
-        logging.info(f"使用默认序号分配，共 {len(name_parts)} 个")
+        logging.debug("使用默认序号分配，共 %d 个", len(name_parts))
         
         return name_parts
     
@@ -423,6 +423,8 @@ class AttachmentSplitter:
     
     def process_excel_file(self, input_file, output_file):
         """处理Excel文件"""
+        import pandas as pd
+        
         try:
             logging.info(f"开始处理Excel文件: {input_file}")
             
@@ -432,13 +434,14 @@ class AttachmentSplitter:
             
             # 创建新的拆解数据
             split_data = []
+            progress = ProgressLogger('附件拆解', total=len(df))
             
             for index, row in df.iterrows():
                 policy_title = row['政策标题']
                 attachment_names = row['附件名称']
                 attachment_links = row['附件链接']
                 
-                logging.info(f"处理政策附件: {policy_title}")
+                logging.debug("处理政策附件: %s", policy_title)
                 
                 # 拆解附件信息
                 attachments = self.split_attachments(attachment_names, attachment_links)
@@ -471,7 +474,9 @@ class AttachmentSplitter:
                             '文件类型': attachment['文件类型']
                         })
                 
-                logging.info(f"政策 '{policy_title}' 附件拆解完成，共 {len(attachments)} 个附件")
+                logging.debug("政策 '%s' 附件拆解完成，共 %d 个附件", policy_title, len(attachments))
+                progress.update(attachments=len(attachments))
+            progress.finish()
             
             # 创建新的DataFrame
             split_df = pd.DataFrame(split_data)
@@ -519,8 +524,7 @@ class AttachmentSplitter:
 
 def main():
     """主函数"""
-    # 确保日志目录存在
-    os.makedirs('logs', exist_ok=True)
+    setup_logging('logs/attachment_splitter.log')
     
     # 输入和输出文件
     input_file = 'policy_data_full.xlsx'
@@ -61,7 +61,16 @@ CRAWL_CONFIG = {
     'delay_between_extractions': 0.5,
     
     # 分类之间的延迟（秒）
-    'delay_between_categories': 2
+    'delay_between_categories': 2,
+    
+    # 详情页缓存目录（提取数据时保存详情页HTML，供 --offline 离线重新提取使用；设为None表示不缓存）
+    'detail_cache_dir': 'results/detail_pages',
+    
+    # 详情页（pages/）和正文（bodies/）的历史版本库，联网提取时每个版本只在内容变化时写入；设为None表示不保存历史版本
+    'version_dir': 'results/versions',
+    
+    # 列表页保存到 results/archive 压缩归档（False 表示每页保存为 results/<分类>/ 下单独的HTML文件）
+    'archive_pages': True
 }
 
 # 网站配置
@@ -92,19 +101,26 @@ WEBSITE_CONFIG = {
 
 # 数据提取配置
 EXTRACTION_CONFIG = {
-    # 需要提取的字段
+    # 需要提取的字段（data_extractor_full.py 按此决定做哪些工作，--fields 可临时指定）：
+    # 只包含列表页字段（title、publish_date、document_number、category、url）时不访问详情页；
+    # 没有 full_content/content_summary 时不提取正文，没有 attachments 时不提取附件，没有 interpretations 时不提取解读
     'fields_to_extract': [
         'title',           # 标题
         'publish_date',    # 发布日期
         'document_number', # 文号
         'category',        # 分类
         'url',            # 链接
-        'content_summary', # 内容摘要
-        'full_content'     # 完整内容
+        'interpretations', # 解读（列表页）
+        'content_summary', # 内容摘要（正文前 summary_length 个字符）
+        'full_content',    # 完整内容
+        'attachments'      # 附件（详情页）
     ],
     
-    # 内容提取的最大长度
-    'max_content_length': 10000,
+    # 内容提取的最大长度（避免Excel单元格过大）
+    'max_content_length': 15000,
+    
+    # 只提取摘要（没有 full_content 或 extract_full_content 为 False）时的正文长度
+    'summary_length': 200,
     
     # 是否提取完整内容
     'extract_full_content': True,
@@ -114,7 +130,14 @@ EXTRACTION_CONFIG = {
         'remove_extra_whitespace',
         'remove_html_tags',
         'normalize_line_breaks'
-    ]
+    ],
+    
+    # HTML解析后端：默认 'html.parser'；安装 lxml 或 selectolax 后可改为 'lxml' 或 'selectolax'
+    # （切换前先用 python -m crawler_common.parser_bench 在保存的页面上核对结果；未安装时退回 html.parser）
+    'html_parser': 'html.parser',
+    
+    # 页面模板缓存：按URL前缀和页面结构记住每种模板的详情页解析方式，下次直接使用
+    'layout_cache': True
 }
 
 # 输出配置
@@ -137,3 +160,12 @@ OUTPUT_CONFIG = {
     # 提取内容保存目录
     'content_dir': 'extracted_content'
 }
+
+# 指标配置
+METRICS_CONFIG = {
+    # 本地 /metrics 接口端口（None表示不启动）
+    'port': None,
+    
+    # 每次运行结束时写出的JSON汇总目录
+    'summary_dir': 'metrics'
+}
@@ -6,31 +6,77 @@
 保存到Excel文件的四个工作表中
 """
 
-import pandas as pd
 import re
-from bs4 import BeautifulSoup
+import hashlib
 from datetime import datetime
 import os
+import sys
 import requests
 import time
 from urllib.parse import urljoin
 import logging
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/data_extractor.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.metrics import (observe_request, parse_timer, count_item,
+                                    start_metrics_server, write_run_summary)
+from crawler_common.log_setup import setup_logging, ProgressLogger
+from crawler_common.process_pool import imap_ordered, add_pool_arguments
+from crawler_common.html_backend import make_soup, iter_elements
+from crawler_common.layout_cache import LayoutCache
+from crawler_common.content_types import is_document_url, is_html_response, document_name, NotHTMLError
+from crawler_common.page_archive import PageArchive, ARCHIVE_DIRNAME, read_saved_page
+from crawler_common.version_store import VersionStore
+from config import EXTRACTION_CONFIG
+
+# 详情页未缓存时的空结果
+EMPTY_DETAIL = {'content': '', 'attachments': '', 'attachment_links': ''}
+
+# 列表页只解析政策列表容器，详情页只解析正文和附件容器，导航、页脚、侧栏不进入解析树
+LIST_SCOPE = ('ul.u-list',)
+DETAIL_SCOPE = ('div.article_con', 'div.attachment')
+
+# 正文容器的class，按优先级排列：div.article_con，其次是其他常见的正文容器
+CONTENT_CLASSES = ('article_con', 'TRS_Editor', 'content', 'article-content', 'main-content', 'policy-content',
+                   'document-content', 'text-content', 'article', 'text', 'main')
+CONTENT_PRIORITY = {name: index for index, name in enumerate(CONTENT_CLASSES)}
+# 附件扩展名（href 中包含即可），按输出顺序排列；.doc 已包含 .docx，.xls 已包含 .xlsx
+ATTACHMENT_EXTENSIONS = ('pdf', 'doc', 'ofd', 'xls', 'zip', 'rar')
+ATTACHMENT_ORDER = {ext: index for index, ext in enumerate(ATTACHMENT_EXTENSIONS)}
+ATTACHMENT_PATTERN = re.compile(r'\.(' + '|'.join(ATTACHMENT_EXTENSIONS) + ')')
+# 遍历详情页时只需要查看的元素：附件链接和正文候选容器
+WALK_SELECTOR = ', '.join([f'a[href*=".{ext}"]' for ext in ATTACHMENT_EXTENSIONS] +
+                          ['.' + name for name in CONTENT_CLASSES])
+# 详情页样式，按默认尝试顺序排列（见 PolicyDataExtractor.walk_layout）
+DETAIL_LAYOUTS = ('article_con', 'full_page')
+
+# EXTRACTION_CONFIG['fields_to_extract'] 可用的字段；详情页字段都没有请求时不访问详情页
+EXTRACTION_FIELDS = ('title', 'publish_date', 'document_number', 'category', 'url', 'interpretations',
+                     'content_summary', 'full_content', 'attachments')
+DETAIL_FIELDS = ('content_summary', 'full_content', 'attachments')
+# 列表页字段对应的“政策列表”工作表列（页码总是输出）
+LIST_FIELD_COLUMNS = {
+    'category': ('政策分类',),
+    'title': ('政策标题',),
+    'document_number': ('文号',),
+    'publish_date': ('发布日期',),
+    'url': ('政策链接',),
+    'interpretations': ('是否有解读', '解读数量')
+}
 
 class PolicyDataExtractor:
     """政策数据提取器 - 完整版本"""
     
-    def __init__(self, test_mode=False, max_test_items=10):
-        """初始化提取器"""
+    def __init__(self, test_mode=False, max_test_items=10, detail_cache_dir=None, fields=None, version_dir=None):
+        """初始化提取器
+
+        Args:
+            detail_cache_dir: 详情页缓存目录，联网提取时把详情页HTML保存到此目录，离线重新提取时从此目录读取；None表示不缓存
+            version_dir: 历史版本库目录，联网提取时把详情页和正文的新版本写入 pages/、bodies/；None表示不保存历史版本
+            fields: 需要提取的字段（见 EXTRACTION_FIELDS），None表示使用 EXTRACTION_CONFIG['fields_to_extract']
+        """
         self.policies_data = []  # 政策列表数据
         self.interpretations_data = []  # 解读数据
         self.content_data = []  # 正文内容数据
@@ -41,6 +87,17 @@ class PolicyDataExtractor:
         self.test_mode = test_mode
         self.max_test_items = max_test_items
         self.processed_count = 0
+        self.progress = ProgressLogger('提取政策')
+        self.detail_cache_dir = detail_cache_dir
+        if version_dir:
+            self.page_versions = VersionStore.for_dir(os.path.join(version_dir, 'pages'))
+            self.body_versions = VersionStore.for_dir(os.path.join(version_dir, 'bodies'))
+        else:
+            self.page_versions = self.body_versions = None
+        self.html_backend = EXTRACTION_CONFIG['html_parser']  # HTML解析后端
+        # 页面模板缓存：同一模板的详情页先按上次成功的方式解析
+        self.layouts = LayoutCache('ndrc_detail', enabled=EXTRACTION_CONFIG['layout_cache'])
+        self.set_fields(EXTRACTION_CONFIG['fields_to_extract'] if fields is None else fields)
         
         # 创建requests会话
         self.session = requests.Session()
@@ -55,16 +112,49 @@ class PolicyDataExtractor:
         
         logging.info("政策数据提取器初始化完成")
     
+    def set_fields(self, fields):
+        """按需要提取的字段决定提取哪些内容、是否访问详情页"""
+        unknown = [f for f in fields if f not in EXTRACTION_FIELDS]
+        if unknown:
+            raise ValueError(f"未知的提取字段: {', '.join(unknown)}（可选: {', '.join(EXTRACTION_FIELDS)}）")
+        self.fields = set(fields)
+        self.extract_interpretations_enabled = 'interpretations' in self.fields
+        self.extract_content_enabled = 'full_content' in self.fields or 'content_summary' in self.fields
+        self.extract_attachments_enabled = 'attachments' in self.fields
+        self.needs_detail = any(f in self.fields for f in DETAIL_FIELDS)
+        # 正文长度：完整内容按 max_content_length 截断，只要摘要时按 summary_length 截断
+        if 'full_content' in self.fields and EXTRACTION_CONFIG['extract_full_content']:
+            self.content_limit = EXTRACTION_CONFIG['max_content_length']
+        else:
+            self.content_limit = EXTRACTION_CONFIG['summary_length']
+        self.list_columns = ['页码'] + [column for field, columns in LIST_FIELD_COLUMNS.items()
+                                      if field in self.fields for column in columns]
+    
     def get_page_content(self, url, retries=3):
-        """获取页面内容"""
+        """获取页面内容（原始字节，不解码，由解析时按页面声明的编码解码）"""
         for attempt in range(retries):
             try:
-                logging.info(f"正在获取页面内容: {url}")
-                response = self.session.get(url, timeout=30)
+                logging.debug("正在获取页面内容: %s", url)
+                request_start = time.perf_counter()
+                try:
+                    # 先只读取响应头，按 Content-Type 判断是否是网页
+                    response = self.session.get(url, timeout=30, stream=True)
+                except requests.exceptions.RequestException:
+                    observe_request('ndrc_detail', url, 'error', time.perf_counter() - request_start)
+                    raise
+                if response.ok and not is_html_response(response):
+                    response.close()
+                    observe_request('ndrc_detail', url, response.status_code, time.perf_counter() - request_start)
+                    raise NotHTMLError(url, response.headers.get('Content-Type'))
+                body = response.content
+                observe_request('ndrc_detail', url, response.status_code,
+                                time.perf_counter() - request_start, len(body))
                 response.raise_for_status()
-                response.encoding = 'utf-8'
-                logging.info(f"成功获取页面: {response.status_code}")
-                return response.text
+                logging.debug("成功获取页面: %s", response.status_code)
+                return body
+            except NotHTMLError:
+                # 不是网页，重试也没有意义，由调用方作为附件处理
+                raise
             except Exception as e:
                 logging.warning(f"获取页面失败 (尝试 {attempt + 1}/{retries}): {e}")
                 if attempt < retries - 1:
@@ -73,22 +163,16 @@ class PolicyDataExtractor:
                     logging.error(f"最终获取失败: {url}")
                     return None
     
-    def extract_policy_info(self, html_content, category_name, page_num):
-        """从HTML中提取政策信息"""
-        if not html_content:
-            return
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def parse_list_page(self, html_content, category_name):
+        """解析列表页，返回政策条目列表（不访问详情页）"""
+        with parse_timer('ndrc_list'):
+            # 导航、页脚中的<li>不会被当作政策条目；页面没有列表容器时退回整页解析
+            soup = (make_soup(html_content, self.html_backend, scope=LIST_SCOPE)
+                    or make_soup(html_content, self.html_backend))
         
+        entries = []
         # 查找所有政策列表项
-        policy_items = soup.find_all('li')
-        
-        for item in policy_items:
-            # 测试模式检查
-            if self.test_mode and self.processed_count >= self.max_test_items:
-                logging.info(f"测试模式：已达到最大处理数量 {self.max_test_items}")
-                return
-            
+        for item in soup.find_all('li'):
             try:
                 # 查找政策链接
                 policy_link = item.find('a', href=True)
@@ -110,137 +194,262 @@ class PolicyDataExtractor:
                 if href.startswith('./'):
                     href = href[2:]  # 移除开头的 ./
                 
-                # 构建完整URL
-                full_url = self.build_full_url(href, category_name)
-                
-                # 提取发布日期
-                publish_date = date_span.get_text(strip=True) if date_span else ''
-                
-                # 提取文号（从标题中提取）
-                document_number = self.extract_document_number(title)
-                
-                # 检查是否有解读
-                has_interpretation = self.check_has_interpretation(item)
-                
-                # 提取解读信息
-                interpretations = self.extract_interpretations(item, href)
-                
-                # 获取政策详情页面的正文内容和附件信息
-                content_info = self.extract_policy_detail(full_url, title)
-                
-                # 添加到政策数据
-                policy_data = {
-                    '政策分类': category_name,
-                    '页码': page_num,
-                    '政策标题': title,
-                    '文号': document_number,
-                    '发布日期': publish_date,
-                    '政策链接': full_url,
-                    '是否有解读': has_interpretation,
-                    '解读数量': len(interpretations)
-                }
-                
-                self.policies_data.append(policy_data)
-                
-                # 添加正文内容数据
-                if content_info.get('content'):
-                    content_data = {
-                        '政策分类': category_name,
-                        '政策标题': title,
-                        '文号': document_number,
-                        '发布日期': publish_date,
-                        '政策链接': full_url,
-                        '正文内容': content_info['content']
-                    }
-                    self.content_data.append(content_data)
-                
-                # 添加附件数据
-                if content_info.get('attachments') or content_info.get('attachment_links'):
-                    attachment_data = {
-                        '政策分类': category_name,
-                        '政策标题': title,
-                        '文号': document_number,
-                        '发布日期': publish_date,
-                        '政策链接': full_url,
-                        '附件信息': content_info.get('attachments', ''),
-                        '附件链接': content_info.get('attachment_links', '')
-                    }
-                    self.attachments_data.append(attachment_data)
+                entries.append({
+                    'title': title,
+                    'full_url': self.build_full_url(href, category_name),
+                    'publish_date': date_span.get_text(strip=True) if date_span else '',
+                    'document_number': self.extract_document_number(title),
+                    'has_interpretation': self.extract_interpretations_enabled and self.check_has_interpretation(item),
+                    'interpretations': self.extract_interpretations(item, href) if self.extract_interpretations_enabled else []
+                })
+            except Exception as e:
+                logging.error(f"解析政策列表项时出错: {e}")
+                continue
+        
+        return entries
+    
+    def extract_policy_info(self, html_content, category_name, page_num):
+        """从HTML中提取政策信息"""
+        if not html_content:
+            return
+        
+        for entry in self.parse_list_page(html_content, category_name):
+            # 测试模式检查
+            if self.test_mode and self.processed_count >= self.max_test_items:
+                logging.info(f"测试模式：已达到最大处理数量 {self.max_test_items}")
+                return
+            
+            try:
+                # 获取政策详情页面的正文内容和附件信息；只提取列表页字段时不访问详情页
+                if self.needs_detail:
+                    content_info = self.extract_policy_detail(entry['full_url'], entry['title'])
+                else:
+                    content_info = dict(EMPTY_DETAIL)
                 
-                # 添加解读数据
-                for interpretation in interpretations:
-                    interpretation_data = {
-                        '政策分类': category_name,
-                        '政策标题': title,
-                        '政策日期': publish_date,
-                        '政策链接': full_url,
-                        '解读标题': interpretation['title'],
-                        '解读链接': interpretation['full_url']
-                    }
-                    self.interpretations_data.append(interpretation_data)
+                self.add_policy(entry, category_name, page_num, content_info)
                 
                 # 增加处理计数
                 self.processed_count += 1
+                count_item('ndrc_policy', 'extracted')
+                self.progress.update(interpretations=len(entry['interpretations']))
                 
-                logging.info(f"已处理政策: {title}")
+                logging.debug("已处理政策: %s", entry['title'])
                 
                 # 添加延迟，避免请求过于频繁
-                time.sleep(1)
+                if self.needs_detail:
+                    time.sleep(1)
                 
             except Exception as e:
                 logging.error(f"提取政策信息时出错: {e}")
                 continue
     
+    def add_policy(self, entry, category_name, page_num, content_info):
+        """把一条政策（列表页条目 + 详情页解析结果）加入四个工作表的数据"""
+        title = entry['title']
+        full_url = entry['full_url']
+        publish_date = entry['publish_date']
+        document_number = entry['document_number']
+        interpretations = entry['interpretations']
+        
+        # 添加到政策数据
+        policy_data = {
+            '政策分类': category_name,
+            '页码': page_num,
+            '政策标题': title,
+            '文号': document_number,
+            '发布日期': publish_date,
+            '政策链接': full_url,
+            '是否有解读': entry['has_interpretation'],
+            '解读数量': len(interpretations)
+        }
+        
+        self.policies_data.append(policy_data)
+        
+        # 添加正文内容数据
+        if content_info.get('content'):
+            content_data = {
+                '政策分类': category_name,
+                '政策标题': title,
+                '文号': document_number,
+                '发布日期': publish_date,
+                '政策链接': full_url,
+                '正文内容': content_info['content']
+            }
+            self.content_data.append(content_data)
+        
+        # 添加附件数据
+        if content_info.get('attachments') or content_info.get('attachment_links'):
+            attachment_data = {
+                '政策分类': category_name,
+                '政策标题': title,
+                '文号': document_number,
+                '发布日期': publish_date,
+                '政策链接': full_url,
+                '附件信息': content_info.get('attachments', ''),
+                '附件链接': content_info.get('attachment_links', '')
+            }
+            self.attachments_data.append(attachment_data)
+        
+        # 添加解读数据
+        for interpretation in interpretations:
+            interpretation_data = {
+                '政策分类': category_name,
+                '政策标题': title,
+                '政策日期': publish_date,
+                '政策链接': full_url,
+                '解读标题': interpretation['title'],
+                '解读链接': interpretation['full_url']
+            }
+            self.interpretations_data.append(interpretation_data)
+
     def extract_policy_detail(self, url, title):
         """提取政策详情页面的正文内容和附件信息"""
         try:
+            # 直接链接到文件（PDF、Word、OFD等）的条目不按网页下载，作为附件交给附件下载
+            if is_document_url(url):
+                count_item('ndrc_policy', 'document')
+                return self.document_detail(url)
+            
             html_content = self.get_page_content(url)
             if not html_content:
-                return {'content': '', 'attachments': '', 'attachment_links': ''}
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 提取正文内容
-            content = self.extract_content(soup)
-            
-            # 提取附件信息
-            attachments_info = self.extract_attachments(soup, url)
+                return dict(EMPTY_DETAIL)
             
-            return {
-                'content': content,
-                'attachments': attachments_info['attachments'],
-                'attachment_links': attachments_info['links']
-            }
+            self.save_cached_detail(url, html_content)
+            detail = self.parse_detail_page(html_content, url)
+            self.save_versions(url, html_content, detail)
+            return detail
             
+        except NotHTMLError as e:
+            count_item('ndrc_policy', 'document')
+            logging.info(f"详情链接不是网页（{e.content_type}），作为附件处理: {url}")
+            return self.document_detail(url, e.content_type)
         except Exception as e:
             logging.error(f"提取政策详情时出错: {e}")
-            return {'content': '', 'attachments': '', 'attachment_links': ''}
+            return dict(EMPTY_DETAIL)
     
-    def extract_content(self, soup):
-        """提取正文内容"""
+    def document_detail(self, url, content_type=None):
+        """直接链接到文件的政策：没有正文，文件本身作为唯一的附件"""
+        if not self.extract_attachments_enabled:
+            return dict(EMPTY_DETAIL)
+        return {'content': '', 'attachments': document_name(url, content_type), 'attachment_links': url}
+    
+    def detail_cache_path(self, url):
+        """详情页缓存文件路径（按URL哈希命名）"""
+        return os.path.join(self.detail_cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.html')
+    
+    def save_cached_detail(self, url, html_content):
+        """保存详情页HTML到缓存目录（按收到的字节原样写入）"""
+        if not self.detail_cache_dir:
+            return
         try:
-            # 优先查找特定的文章内容容器
-            content_element = soup.find('div', class_='article_con')
+            os.makedirs(self.detail_cache_dir, exist_ok=True)
+            with open(self.detail_cache_path(url), 'wb') as f:
+                f.write(html_content)
+        except OSError as e:
+            logging.warning(f"保存详情页缓存失败: {url}, {e}")
+    
+    def save_versions(self, url, html_content, detail):
+        """把详情页和解析出的正文写入历史版本库（与最新版本相同时不写入）"""
+        if self.page_versions is None:
+            return
+        try:
+            self.page_versions.add(url, html_content, url=url)
+            if not self.extract_content_enabled:
+                return
+            entry, added = self.body_versions.add(url, detail['content'], url=url)
+        except (OSError, ValueError) as e:
+            logging.warning(f"保存历史版本失败: {url}, {e}")
+            return
+        if added and entry['version'] > 1:
+            changes = entry['changes']
+            logging.info(f"正文有变化（第{entry['version']}版，增加 {changes['added']} 段，删除 {changes['removed']} 段）: {url}")
+    
+    def load_cached_detail(self, url):
+        """读取缓存的详情页HTML（字节），未缓存时返回None"""
+        if not self.detail_cache_dir:
+            return None
+        path = self.detail_cache_path(url)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def parse_detail_page(self, html_content, url):
+        """解析详情页HTML，返回正文内容和附件信息"""
+        with parse_timer('ndrc_detail'):
+            # 同一模板的页面先按上次成功的方式解析：有 article_con 的模板只解析正文和附件容器，
+            # 没有 article_con 的模板直接整页解析，不再先解析一次容器
+            _, (content_element, anchors) = self.layouts.find(
+                url, html_content, DETAIL_LAYOUTS, lambda layout: self.walk_layout(html_content, layout))
             
-            if not content_element:
-                # 如果找不到特定容器，尝试其他选择器
-                content_selectors = [
-                    '.TRS_Editor',  # 发改委网站常用的编辑器容器
-                    '.content', '.article-content', '.main-content',
-                    '.policy-content', '.document-content', '.text-content',
-                    '.article', '.text', '.main'
-                ]
-                
-                for selector in content_selectors:
-                    content_element = soup.select_one(selector)
-                    if content_element:
-                        break
+            # 提取正文内容
+            content = self.extract_content(content_element) if self.extract_content_enabled else ''
             
+            # 提取附件信息
+            if self.extract_attachments_enabled:
+                attachments_info = self.extract_attachments(anchors, url)
+            else:
+                attachments_info = {'attachments': '', 'links': ''}
+        
+        return {
+            'content': content,
+            'attachments': attachments_info['attachments'],
+            'attachment_links': attachments_info['links']
+        }
+    
+    def walk_layout(self, html_content, layout):
+        """按页面样式解析并遍历详情页，页面不是该样式时返回None
+        
+        article_con：只解析 DETAIL_SCOPE 容器，要求页面有 div.article_con；
+        full_page：解析整页，按备用容器查找正文，要求页面没有 div.article_con（否则应只解析容器）。
+        
+        Returns:
+            (正文容器元素或None, [(扩展名分组, 链接元素)]) 或 None
+        """
+        if layout == 'article_con':
+            soup = make_soup(html_content, self.html_backend, scope=DETAIL_SCOPE)
+            if soup is None:
+                return None
+            content_element, is_article_con, anchors = self.walk_detail(soup)
+            return (content_element, anchors) if is_article_con else None
+        content_element, is_article_con, anchors = self.walk_detail(make_soup(html_content, self.html_backend))
+        return None if is_article_con else (content_element, anchors)
+    
+    def walk_detail(self, soup):
+        """遍历一次详情页的全部元素，同时查找正文容器和附件链接
+        
+        正文容器按 CONTENT_CLASSES 的优先级选取（同一优先级取文档中第一个）；
+        附件链接按 href 中的扩展名分组，组的顺序与原来逐个选择器查找的顺序相同。
+        
+        Returns:
+            (正文容器元素或None, 是否为 div.article_con, [(扩展名分组, 链接元素)])
+        """
+        best_index, content_element = len(CONTENT_CLASSES), None
+        anchors = []
+        for element in iter_elements(soup, WALK_SELECTOR):
+            name = element.name
+            if name == 'a':
+                href = element.get('href')
+                if href:
+                    extensions = ATTACHMENT_PATTERN.findall(href)
+                    if extensions:
+                        anchors.append((min(ATTACHMENT_ORDER[ext] for ext in extensions), element))
+            if best_index:
+                for class_name in element.get('class') or ():
+                    index = CONTENT_PRIORITY.get(class_name)
+                    # article_con 只认 div，备用容器不限标签
+                    if index is not None and index < best_index and (index or name == 'div'):
+                        best_index, content_element = index, element
+        return content_element, best_index == 0, anchors
+    
+    def extract_content(self, content_element):
+        """提取正文内容"""
+        try:
             if content_element:
                 # 清理内容
                 content_text = self.clean_content(content_element.get_text())
-                # 限制内容长度，避免Excel单元格过大
-                return content_text[:15000] if len(content_text) > 15000 else content_text
+                # 限制内容长度（完整内容或摘要），避免Excel单元格过大
+                return content_text[:self.content_limit]
             
             return ''
             
@@ -248,39 +457,32 @@ class PolicyDataExtractor:
             logging.error(f"提取正文内容时出错: {e}")
             return ''
     
-    def extract_attachments(self, soup, base_url):
-        """提取附件信息"""
+    def extract_attachments(self, anchors, base_url):
+        """提取附件信息：按扩展名分组排列，同一链接只保留一次"""
         try:
             attachments = []
             attachment_links = []
+            positions = {}  # 完整链接 -> 在结果中的位置
             
-            # 查找附件链接 - 支持多种文件格式
-            attachment_selectors = [
-                'a[href*=".pdf"]',
-                'a[href*=".doc"]',
-                'a[href*=".docx"]',
-                'a[href*=".ofd"]',
-                'a[href*=".xls"]',
-                'a[href*=".xlsx"]',
-                'a[href*=".zip"]',
-                'a[href*=".rar"]'
-            ]
-            
-            for selector in attachment_selectors:
-                links = soup.select(selector)
-                for link in links:
-                    href = link.get('href', '')
-                    text = link.get_text(strip=True)
-                    
-                    if href:
-                        # 构建完整链接
-                        if href.startswith('http'):
-                            full_url = href
-                        else:
-                            full_url = urljoin(base_url, href)
-                        
-                        attachments.append(text if text else href)
-                        attachment_links.append(full_url)
+            for _, link in sorted(anchors, key=lambda item: item[0]):
+                href = link.get('href', '')
+                text = link.get_text(strip=True)
+                
+                # 构建完整链接
+                if href.startswith('http'):
+                    full_url = href
+                else:
+                    full_url = urljoin(base_url, href)
+                
+                if full_url in positions:
+                    # 同一附件的图标链接和文字链接只保留一条，优先使用有文字的名称
+                    index = positions[full_url]
+                    if text and attachments[index] == href:
+                        attachments[index] = text
+                    continue
+                positions[full_url] = len(attachment_links)
+                attachments.append(text if text else href)
+                attachment_links.append(full_url)
             
             return {
                 'attachments': '; '.join(attachments),
@@ -429,6 +631,8 @@ class PolicyDataExtractor:
     
     def save_to_excel(self, output_file):
         """保存数据到Excel文件 - 四个工作表"""
+        import pandas as pd
+        
         try:
             logging.info("开始保存数据到Excel文件")
             
@@ -451,7 +655,9 @@ class PolicyDataExtractor:
                         '政策分类', '页码', '政策标题', '文号', 
                         '发布日期', '政策链接', '是否有解读', '解读数量'
                     ]
-                    existing_columns = [col for col in column_order if col in policies_df.columns]
+                    # 只输出需要提取的字段对应的列
+                    existing_columns = [col for col in column_order
+                                        if col in policies_df.columns and col in self.list_columns]
                     policies_df = policies_df[existing_columns]
                     
                     policies_df.to_excel(writer, sheet_name='政策列表', index=False)
@@ -587,76 +793,159 @@ class PolicyDataExtractor:
         
         return stats
 
-def process_html_files(html_dir, output_file, test_mode=False, max_test_items=10):
-    """处理HTML文件并提取数据"""
-    logging.info("开始处理HTML文件")
-    
-    # 确保日志目录存在
-    os.makedirs('logs', exist_ok=True)
-    
-    extractor = PolicyDataExtractor(test_mode=test_mode, max_test_items=max_test_items)
+# 目录处理顺序
+CATEGORY_ORDER = ['发展改革委令', '规范性文件', '规划文本', '公告', '通知']
+
+
+def list_html_files(html_dir):
+    """按分类顺序和页码列出已保存的列表页，每个分类的每一页只取最新快照，返回 (分类, 页码, 页面来源) 列表
     
-    # 定义目录处理顺序
-    category_order = ['发展改革委令', '规范性文件', '规划文本', '公告', '通知']
+    页面来源为单独保存的HTML文件路径，或归档（html_dir/archive）中的 (归档目录, 索引)，用 read_saved_page 读取。
+    同一页保存过多次时只解析最新的一份（文件名中的时间戳最大），旧快照中的政策不会重复提取、重复访问详情页。
+    """
+    archive_dir = os.path.join(html_dir, ARCHIVE_DIRNAME)
+    archived = {}
+    if PageArchive.exists(archive_dir):
+        for entry in PageArchive.for_dir(archive_dir).latest().values():
+            if entry.get('category') and entry.get('page') is not None:
+                archived.setdefault(entry['category'], []).append(entry)
     
-    # 按照指定顺序处理目录
-    for category_name in category_order:
+    tasks = []
+    for category_name in CATEGORY_ORDER:
         category_path = os.path.join(html_dir, category_name)
         
-        if not os.path.exists(category_path):
+        # 归档中的快照，排序键与单独保存的文件相同（页码、文件名）
+        html_files = [(category_name, entry['page'], os.path.basename(entry['name']), (archive_dir, entry))
+                      for entry in archived.get(category_name, [])]
+        
+        if os.path.exists(category_path):
+            # 获取该分类下的所有HTML文件
+            for filename in os.listdir(category_path):
+                if not filename.endswith('.html'):
+                    continue
+                
+                # 从文件名中提取页码 - 支持多种格式
+                page_match = re.search(r'page_(\d+)', filename)
+                if not page_match:
+                    continue
+                
+                page_num = int(page_match.group(1))
+                html_files.append((category_name, page_num, filename, os.path.join(category_path, filename)))
+        elif not html_files:
             logging.warning(f"目录不存在: {category_name}")
             continue
         
-        logging.info(f"📁 处理分类: {category_name}")
-        
-        # 获取该分类下的所有HTML文件
-        html_files = []
-        for filename in os.listdir(category_path):
-            if not filename.endswith('.html'):
-                continue
+        # 按照页码排序，同一页码按文件名（时间戳）排序后只保留最新的一份
+        html_files.sort(key=lambda x: (x[1], x[2]))
+        latest = {page_num: (category, page_num, source) for category, page_num, _, source in html_files}
+        logging.info(f"📁 分类 {category_name}: 找到 {len(html_files)} 个HTML文件，{len(latest)} 页")
+        tasks.extend(latest.values())
+    return tasks
+
+
+def process_html_files(html_dir, output_file, test_mode=False, max_test_items=10, detail_cache_dir=None, fields=None,
+                       version_dir=None):
+    """处理HTML文件并提取数据"""
+    logging.info("开始处理HTML文件")
+    
+    extractor = PolicyDataExtractor(test_mode=test_mode, max_test_items=max_test_items,
+                                    detail_cache_dir=detail_cache_dir, fields=fields, version_dir=version_dir)
+    if not extractor.needs_detail:
+        logging.info("只提取列表页字段，不访问详情页")
+    
+    # 按照分类顺序和页码处理文件
+    for category_name, page_num, source in list_html_files(html_dir):
+        try:
+            logging.debug("处理页面: %s 第%s页", category_name, page_num)
             
-            # 从文件名中提取页码 - 支持多种格式
-            page_match = re.search(r'page_(\d+)', filename)
-            if not page_match:
-                continue
+            # 读取HTML文件或归档中的快照（字节，由解析时按页面声明的编码解码）
+            html_content = read_saved_page(source)
             
-            page_num = int(page_match.group(1))
-            file_path = os.path.join(category_path, filename)
-            html_files.append((page_num, file_path, filename))
-        
-        # 按照页码排序
-        html_files.sort(key=lambda x: x[0])
-        
-        logging.info(f"找到 {len(html_files)} 个HTML文件")
-        
-        # 处理排序后的文件
-        for page_num, file_path, filename in html_files:
-            try:
-                logging.info(f"处理文件: {filename}")
-                
-                # 读取HTML文件
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                
-                # 提取数据
-                extractor.extract_policy_info(html_content, category_name, page_num)
-                
-                # 测试模式检查
-                if test_mode and extractor.processed_count >= max_test_items:
-                    logging.info(f"测试模式：已达到最大处理数量 {max_test_items}")
-                    break
-                
-            except Exception as e:
-                logging.error(f"处理文件 {filename} 时出错: {e}")
+            # 提取数据
+            extractor.extract_policy_info(html_content, category_name, page_num)
+            
+        except Exception as e:
+            logging.error(f"处理 {category_name} 第{page_num}页时出错: {e}")
         
         # 测试模式检查
         if test_mode and extractor.processed_count >= max_test_items:
+            logging.info(f"测试模式：已达到最大处理数量 {max_test_items}")
             break
     
+    extractor.progress.finish()
+    extractor.layouts.log_summary(logging.getLogger())
+    
     # 保存数据到Excel
     extractor.save_to_excel(output_file)
+    log_statistics(extractor)
+    
+    return extractor
+
+
+# 离线重新提取时每个子进程共用的提取器
+_worker_extractor = None
+
+
+def _init_offline_worker(detail_cache_dir, fields=None):
+    """子进程初始化：创建提取器"""
+    global _worker_extractor
+    _worker_extractor = PolicyDataExtractor(detail_cache_dir=detail_cache_dir, fields=fields)
+
+
+def _extract_file_offline(task):
+    """在子进程中解析一个列表页及其缓存的详情页，返回 [(列表页条目, 详情页解析结果, 是否命中缓存), ...]"""
+    category_name, page_num, source = task
+    extractor = _worker_extractor
+    html_content = read_saved_page(source)
     
-    # 打印统计信息
+    records = []
+    for entry in extractor.parse_list_page(html_content, category_name):
+        if not extractor.needs_detail:
+            records.append((entry, dict(EMPTY_DETAIL), True))
+            continue
+        if is_document_url(entry['full_url']):
+            records.append((entry, extractor.document_detail(entry['full_url']), True))
+            continue
+        detail_html = extractor.load_cached_detail(entry['full_url'])
+        if detail_html is None:
+            records.append((entry, dict(EMPTY_DETAIL), False))
+        else:
+            records.append((entry, extractor.parse_detail_page(detail_html, entry['full_url']), True))
+    return records
+
+
+def reextract_html_files(html_dir, output_file, detail_cache_dir, workers=None, max_tasks_per_child=100, fields=None):
+    """离线重新提取：不访问网络，用多进程解析已保存的列表页和缓存的详情页
+
+    子进程按文件并行解析，主进程按分类顺序和页码依次合并结果，输出与单进程提取一致。
+    修改选择器后可用于快速重新生成整个Excel。
+    """
+    logging.info("开始离线重新提取HTML文件")
+    tasks = list_html_files(html_dir)
+    
+    extractor = PolicyDataExtractor(detail_cache_dir=detail_cache_dir, fields=fields)
+    progress = ProgressLogger('离线提取', total=len(tasks))
+    cache_misses = 0
+    results = imap_ordered(_extract_file_offline, tasks, workers=workers, max_tasks_per_child=max_tasks_per_child,
+                           initializer=_init_offline_worker, initargs=(detail_cache_dir, fields))
+    for (category_name, page_num, _), records in zip(tasks, results):
+        for entry, content_info, cached in records:
+            extractor.add_policy(entry, category_name, page_num, content_info)
+            count_item('ndrc_policy', 'extracted' if cached else 'cache_miss')
+            cache_misses += not cached
+        progress.update(policies=len(records))
+    progress.finish()
+    
+    if cache_misses:
+        logging.warning(f"{cache_misses} 个政策的详情页没有缓存，正文和附件为空（需联网提取一次以生成缓存）")
+    
+    extractor.save_to_excel(output_file)
+    log_statistics(extractor)
+    return extractor
+
+
+def log_statistics(extractor):
+    """打印统计信息"""
     stats = extractor.get_statistics()
     logging.info("\n📊 数据提取统计:")
     logging.info(f"总政策数: {stats['total_policies']}")
@@ -665,14 +954,46 @@ def process_html_files(html_dir, output_file, test_mode=False, max_test_items=10
     logging.info(f"总附件数: {stats['total_attachments']}")
     logging.info(f"有解读的政策数: {stats['policies_with_interpretations']}")
     logging.info(f"涉及分类: {', '.join(stats['categories'])}")
+
+
+def main():
+    import argparse
+    from config import CRAWL_CONFIG, METRICS_CONFIG
     
-    return extractor
+    parser = argparse.ArgumentParser(description='从已保存的列表页提取发改委政策数据')
+    parser.add_argument('--html-dir', default='results', help='列表页HTML所在目录')
+    parser.add_argument('--output', default='policy_data_full.xlsx', help='输出Excel文件')
+    parser.add_argument('--offline', action='store_true',
+                        help='离线重新提取：不访问网络，多进程解析列表页和缓存的详情页')
+    parser.add_argument('--test', action='store_true', help='测试模式：只处理前10个政策（仅联网提取）')
+    parser.add_argument('--fields', nargs='+', choices=EXTRACTION_FIELDS, default=None,
+                        help="需要提取的字段，默认使用 EXTRACTION_CONFIG['fields_to_extract']；"
+                             "只指定列表页字段时不访问详情页")
+    add_pool_arguments(parser)
+    args = parser.parse_args()
+    
+    setup_logging('logs/data_extractor.log')
+    if METRICS_CONFIG['port']:
+        start_metrics_server(METRICS_CONFIG['port'])
+    
+    if args.offline:
+        logging.info("🚀 启动数据提取器 - 离线重新提取模式")
+        reextract_html_files(args.html_dir, args.output, CRAWL_CONFIG['detail_cache_dir'],
+                             workers=args.workers, max_tasks_per_child=args.max_tasks_per_child, fields=args.fields)
+    elif args.test:
+        # 测试模式：只处理前10个政策
+        logging.info("🚀 启动数据提取器 - 测试模式")
+        process_html_files(args.html_dir, args.output, test_mode=True, max_test_items=10,
+                           detail_cache_dir=CRAWL_CONFIG['detail_cache_dir'], fields=args.fields,
+                           version_dir=CRAWL_CONFIG['version_dir'])
+    else:
+        # 完整模式：处理所有政策
+        logging.info("🚀 启动数据提取器 - 完整模式")
+        process_html_files(args.html_dir, args.output, test_mode=False,
+                           detail_cache_dir=CRAWL_CONFIG['detail_cache_dir'], fields=args.fields,
+                           version_dir=CRAWL_CONFIG['version_dir'])
+    logging.info(f"指标汇总已保存: {write_run_summary(METRICS_CONFIG['summary_dir'], 'data_extractor_full')}")
+
 
 if __name__ == "__main__":
-    # 完整模式：处理所有政策
-    logging.info("🚀 启动数据提取器 - 完整模式")
-    process_html_files('results', 'policy_data_full.xlsx', test_mode=False)
-    
-    # 测试模式：只处理前10个政策
-    # logging.info("🚀 启动数据提取器 - 测试模式")
-    # process_html_files('results', 'policy_data_test.xlsx', test_mode=True, max_test_items=10)
+    main()
@@ -5,23 +5,22 @@
 将网页中的附件链接另存为文件，使用附件标题作为文件名
 """
 
-import pandas as pd
 import requests
 import os
+import sys
 import logging
 import time
 from urllib.parse import urlparse, unquote
 import re
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/download_attachments.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.metrics import REGISTRY, observe_request, start_metrics_server, write_run_summary
+from crawler_common.log_setup import setup_logging, ProgressLogger
+
+DOWNLOAD_FILES = REGISTRY.gauge('ndrc_attachment_downloads', '附件下载统计（按结果）', ('result',))
 
 class AttachmentDownloader:
     """附件下载器 - 下载网页中的附件文件"""
@@ -104,13 +103,19 @@ class AttachmentDownloader:
             # 检查文件是否已存在
             file_path = os.path.join(category_dir, filename)
             if os.path.exists(file_path):
-                logging.info(f"文件已存在，跳过: {filename}")
+                logging.debug("文件已存在，跳过: %s", filename)
                 self.download_stats['skipped'] += 1
                 return True
             
             # 下载文件
-            logging.info(f"正在下载: {filename}")
-            response = self.session.get(url, timeout=30, stream=True)
+            logging.debug("正在下载: %s", filename)
+            request_start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=30, stream=True)
+            except requests.exceptions.RequestException:
+                observe_request('ndrc_attachment', url, 'error', time.perf_counter() - request_start)
+                raise
+            status = response.status_code
             response.raise_for_status()
             
             # 检查内容类型，确保是文件而不是网页
@@ -120,12 +125,15 @@ class AttachmentDownloader:
                 # 继续下载，但记录警告
             
             # 保存文件
+            size = 0
             with open(file_path, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     if chunk:
                         f.write(chunk)
+                        size += len(chunk)
+            observe_request('ndrc_attachment', url, status, time.perf_counter() - request_start, size)
             
-            logging.info(f"下载成功: {filename}")
+            logging.debug("下载成功: %s", filename)
             self.download_stats['success'] += 1
             return True
             
@@ -140,6 +148,8 @@ class AttachmentDownloader:
     
     def process_attachments(self):
         """处理附件表格"""
+        import pandas as pd
+        
         try:
             # 读取Excel文件
             logging.info(f"正在读取附件表格: {self.excel_file}")
@@ -202,6 +212,7 @@ class AttachmentDownloader:
             logging.info(f"政策分类列: {category_column}")
             
             # 处理每一行
+            progress = ProgressLogger('下载附件', total=len(df))
             for index, row in df.iterrows():
                 try:
                     # 获取附件链接
@@ -227,6 +238,7 @@ class AttachmentDownloader:
                     success = self.download_file(attachment_link, filename, category_dir)
                     
                     self.download_stats['total'] += 1
+                    progress.update()
                     
                     # 添加延迟避免请求过快
                     time.sleep(0.5)
@@ -236,6 +248,8 @@ class AttachmentDownloader:
                     self.download_stats['failed'] += 1
                     continue
             
+            progress.finish()
+            
             # 输出统计信息
             self.print_stats()
             
@@ -244,6 +258,8 @@ class AttachmentDownloader:
     
     def print_stats(self):
         """打印下载统计信息"""
+        for result, value in self.download_stats.items():
+            DOWNLOAD_FILES.set(value, result=result)
         print("\n" + "="*60)
         print("📊 附件下载统计信息:")
         print("="*60)
@@ -300,6 +316,12 @@ def main():
         print("请确保full_data目录下有附件.xlsx文件")
         return
     
+    setup_logging('logs/download_attachments.log')
+    
+    from config import METRICS_CONFIG
+    if METRICS_CONFIG['port']:
+        start_metrics_server(METRICS_CONFIG['port'])
+    
     # 创建下载器
     downloader = AttachmentDownloader(
         excel_file=excel_file,
@@ -318,6 +340,7 @@ def main():
     # 创建索引文件
     downloader.create_index_file()
     
+    print(f"📊 指标汇总: {write_run_summary(METRICS_CONFIG['summary_dir'], 'download_attachments')}")
     print(f"\n⏱️ 总耗时: {end_time - start_time:.1f} 秒")
     print("🎉 附件下载完成！")
 
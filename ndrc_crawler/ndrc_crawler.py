@@ -10,31 +10,22 @@ import time
 from datetime import datetime
 import logging
 import os
+import sys
 import urllib3
-from bs4 import BeautifulSoup
 
 # 导入配置
-from config import POLICY_CATEGORIES, WEBSITE_CONFIG, CRAWL_CONFIG
+from config import POLICY_CATEGORIES, WEBSITE_CONFIG, CRAWL_CONFIG, EXTRACTION_CONFIG, METRICS_CONFIG
 
-# 设置日志
-def setup_logging():
-    """设置日志配置"""
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s | %(levelname)-8s | %(message)s',
-        handlers=[
-            logging.FileHandler(f"logs/ndrc_crawler_{datetime.now().strftime('%Y%m%d')}.log", encoding='utf-8')
-        ]
-    )
-    logger = logging.getLogger(__name__)
-    
-    logger.info("发改委爬虫启动")
-    return logger
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common.metrics import observe_request, count_item, start_metrics_server, write_run_summary
+from crawler_common.log_setup import setup_logging
+from crawler_common.html_backend import make_soup
+from crawler_common.page_archive import PageArchive, ARCHIVE_DIRNAME
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
 class NDRCCrawler:
     """发改委爬虫类"""
@@ -50,25 +41,37 @@ class NDRCCrawler:
         if not os.path.exists('results'):
             os.makedirs('results')
         
+        # 列表页快照归档（未启用时每页保存为单独的HTML文件）
+        self.archive = PageArchive.for_dir(os.path.join('results', ARCHIVE_DIRNAME)) \
+            if CRAWL_CONFIG.get('archive_pages') else None
+        
     def get_page_content(self, url):
-        """获取页面内容"""
+        """获取页面内容（原始字节，不解码，由解析时按页面声明的编码解码）"""
         try:
-            logger.info(f"访问: {url}")
-            response = self.session.get(url, timeout=WEBSITE_CONFIG['timeout'])
+            logger.debug("访问: %s", url)
+            request_start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=WEBSITE_CONFIG['timeout'])
+            except requests.exceptions.RequestException:
+                observe_request('ndrc_list', url, 'error', time.perf_counter() - request_start)
+                raise
+            body = response.content
+            observe_request('ndrc_list', url, response.status_code,
+                            time.perf_counter() - request_start, len(body))
             response.raise_for_status()
-            response.encoding = 'utf-8'
-            logger.info(f"成功: {response.status_code}")
-            return response.text
+            logger.debug("成功: %s", response.status_code)
+            return body
         except Exception as e:
             logger.error(f"失败: {e}")
             return None
     
-    def has_next_page(self, html_content):
-        """检查是否有下一页"""
+    @staticmethod
+    def has_next_page(html_content, backend=None):
+        """检查是否有下一页（backend 为None时使用 EXTRACTION_CONFIG['html_parser']）"""
         if not html_content:
             return False
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content, backend or EXTRACTION_CONFIG['html_parser'])
         
         # 查找下一页链接
         next_indicators = [
@@ -81,27 +84,42 @@ class NDRCCrawler:
         
         return any(next_indicators)
     
-    def save_page(self, category_name, page_num, html_content):
-        """保存页面到results的子文件夹"""
+    def save_page(self, category_name, page_num, html_content, url=None):
+        """保存页面到results的子文件夹或归档（按收到的字节原样写入）
+        
+        Returns:
+            'saved'：已保存；'unchanged'：与归档中该页的最新快照相同，未重复保存；'error'：保存失败
+        """
         try:
+            # 生成文件名
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"page_{page_num}_{timestamp}.html"
+            
+            if self.archive is not None:
+                entry, added = self.archive.add(f"{category_name}/{filename}", html_content, url=url,
+                                                category=category_name, page=page_num)
+                if not added:
+                    logger.debug("内容未变化，沿用快照: %s", entry['name'])
+                    return 'unchanged'
+                logger.debug("已归档: %s", entry['name'])
+                return 'saved'
+            
             # 创建分类子目录
             category_dir = os.path.join('results', category_name)
             if not os.path.exists(category_dir):
                 os.makedirs(category_dir)
-            
-            # 生成文件名
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"page_{page_num}_{timestamp}.html"
             filepath = os.path.join(category_dir, filename)
             
             # 保存HTML文件
-            with open(filepath, 'w', encoding='utf-8') as f:
+            with open(filepath, 'wb') as f:
                 f.write(html_content)
             
-            logger.info(f"已保存: {filepath}")
+            logger.debug("已保存: %s", filepath)
+            return 'saved'
             
         except Exception as e:
             logger.error(f"保存失败: {e}")
+            return 'error'
     
     def crawl_category(self, category_name, category_config):
         """爬取单个分类"""
@@ -126,7 +144,7 @@ class NDRCCrawler:
                 break
             
             # 保存页面
-            self.save_page(category_name, page_num, html_content)
+            count_item('ndrc_list', self.save_page(category_name, page_num, html_content, url=page_url))
             
             # 检查是否有下一页
             if page_num > 1 and not self.has_next_page(html_content):
@@ -162,10 +180,17 @@ class NDRCCrawler:
 
 def main():
     """主函数"""
+    setup_logging(f"logs/ndrc_crawler_{datetime.now().strftime('%Y%m%d')}.log",
+                  fmt='%(asctime)s | %(levelname)-8s | %(message)s', console=False)
+    logger.info("发改委爬虫启动")
     try:
         logger.info("开始执行爬虫")
+        if METRICS_CONFIG['port']:
+            start_metrics_server(METRICS_CONFIG['port'])
         crawler = NDRCCrawler()
         crawler.crawl_all()
+        summary_file = write_run_summary(METRICS_CONFIG['summary_dir'], 'ndrc_crawler')
+        logger.info(f"指标汇总已保存: {summary_file}")
         logger.info("爬虫执行完成")
     except Exception as e:
         logger.error(f"执行出错: {e}")
@@ -12,19 +12,16 @@ from datetime import datetime
 import subprocess
 import time
 
+# 将仓库根目录加入模块搜索路径，以便导入 crawler_common 公共模块
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from crawler_common import log_setup
+
 def setup_logging():
     """设置日志配置"""
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s | %(levelname)-8s | %(message)s',
-        handlers=[
-            logging.FileHandler(f"logs/run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log", encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    log_setup.setup_logging(f"logs/run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log",
+                            fmt='%(asctime)s | %(levelname)-8s | %(message)s')
     return logging.getLogger(__name__)
 
 def run_command(command, description, logger):
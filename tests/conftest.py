@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""测试公共设置：把仓库根目录加入模块搜索路径，并让被测代码不写日志文件"""
+
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _no_log_files():
+    # 解析器初始化时会在站点目录下创建 logs/ 并写日志文件；先按子进程方式配置，之后的 setup_logging 不再生效
+    from crawler_common.log_setup import setup_child_logging
+    setup_child_logging()
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""导入各站点模块不应创建 logs/ 等文件，也不应加载 pandas、bs4、openpyxl"""
+
+import pytest
+
+from crawler_common.import_budget import DEFAULT_MODULES, check_module
+
+# 只在实际使用时才允许加载的依赖
+DEFERRED_MODULES = ('pandas', 'bs4', 'openpyxl')
+
+
+@pytest.mark.parametrize('spec', DEFAULT_MODULES)
+def test_import_has_no_side_effects(spec):
+    # 耗时与机器负载有关，由 python -m crawler_common.import_budget 检查，这里不限制
+    result = check_module(spec, float('inf'))
+    assert not any(p.startswith('导入失败') for p in result['problems']), result['problems']
+    assert result['created'] == []
+    assert not [m for m in result['heavy'] if m in DEFERRED_MODULES]
+    assert not result['log_handlers']
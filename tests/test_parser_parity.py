@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""各HTML解析后端在基准测试样例页面上的提取结果应与 html.parser 一致"""
+
+import pytest
+
+from crawler_common.html_backend import BACKENDS, DEFAULT_BACKEND, backend_available
+from crawler_common.parser_bench import SCENARIOS, _first_difference, _normalize, pad_page
+
+
+@pytest.mark.parametrize('backend', [b for b in BACKENDS if b != DEFAULT_BACKEND])
+@pytest.mark.parametrize('scenario', sorted(SCENARIOS))
+def test_backend_matches_html_parser(scenario, backend):
+    if not backend_available(backend):
+        pytest.skip(f'未安装 {backend} 所需的包')
+    parse, pages = SCENARIOS[scenario]()
+    for i, html in enumerate(pages):
+        # 与基准测试一样加上无关内容，并以原始字节交给解析器
+        html = pad_page(html, 8).encode('utf-8')
+        expected = parse(html, DEFAULT_BACKEND)
+        actual = parse(html, backend)
+        assert _normalize(actual) == _normalize(expected), f'第{i + 1}页: {_first_difference(expected, actual)}'
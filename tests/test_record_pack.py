@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""RecordPack 在写入中断（pack 文件或索引不完整）后重新打开时的恢复"""
+
+import json
+import os
+
+from crawler_common.page_archive import PageArchive
+
+
+def _write_pages(archive_dir, count=3):
+    archive = PageArchive(archive_dir)
+    for i in range(count):
+        archive.add(f'通知/page_{i + 1}_20250808_120000.html', f'<html>第{i + 1}页</html>'.encode('utf-8'))
+    return archive
+
+
+def _pages(archive_dir):
+    return {entry['key']: data for entry, data in PageArchive(archive_dir).iter_pages()}
+
+
+def test_truncated_pack_drops_partial_record(tmp_path):
+    archive = _write_pages(str(tmp_path))
+    last = archive.entries()[-1]
+    # 最后一条记录只写入了一半，索引也没来得及写入
+    with open(archive.pack_path, 'r+b') as f:
+        f.truncate(last['offset'] + last['length'] // 2)
+    with open(archive.index_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(archive.index_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:-1])
+
+    pages = _pages(str(tmp_path))
+    assert sorted(pages) == ['通知/page_1', '通知/page_2']
+    assert pages['通知/page_2'] == '<html>第2页</html>'.encode('utf-8')
+    assert os.path.getsize(archive.pack_path) == last['offset']
+
+    # 截掉后可以继续写入
+    reopened = PageArchive(str(tmp_path))
+    _, written = reopened.add('通知/page_3_20250808_130000.html', b'<html>new</html>')
+    assert written
+    assert _pages(str(tmp_path))['通知/page_3'] == b'<html>new</html>'
+
+
+def test_missing_index_lines_are_recovered_from_pack(tmp_path):
+    archive = _write_pages(str(tmp_path))
+    with open(archive.index_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(archive.index_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:1])
+
+    assert len(_pages(str(tmp_path))) == 3
+    with open(archive.index_path, 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 3
+
+
+def test_torn_index_line_is_skipped_and_recovered(tmp_path):
+    archive = _write_pages(str(tmp_path))
+    with open(archive.index_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(archive.index_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:2] + [lines[2][:len(lines[2]) // 2]])
+
+    pages = _pages(str(tmp_path))
+    assert pages['通知/page_3'] == '<html>第3页</html>'.encode('utf-8')
+    assert len(PageArchive(str(tmp_path)).entries()) == 3
+
+
+def test_index_past_pack_end_is_rebuilt(tmp_path):
+    archive = _write_pages(str(tmp_path))
+    last = archive.entries()[-1]
+    # compact 中断等情况：索引指向 pack 文件之外
+    with open(archive.index_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(dict(last, offset=last['offset'] + last['length'])) + '\n')
+
+    reopened = PageArchive(str(tmp_path))
+    assert [e['key'] for e in reopened.entries()] == ['通知/page_1', '通知/page_2', '通知/page_3']
+    assert reopened.read(reopened.latest()['通知/page_1']) == '<html>第1页</html>'.encode('utf-8')
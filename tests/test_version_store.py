@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""增量编码的往返：在上一版本上应用增量应得到新版本"""
+
+import random
+
+import pytest
+
+from crawler_common.version_store import (VersionStore, apply_delta, apply_delta_segments, encode_delta,
+                                          split_segments)
+
+BASE = ''.join(f'<p>第{i}条：关于做好2024年人力资源工作的通知。</p>\n' for i in range(200)).encode('utf-8')
+
+
+def _edit(content, rng, edits=5):
+    """随机插入、删除、替换若干行"""
+    lines = content.split(b'\n')
+    for _ in range(edits):
+        i = rng.randrange(len(lines))
+        op = rng.choice(('insert', 'delete', 'replace'))
+        if op == 'insert':
+            lines.insert(i, f'<p>新增内容{rng.random()}</p>'.encode('utf-8'))
+        elif op == 'delete' and len(lines) > 1:
+            del lines[i]
+        else:
+            lines[i] = f'<div>修改{rng.random()}</div>'.encode('utf-8')
+    return b'\n'.join(lines)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_delta_round_trip(seed):
+    rng = random.Random(seed)
+    a = _edit(BASE, rng)
+    b = _edit(a, rng, edits=rng.randint(0, 30))
+    delta, _ = encode_delta(split_segments(a), split_segments(b))
+    assert b''.join(apply_delta_segments(split_segments(a), delta)) == b
+    assert apply_delta(a, delta) == b
+
+
+@pytest.mark.parametrize('a, b', [
+    (b'', b''),
+    (b'', BASE),
+    (BASE, b''),
+    (BASE, BASE),
+    (b'<p>a</p>', b'<p>b</p><p>a</p>'),
+])
+def test_delta_round_trip_edge_cases(a, b):
+    delta, _ = encode_delta(split_segments(a), split_segments(b))
+    assert apply_delta(a, delta) == b
+
+
+def test_version_chain_past_keyframe_interval(tmp_path):
+    store = VersionStore(str(tmp_path), keyframe_interval=4)
+    rng = random.Random(0)
+    versions = [BASE]
+    for _ in range(10):
+        versions.append(_edit(versions[-1], rng, edits=2))
+    for content in versions:
+        store.add('doc', content)
+
+    entries = store.versions('doc')
+    assert len(entries) == len(versions)
+    assert any(e['kind'] == 'delta' for e in entries)
+    assert max(e['chain'] for e in entries) < 4
+    for i, content in enumerate(versions, 1):
+        assert store.get('doc', i) == content